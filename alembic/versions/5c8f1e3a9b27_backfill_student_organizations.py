@@ -0,0 +1,39 @@
+"""backfill student organizations
+
+Revision ID: 5c8f1e3a9b27
+Revises: e9a4c1d6b273
+Create Date: 2026-10-18 23:12:37.540918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c8f1e3a9b27'
+down_revision: Union[str, None] = 'e9a4c1d6b273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # ученикам организация раньше не проставлялась — берём её у тренера,
+    # иначе на поддомене организации фильтр по organization_id скрывает всех учеников
+    op.execute("""
+        UPDATE users AS u
+        SET organization_id = c.organization_id
+        FROM student_profiles sp
+        JOIN users c ON c.id = sp.coach_id
+        WHERE u.id = sp.student_id
+          AND u.organization_id IS NULL
+          AND c.organization_id IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # какие организации проставила миграция, а какие были раньше, уже не отличить — оставляем как есть
+    pass
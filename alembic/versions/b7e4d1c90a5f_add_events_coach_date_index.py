@@ -0,0 +1,29 @@
+"""add events coach date index
+
+Revision ID: b7e4d1c90a5f
+Revises: 3f1b2a9c7d40
+Create Date: 2026-10-18 10:41:37.902115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e4d1c90a5f'
+down_revision: Union[str, None] = '3f1b2a9c7d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_events_coach_id_date_start', 'events',
+                    ['coach_id', sa.text('date_start DESC'), sa.text('id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_events_coach_id_date_start', table_name='events')
@@ -0,0 +1,68 @@
+"""add row versions
+
+Revision ID: e9a4c1d6b273
+Revises: d3e8b5a2c7f1
+Create Date: 2026-10-18 22:04:51.318624
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9a4c1d6b273'
+down_revision: Union[str, None] = 'd3e8b5a2c7f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+VERSIONED_TABLES = ('users', 'groups', 'events', 'results', 'student_profiles', 'students_events')
+DISCIPLINE_TABLES = ('karate_kumite_results', 'karate_kata_results', 'karate_team_results')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE SEQUENCE row_version_seq")
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version', sa.BigInteger(),
+                                       server_default=sa.text("nextval('row_version_seq')"), nullable=False))
+
+    # версия выставляется триггером, а не приложением: её поднимают и массовые UPDATE, и правки руками
+    op.execute("""
+        CREATE FUNCTION bump_row_version() RETURNS trigger AS $$
+        BEGIN
+            NEW.version := nextval('row_version_seq');
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in VERSIONED_TABLES:
+        op.execute(f"CREATE TRIGGER {table}_row_version BEFORE INSERT OR UPDATE ON {table} "
+                   f"FOR EACH ROW EXECUTE FUNCTION bump_row_version()")
+
+    # правка только колонок дисциплины не трогает results — поднимаем версию базовой строки
+    op.execute("""
+        CREATE FUNCTION bump_result_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE results SET version = nextval('row_version_seq') WHERE id = NEW.id;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table in DISCIPLINE_TABLES:
+        op.execute(f"CREATE TRIGGER {table}_result_version AFTER UPDATE ON {table} "
+                   f"FOR EACH ROW EXECUTE FUNCTION bump_result_version()")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in DISCIPLINE_TABLES:
+        op.execute(f"DROP TRIGGER {table}_result_version ON {table}")
+    op.execute("DROP FUNCTION bump_result_version()")
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_row_version ON {table}")
+        op.drop_column(table, 'version')
+    op.execute("DROP FUNCTION bump_row_version()")
+    op.execute("DROP SEQUENCE row_version_seq")
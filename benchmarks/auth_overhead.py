@@ -0,0 +1,50 @@
+# Накладные расходы на проверку токена в get_current_user.
+# Запуск из корня проекта: python -m benchmarks.auth_overhead
+import asyncio
+import time
+
+from authlib.jose import jwt
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.config import SECURITY_SECRET_KEY
+from src.security import create_access_token, get_current_user, token_cache
+
+
+ITERATIONS = 20000
+
+
+def legacy_decode(token: str):
+    # то, что get_current_user делал раньше на каждый запрос
+    claims = jwt.decode(token, SECURITY_SECRET_KEY)
+    claims.validate()
+    return claims["sub"]
+
+
+async def main():
+    token = create_access_token(data={"sub": "00000000-0000-0000-0000-000000000001"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        legacy_decode(token)
+    legacy = (time.perf_counter() - start) / ITERATIONS
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        token_cache.clear()
+        await get_current_user(credentials)
+    cold = (time.perf_counter() - start) / ITERATIONS
+
+    await get_current_user(credentials)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await get_current_user(credentials)
+    cached = (time.perf_counter() - start) / ITERATIONS
+
+    print(f"legacy decode:        {legacy * 1e6:8.2f} us/request")
+    print(f"precompiled key, miss: {cold * 1e6:8.2f} us/request")
+    print(f"cache hit:            {cached * 1e6:8.2f} us/request")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,152 @@
+# Сериализация списков учеников и результатов: путь FastAPI (model_validate по элементам
+# + проверка по response_model + JSONResponse) против fast_json_response.
+# Запуск из корня проекта: python -m benchmarks.json_responses
+# БД не нужна: ORM-объекты и строки результатов собираются в памяти.
+import asyncio
+import datetime
+import os
+import time
+import uuid
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+# все модели со связями — иначе мапперы не сконфигурируются
+from src.models.users import UserORM
+from src.models.events import EventORM
+from src.models.students import StudentProfileORM
+from src.models.results import ResultORM
+from src.models.groups import GroupORM
+from src.models.coaches import CoachProfileORM
+from src.models.categories import GenderORM
+from src.models.leaderboards import StudentSeasonStatsORM
+import src.schemas.results as results_schemas
+import src.schemas.students as students_schemas
+from src.utils.fast_json import fast_json_response
+
+
+SIZES = [int(size) for size in os.getenv("BENCH_ITEMS", "1000,5000,10000").split(",")]
+REPEAT = int(os.getenv("BENCH_REPEAT", 5))
+RESULTS_PER_EVENT = 10
+
+
+def make_students(count: int) -> list[StudentProfileORM]:
+    coach_id = uuid.uuid4()
+    group = GroupORM(id=uuid.uuid4(), name="Старшая группа", coach_id=coach_id)
+    return [
+        StudentProfileORM(
+            student_id=(student_id := uuid.uuid4()),
+            coach_id=coach_id,
+            group_id=group.id,
+            group=group,
+            student_data=UserORM(
+                id=student_id,
+                first_name="Иван",
+                patronymic="Петрович",
+                last_name=f"Иванов-{i}",
+                email=f"student{i}@example.com",
+                date_of_birth=datetime.date(2012, 1, 1) + datetime.timedelta(days=i % 3000),
+                phone_number="+79990000000",
+                img_url="https://storage.example.com/avatars/default.webp",
+                img_variants={"64": "https://storage.example.com/avatars/default-64.webp"},
+            ),
+        )
+        for i in range(count)
+    ]
+
+
+def make_results(count: int) -> list[dict]:
+    # строки в том виде, в каком их отдаёт ResultRequest.get_results: count результатов по мероприятиям
+    coach_id = uuid.uuid4()
+    place = {"id": uuid.uuid4(), "name": "1"}
+    events = []
+    for i in range(0, count, RESULTS_PER_EVENT):
+        event_id = uuid.uuid4()
+        events.append({
+            "id": event_id,
+            "name": f"Первенство города {i}",
+            "date_start": datetime.date(2026, 1, 1),
+            "date_end": datetime.date(2026, 1, 2),
+            "coach_id": coach_id,
+            "results": [
+                {
+                    "id": uuid.uuid4(),
+                    "event_id": event_id,
+                    "sport_code": "karate-kumite",
+                    "student": {
+                        "student_data": {
+                            "id": (student_id := uuid.uuid4()),
+                            "first_name": "Иван",
+                            "patronymic": None,
+                            "last_name": f"Иванов-{j}",
+                            "email": f"student{j}@example.com",
+                            "date_of_birth": datetime.date(2012, 1, 1),
+                            "phone_number": None,
+                            "img_url": "https://storage.example.com/avatars/default.webp",
+                            "img_variants": None,
+                        },
+                        "coach_id": coach_id,
+                        "group_id": None,
+                    },
+                    "place": place,
+                    "points_scored": 9,
+                    "points_missed": 4,
+                    "number_of_fights": 3,
+                    "number_of_wins": 2,
+                    "average_score": 3.0,
+                    "efficiency": 1.67,
+                }
+                for j in range(i, min(i + RESULTS_PER_EVENT, count))
+            ],
+        })
+    return events
+
+
+async def fastapi_path(response_model, content) -> bytes:
+    # то, что делает FastAPI для обычного return: проверка по response_model и JSONResponse
+    field = create_model_field(name="response", type_=response_model, mode="serialization")
+    return JSONResponse(await serialize_response(field=field, response_content=content)).body
+
+
+async def measure(name: str, count: int, build):
+    timings = []
+    size = 0
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        size = len(await build())
+        timings.append(time.perf_counter() - start)
+    print(f"{name:<34} {count:>6} items  {size / 1024:8.0f} KiB  best {min(timings) * 1000:8.1f} ms  "
+          f"avg {sum(timings) / len(timings) * 1000:8.1f} ms")
+
+
+async def main():
+    students_model = list[students_schemas.StudentProfileProModel]
+    results_model = list[results_schemas.EventWithResultModel]
+    for count in SIZES:
+        students = make_students(count)
+        results = make_results(count)
+
+        async def students_before():
+            # get_students_by_coach до перехода: model_validate в цикле, затем return списка моделей
+            validated = [students_schemas.StudentProfileProModel.model_validate(r) for r in students]
+            return await fastapi_path(students_model, validated)
+
+        async def students_fast():
+            return fast_json_response(students_model, students).body
+
+        async def results_before():
+            return await fastapi_path(results_model, results)
+
+        async def results_fast():
+            return fast_json_response(results_model, results).body
+
+        await measure("students: model_validate + FastAPI", count, students_before)
+        await measure("students: fast_json_response", count, students_fast)
+        await measure("results: FastAPI response_model", count, results_before)
+        await measure("results: fast_json_response", count, results_fast)
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,98 @@
+# Сравнение стратегий загрузки полиморфных результатов (кумите, ката, команды).
+# Запуск из корня проекта: python -m benchmarks.result_loading
+# Данные создаются в транзакции и откатываются в конце; нужна хотя бы одна возрастная категория.
+import asyncio
+import os
+import time
+
+from sqlalchemy import select, text, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database import engine
+from src.models.categories import AgeCategoryORM
+from src.models.results import ResultORM, RESULT_DISCIPLINES
+from src.requests.results import ResultRequest
+
+
+RESULTS = int(os.getenv("BENCH_RESULTS", 100_000))
+REPEAT = int(os.getenv("BENCH_REPEAT", 3))
+
+
+async def seed(session: AsyncSession, age_category_id):
+    codes = list(RESULT_DISCIPLINES)
+    await session.execute(text(
+        "INSERT INTO results (id, sport_code, age_category_id, visited) "
+        "SELECT gen_random_uuid(), (CAST(:codes AS varchar[]))[1 + i % :count], :age_category_id, true "
+        "FROM generate_series(1, :results) AS i"
+    ), {"codes": codes, "count": len(codes), "age_category_id": age_category_id, "results": RESULTS})
+    await session.execute(text(
+        "INSERT INTO karate_kumite_results (id, number_of_fights, number_of_wins, number_of_defeats, "
+        "points_scored, points_missed, average_score, efficiency) "
+        "SELECT id, 3, 2, 1, 9, 4, 3, 1.67 FROM results WHERE sport_code = 'karate-kumite' "
+        "AND NOT EXISTS (SELECT 1 FROM karate_kumite_results k WHERE k.id = results.id)"
+    ))
+    await session.execute(text(
+        "INSERT INTO karate_kata_results (id, number_of_rounds, total_score, best_score) "
+        "SELECT id, 3, 63.4, 21.6 FROM results WHERE sport_code = 'karate-kata' "
+        "AND NOT EXISTS (SELECT 1 FROM karate_kata_results k WHERE k.id = results.id)"
+    ))
+    await session.execute(text(
+        "INSERT INTO karate_team_results (id, team_name, number_of_fights, number_of_wins, number_of_defeats) "
+        "SELECT id, 'Команда', 4, 3, 1 FROM results WHERE sport_code = 'karate-team' "
+        "AND NOT EXISTS (SELECT 1 FROM karate_team_results t WHERE t.id = results.id)"
+    ))
+    await session.execute(text("ANALYZE results"))
+
+
+async def load_per_discipline(session: AsyncSession):
+    # по отдельному запросу с INNER JOIN на каждую дисциплину
+    rows = []
+    for model in RESULT_DISCIPLINES.values():
+        rows += (await session.scalars(select(model))).all()
+    return rows
+
+
+async def measure(connection, name, load):
+    timings = []
+    count = 0
+    for _ in range(REPEAT):
+        # новая сессия на каждый прогон, чтобы identity map не отдавала объекты из прошлого
+        async with AsyncSession(bind=connection, join_transaction_mode="create_savepoint") as session:
+            start = time.perf_counter()
+            count = len(await load(session))
+            timings.append(time.perf_counter() - start)
+    print(f"{name:<24} {count:>8} rows  best {min(timings) * 1000:9.1f} ms  "
+          f"avg {sum(timings) / len(timings) * 1000:9.1f} ms")
+
+
+async def _all(session: AsyncSession, query):
+    return (await session.scalars(query)).all()
+
+
+async def main():
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            async with AsyncSession(bind=connection, join_transaction_mode="create_savepoint") as session:
+                age_category_id = await session.scalar(select(AgeCategoryORM.id).limit(1))
+                if age_category_id is None:
+                    print("Нет ни одной возрастной категории — бенчмарку не к чему привязать результаты")
+                    return
+                await seed(session, age_category_id)
+                total = await session.scalar(select(func.count()).select_from(ResultORM.__table__))
+            print(f"results in table: {total}")
+
+            joined, _ = ResultRequest.results_query("joined")
+            selectin, _ = ResultRequest.results_query("selectin")
+            # только базовая таблица — как загружались результаты раньше (без полей дисциплин)
+            await measure(connection, "base table only", lambda session: _all(session, select(ResultORM)))
+            await measure(connection, "with_polymorphic (joined)", lambda session: _all(session, joined))
+            await measure(connection, "selectin_polymorphic", lambda session: _all(session, selectin))
+            await measure(connection, "query per discipline", load_per_discipline)
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
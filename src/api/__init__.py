@@ -1,17 +1,28 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
 from src.api.events import router as events_router
 from src.api.results import router as results_router
 from src.api.auth import router as auth_router
 from src.api.groups import router as groups_router
 from src.api.students import router as students_router
 from src.api.users import router as users_router
+from src.api.leaderboards import router as leaderboards_router
+from src.api.trainings import router as trainings_router
+from src.api.payments import router as payments_router
+from src.api.internal import router as internal_router
+from src.lifespan import lifespan
+from src.dependency.dependencies import resolve_tenant
 
 
 
-main_router = APIRouter()
+# арендатор определяется до остальных зависимостей, чтобы все запросы к БД уже были ограничены им
+main_router = APIRouter(lifespan=lifespan, dependencies=[Depends(resolve_tenant)])
 main_router.include_router(results_router)
 main_router.include_router(events_router)
 main_router.include_router(auth_router)
 main_router.include_router(groups_router)
 main_router.include_router(students_router)
-main_router.include_router(users_router)
\ No newline at end of file
+main_router.include_router(users_router)
+main_router.include_router(leaderboards_router)
+main_router.include_router(trainings_router)
+main_router.include_router(payments_router)
+main_router.include_router(internal_router)
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
 from src.dependency.dependencies import SessionDep, AuthUserDep
 
 from src.schemas.base import UserRegisterModel, UserLoginModel, Token
 from src.requests.auth import AuthRequest
+from src.requests.users import UserRequest
+from src.utils.http_cache import conditional_response, version_etag
 from src.security import create_access_token, generate_password
 from src.models.groups import GroupORM
 from src.models.events import EventORM
@@ -62,7 +64,11 @@ async def get_user(user_id: AuthUserDep):
             tags=["Пользователи"],
             summary="Получение данных о пользователе",
             )
-async def get_user_data(session: SessionDep, user_id: AuthUserDep):
+async def get_user_data(session: SessionDep, user_id: AuthUserDep, request: Request, response: Response):
+    version = await UserRequest.get_user_version(session, user_id)
+    not_modified = conditional_response(request, response, version_etag("user", user_id, version))
+    if not_modified:
+        return not_modified
     user = await AuthRequest.get_user_data(session, user_id)
     return user
 
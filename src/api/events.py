@@ -1,9 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends
-from src.dependency.dependencies import SessionDep, AuthUserDep
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, Query
+from src.dependency.dependencies import SessionDep, AuthUserDep, ensure_owner
 
 import src.schemas.events as events_schemas
 from src.requests.events import EventRequest
+from src.models.events import EventORM
 import src.schemas.base as base_schemas
+from src.utils.pagination import encode_cursor, decode_cursor
+from src.utils.http_cache import conditional_response, version_etag
+from src.utils.response_cache import response_cache
+from src.utils.fast_json import fast_json_response
+from typing import Optional
+from uuid import UUID
+import datetime
 
 from src.s3_storage import S3Client
 from src.config import (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY,
@@ -16,15 +24,13 @@ router = APIRouter(
 
 async def get_current_coach_event(
     event_id : str,
+    request: Request,
     session: SessionDep,
     user_id: AuthUserDep,
 ):
     event = await EventRequest.get_event(session, event_id)
-    if not event:
-        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
-    if event.coach_id != user_id:
-        raise HTTPException(status_code=403, detail="Нет доступа")
-    return True
+    return ensure_owner(request, "event", event, event and event.coach_id, user_id,
+                        not_found_detail="Мероприятие не найдено")
 
 
 @router.get("/",
@@ -33,9 +39,43 @@ async def get_current_coach_event(
             response_model=list[events_schemas.EventModel]
          )
 async def get_coach_events(session: SessionDep,
-                               user_id: AuthUserDep):
-    events = await EventRequest.get_coach_events(session, user_id)
-    return events
+                               user_id: AuthUserDep,
+                               request: Request,
+                               response: Response,
+                               limit: Optional[int] = Query(None, ge=1, le=500),
+                               cursor: Optional[str] = None,
+                               date_from: Optional[datetime.date] = None,
+                               date_to: Optional[datetime.date] = None,
+                               type_id: Optional[UUID] = None):
+    # без limit и cursor — весь список, как до постраничной выдачи; cursor без limit — страницы по 100
+    if limit is None and cursor:
+        limit = 100
+    after = decode_cursor(cursor) if cursor else None
+    params = {"limit": limit, "cursor": cursor, "date_from": date_from, "date_to": date_to, "type_id": type_id}
+    version = await EventRequest.get_coach_events_version(session, user_id)
+    not_modified = conditional_response(request, response,
+                                        version_etag("events", user_id, *version, sorted(params.items())))
+    if not_modified:
+        return not_modified
+
+    async def build():
+        # берём на одну строку больше, чтобы понять, есть ли следующая страница
+        events = await EventRequest.get_coach_events(
+            session, user_id,
+            limit=limit + 1 if limit is not None else None,
+            after=after,
+            date_from=date_from,
+            date_to=date_to,
+            type_id=type_id,
+        )
+        headers = {}
+        if limit is not None and len(events) > limit:
+            events = events[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(events[-1].date_start, events[-1].id)
+        return events, headers
+
+    return await response_cache.respond("events", user_id, {**params, "version": tuple(version)}, list[events_schemas.EventModel], build,
+                                        headers=response.headers)
 
 
 
@@ -45,10 +85,16 @@ async def get_coach_events(session: SessionDep,
             response_model=list[base_schemas.TypeEventModel]
          )
 async def get_event_types(session: SessionDep,
-                               user_id: AuthUserDep):
+                               user_id: AuthUserDep,
+                               request: Request,
+                               response: Response):
     types = await EventRequest.get_event_types(session)
+    not_modified = conditional_response(request, response, types.etag,
+                                        cache_control="private, max-age=3600")
+    if not_modified:
+        return not_modified
     # types = [base_schemas.TypeEventModel.model_validate(r) for r in types_orm]
-    return types
+    return types.rows
 
 
 @router.get("/{event_id}",
@@ -59,11 +105,14 @@ async def get_event_types(session: SessionDep,
 async def get_event(session: SessionDep,
                          event_id: str,
                          user_id: AuthUserDep,
-                         coach_event: bool = Depends(get_current_coach_event)):
-    event = await EventRequest.get_event(session, event_id)
-    if not event:
-        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
-    return  event
+                         request: Request,
+                         response: Response,
+                         coach_event: EventORM = Depends(get_current_coach_event)):
+    not_modified = conditional_response(request, response,
+                                        version_etag("event", coach_event.id, coach_event.version))
+    if not_modified:
+        return not_modified
+    return  coach_event
 
 
 @router.get("/{event_id}/students",
@@ -74,10 +123,40 @@ async def get_event(session: SessionDep,
 async def get_event_students(session: SessionDep,
                          event_id: str,
                          user_id: AuthUserDep,
-                         coach_event: bool = Depends(get_current_coach_event)):
+                         request: Request,
+                         response: Response,
+                         coach_event: EventORM = Depends(get_current_coach_event)):
+    version = await EventRequest.get_event_students_version(session, event_id)
+    not_modified = conditional_response(request, response, version_etag("event_students", event_id, *version))
+    if not_modified:
+        return not_modified
     students_orm = await EventRequest.get_event_students(session, event_id)
-    students = [base_schemas.StudentModel.model_validate(r.student_data) for r in students_orm.students]
-    return  students
+    return fast_json_response(list[base_schemas.StudentModel], students_orm, headers=response.headers)
+
+
+@router.post("/{event_id}/students/batch",
+            tags=["Мероприятия"],
+            summary="Регистрация нескольких учеников на мероприятие",
+            response_model=list[base_schemas.StudentOutcomeModel]
+         )
+async def add_event_students(session: SessionDep,
+                             event_id: str,
+                             data: base_schemas.StudentIdsModel,
+                             user_id: AuthUserDep,
+                             coach_event: EventORM = Depends(get_current_coach_event)):
+    return await EventRequest.add_event_students(session, coach_event.id, user_id, data.student_ids)
+
+
+@router.delete("/{event_id}/students/batch",
+            tags=["Мероприятия"],
+            summary="Удаление нескольких учеников с мероприятия",
+            response_model=list[base_schemas.StudentOutcomeModel]
+         )
+async def delete_event_students(session: SessionDep,
+                                event_id: str,
+                                data: base_schemas.StudentIdsModel,
+                                coach_event: EventORM = Depends(get_current_coach_event)):
+    return await EventRequest.delete_event_students(session, coach_event.id, data.student_ids)
 
 
 @router.post("/{event_id}/{student_id}",
@@ -89,7 +168,7 @@ async def add_event_student(session: SessionDep,
                              event_id: str,
                              student_id: str,
                              user_id: AuthUserDep,
-                             coach_event: bool = Depends(get_current_coach_event)):
+                             coach_event: EventORM = Depends(get_current_coach_event)):
     await EventRequest.add_event_student(
         session=session,
         event_id=event_id,
@@ -125,7 +204,7 @@ async def update_event(session: SessionDep,
                            event_id: str,
                            data: events_schemas.EditEventModel,
                            user_id: AuthUserDep,
-                            coach_event: bool = Depends(get_current_coach_event)):
+                            coach_event: EventORM = Depends(get_current_coach_event)):
     update_data = data.model_dump(exclude_unset=True)
 
     if not update_data:
@@ -143,7 +222,7 @@ async def update_event(session: SessionDep,
 async def delete_event(session: SessionDep,
                             event_id: str,
                             user_id: AuthUserDep,
-                            coach_event: bool = Depends(get_current_coach_event)):
+                            coach_event: EventORM = Depends(get_current_coach_event)):
     await EventRequest.delete_event(session, event_id)
     return {"status": "ok"}
 
@@ -157,7 +236,7 @@ async def delete_student_from_event(session: SessionDep,
                              event_id: str,
                              student_id: str,
                              user_id: AuthUserDep,
-                             coach_event: bool = Depends(get_current_coach_event)):
+                             coach_event: EventORM = Depends(get_current_coach_event)):
     await EventRequest.delete_student_from_event(
         session=session,
         event_id=event_id,
@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from src.dependency.dependencies import SessionDep, AuthUserDep
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
+from src.dependency.dependencies import SessionDep, AuthUserDep, ensure_owner
 
 from src.requests.coaches import CoachRequest
 from src.requests.groups import GroupRequest
 from src.requests.students import StudentRequest
 from src.security import create_access_token
+from src.models.groups import GroupORM
 import src.schemas.groups as groups_schemas
 import src.schemas.base as base_schemas
+from src.utils.response_cache import response_cache
+from src.utils.http_cache import conditional_response, version_etag
+from src.utils.fast_json import fast_json_response
 
 router = APIRouter(
     prefix="/groups",
@@ -15,15 +19,13 @@ router = APIRouter(
 
 async def get_current_coach_group(
     group_id : str,
+    request: Request,
     session: SessionDep,
     user_id: AuthUserDep,
 ):
     group = await GroupRequest.get_group_info(session, group_id)
-    if not group:
-        raise HTTPException(status_code=404, detail="Группа не найдена")
-    if group.coach_id != user_id:
-        raise HTTPException(status_code=403, detail="Нет доступа")
-    return True
+    return ensure_owner(request, "group", group, group and group.coach_id, user_id,
+                        not_found_detail="Группа не найдена")
 
 
 @router.get("/",
@@ -31,9 +33,17 @@ async def get_current_coach_group(
             summary="Список всех групп тренера",
             response_model=list[groups_schemas.GroupModel]
          )
-async def get_coach_groups(session: SessionDep, user_id: AuthUserDep):
-    groups =  await CoachRequest.get_coach_groups(session, user_id)
-    return groups
+async def get_coach_groups(session: SessionDep, user_id: AuthUserDep, request: Request, response: Response):
+    version = await CoachRequest.get_coach_groups_version(session, user_id)
+    not_modified = conditional_response(request, response, version_etag("groups", user_id, *version))
+    if not_modified:
+        return not_modified
+
+    async def build():
+        return await CoachRequest.get_coach_groups(session, user_id), {}
+
+    return await response_cache.respond("groups", user_id, {"version": tuple(version)}, list[groups_schemas.GroupModel], build,
+                                        headers=response.headers)
 
 
 @router.get("/{group_id}/students",
@@ -44,10 +54,16 @@ async def get_coach_groups(session: SessionDep, user_id: AuthUserDep):
 async def get_students_in_group(
         session: SessionDep,
         group_id: str,
-        coach_group: bool = Depends(get_current_coach_group)):
+        request: Request,
+        response: Response,
+        coach_group: GroupORM = Depends(get_current_coach_group)):
+    version = await CoachRequest.get_students_in_group_version(session, group_id)
+    not_modified = conditional_response(request, response, version_etag("group_students", group_id, *version))
+    if not_modified:
+        return not_modified
     students_orm =  await CoachRequest.get_students_in_group(session, group_id)
-    students = [base_schemas.StudentModel.model_validate(r.student_data) for r in students_orm]
-    return students
+    return fast_json_response(list[base_schemas.StudentModel], [r.student_data for r in students_orm],
+                              headers=response.headers)
 
 
 
@@ -59,10 +75,15 @@ async def get_students_in_group(
 async def get_group_info(
         session: SessionDep,
         group_id: str,
-        coach_group: bool = Depends(get_current_coach_group)):
-    group =  await GroupRequest.get_group_info(session, group_id)
-    # group = groups_schemas.GroupModel.model_validate(result)
-    return group
+        request: Request,
+        response: Response,
+        coach_group: GroupORM = Depends(get_current_coach_group)):
+    # группа уже загружена проверкой владельца — версия есть без лишнего запроса
+    not_modified = conditional_response(request, response,
+                                        version_etag("group", coach_group.id, coach_group.version))
+    if not_modified:
+        return not_modified
+    return coach_group
 
 
 
@@ -89,7 +110,7 @@ async def edit_group(
     group_id: str,
     data: groups_schemas.EditGroupModel,
     user_id: AuthUserDep,
-    coach_group: bool = Depends(get_current_coach_group)
+    coach_group: GroupORM = Depends(get_current_coach_group)
 ):
     # Преобразуем только переданные поля в dict
     update_data = data.model_dump(exclude_unset=True)
@@ -109,7 +130,7 @@ async def edit_group(
 async def delete_group(session: SessionDep,
                             group_id: str,
                             user_id: AuthUserDep,
-                            coach_group: bool = Depends(get_current_coach_group)):
+                            coach_group: GroupORM = Depends(get_current_coach_group)):
     await GroupRequest.delete_group(session, group_id)
     return {"status": "ok"}
 
@@ -123,8 +144,8 @@ async def add_student_in_group(session: SessionDep,
                        group_id: str,
                        student_id: str,
                        user_id: AuthUserDep,
-                       coach_group: bool = Depends(get_current_coach_group)):
-    student = await StudentRequest.get_student_info(session, student_id)
+                       coach_group: GroupORM = Depends(get_current_coach_group)):
+    student = await StudentRequest.get_student_profile(session, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Ученик не найден")
     if student.group_id:
@@ -143,8 +164,8 @@ async def delete_student_from_group(session: SessionDep,
                        group_id: str,
                        student_id: str,
                        user_id: AuthUserDep,
-                       coach_group: bool = Depends(get_current_coach_group)):
-    student = await StudentRequest.get_student_info(session, student_id)
+                       coach_group: GroupORM = Depends(get_current_coach_group)):
+    student = await StudentRequest.get_student_profile(session, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Ученик не найден")
     if not student.group_id:
@@ -153,3 +174,28 @@ async def delete_student_from_group(session: SessionDep,
         await GroupRequest.delete_student_from_group(session, student_id)
         return {"status": "ok"}
 
+
+@router.post("/{group_id}/students/batch",
+            tags=["Группы"],
+            summary="Добавление нескольких учеников в группу",
+            response_model=list[base_schemas.StudentOutcomeModel]
+         )
+async def add_students_in_group(session: SessionDep,
+                                group_id: str,
+                                data: base_schemas.StudentIdsModel,
+                                user_id: AuthUserDep,
+                                coach_group: GroupORM = Depends(get_current_coach_group)):
+    return await GroupRequest.add_students_in_group(session, coach_group.id, user_id, data.student_ids)
+
+
+@router.delete("/{group_id}/students/batch",
+            tags=["Группы"],
+            summary="Удаление нескольких учеников из группы",
+            response_model=list[base_schemas.StudentOutcomeModel]
+         )
+async def delete_students_from_group(session: SessionDep,
+                                     group_id: str,
+                                     data: base_schemas.StudentIdsModel,
+                                     user_id: AuthUserDep,
+                                     coach_group: GroupORM = Depends(get_current_coach_group)):
+    return await GroupRequest.delete_students_from_group(session, coach_group.id, user_id, data.student_ids)
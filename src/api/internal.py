@@ -0,0 +1,143 @@
+import datetime
+import os
+import secrets
+
+from fastapi import APIRouter, HTTPException, Header, Depends, Query
+from typing import Optional
+from src.dependency.dependencies import SessionDep
+from src.requests.leaderboards import LeaderboardRequest
+from src.requests.payments import PaymentRequest
+from src.requests.timelines import StudentTimelineRequest
+
+from src.database import get_pool_stats
+from src.security import password_hasher, token_cache
+from src.utils.send_email import mail_dispatcher
+from src.utils.reference_data import reference_data
+from src.utils.tenancy import tenant_resolver
+from src.utils.response_cache import response_cache
+
+
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+
+router = APIRouter(
+    prefix="/internal",
+    include_in_schema=False,
+)
+
+
+async def check_internal_token(x_internal_token: Optional[str] = Header(None)):
+    # без настроенного токена служебные эндпоинты закрыты полностью
+    if not INTERNAL_API_TOKEN or not secrets.compare_digest(x_internal_token or "", INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Нет доступа")
+    return True
+
+
+@router.get("/db/pool",
+            summary="Состояние пула соединений с БД",
+            )
+async def get_db_pool_stats(is_internal: bool = Depends(check_internal_token)):
+    return get_pool_stats()
+
+
+@router.get("/security/hasher",
+            summary="Состояние пула хеширования паролей",
+            )
+async def get_password_hasher_stats(is_internal: bool = Depends(check_internal_token)):
+    return password_hasher.stats()
+
+
+@router.get("/security/tokens",
+            summary="Состояние кэша проверенных токенов",
+            )
+async def get_token_cache_stats(is_internal: bool = Depends(check_internal_token)):
+    return token_cache.stats()
+
+
+@router.get("/mail",
+            summary="Состояние очереди исходящих писем",
+            )
+async def get_mail_stats(is_internal: bool = Depends(check_internal_token)):
+    return mail_dispatcher.stats()
+
+
+@router.get("/references",
+            summary="Состояние кэша справочников",
+            )
+async def get_reference_data_stats(is_internal: bool = Depends(check_internal_token)):
+    return reference_data.stats()
+
+
+@router.post("/references/invalidate",
+             summary="Сброс кэша справочников",
+             )
+async def invalidate_reference_data(name: Optional[str] = None,
+                                    is_internal: bool = Depends(check_internal_token)):
+    if name is not None and name not in reference_data.tables:
+        raise HTTPException(status_code=404, detail="Справочник не найден")
+    reference_data.invalidate(name)
+    return {"status": "ok"}
+
+
+@router.get("/response-cache",
+            summary="Состояние кэша ответов списков тренера",
+            )
+async def get_response_cache_stats(is_internal: bool = Depends(check_internal_token)):
+    return response_cache.stats()
+
+
+@router.post("/response-cache/invalidate",
+             summary="Сброс кэша ответов (одного тренера или целиком)",
+             )
+async def invalidate_response_cache(coach_id: Optional[str] = None,
+                                    is_internal: bool = Depends(check_internal_token)):
+    if coach_id is None:
+        await response_cache.clear()
+    else:
+        await response_cache.invalidate(coach_id)
+    return {"status": "ok"}
+
+
+@router.get("/tenants",
+            summary="Состояние кэша организаций по поддоменам",
+            )
+async def get_tenant_cache_stats(is_internal: bool = Depends(check_internal_token)):
+    return tenant_resolver.stats()
+
+
+@router.post("/tenants/invalidate",
+             summary="Сброс кэша организаций (после смены поддомена или блокировки)",
+             )
+async def invalidate_tenants(subdomain: Optional[str] = None,
+                             is_internal: bool = Depends(check_internal_token)):
+    tenant_resolver.invalidate(subdomain)
+    return {"status": "ok"}
+
+
+@router.post("/leaderboards/rebuild",
+             summary="Полный пересчёт сводной таблицы рейтингов",
+             )
+async def rebuild_leaderboards(session: SessionDep, is_internal: bool = Depends(check_internal_token)):
+    await LeaderboardRequest.rebuild(session)
+    return {"status": "ok"}
+
+
+@router.post("/timelines/rebuild",
+             summary="Полный пересчёт лент результатов учеников",
+             )
+async def rebuild_timelines(session: SessionDep,
+                            batch_size: int = Query(500, ge=1, le=5000),
+                            is_internal: bool = Depends(check_internal_token)):
+    rebuilt = await StudentTimelineRequest.rebuild(session, batch_size)
+    return {"status": "ok", "students": rebuilt}
+
+
+@router.post("/payments/reconcile",
+             summary="Сверка зависших платежей с платёжным провайдером",
+             )
+async def reconcile_payments(session: SessionDep,
+                             older_than_minutes: int = Query(15, ge=0),
+                             batch_size: int = Query(200, ge=1, le=1000),
+                             is_internal: bool = Depends(check_internal_token)):
+    older_than = datetime.datetime.now() - datetime.timedelta(minutes=older_than_minutes)
+    return await PaymentRequest.reconcile(session, older_than, batch_size)
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Query
+from src.dependency.dependencies import SessionDep, AuthUserDep, TenantDep
+
+from src.requests.leaderboards import LeaderboardRequest
+import src.schemas.leaderboards as leaderboards_schemas
+from typing import Optional, Literal
+from uuid import UUID
+import datetime
+
+
+router = APIRouter(
+    prefix="/leaderboards",
+)
+
+
+@router.get("/",
+            tags=["Рейтинги"],
+            summary="Рейтинг спортсменов тренера или клуба за сезон",
+            response_model=list[leaderboards_schemas.LeaderboardEntryModel]
+         )
+async def get_leaderboard(session: SessionDep,
+                          user_id: AuthUserDep,
+                          tenant_id: TenantDep,
+                          scope: Literal["coach", "club"] = "coach",
+                          metric: Literal["efficiency", "medals", "wins"] = "efficiency",
+                          season: Optional[int] = None,
+                          age_category_id: Optional[UUID] = None,
+                          weight_category_id: Optional[UUID] = None,
+                          limit: int = Query(50, ge=1, le=500)):
+    coach_id = None
+    organization_id = None
+    if scope == "coach":
+        coach_id = user_id
+    else:
+        organization_id = tenant_id or await LeaderboardRequest.get_user_organization_id(session, user_id)
+        if organization_id is None:
+            raise HTTPException(status_code=404, detail="Пользователь не состоит в клубе")
+    return await LeaderboardRequest.get_leaderboard(
+        session,
+        season=season or datetime.date.today().year,
+        metric=metric,
+        coach_id=coach_id,
+        organization_id=organization_id,
+        age_category_id=age_category_id,
+        weight_category_id=weight_category_id,
+        limit=limit,
+    )
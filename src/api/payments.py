@@ -0,0 +1,62 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from src.dependency.dependencies import SessionDep, AuthUserDep
+
+import src.schemas.payments as payments_schemas
+from src.requests.payments import PaymentRequest
+from src.models.students import StudentProfileORM
+from src.api.students import get_current_coach_student
+
+router = APIRouter(
+    prefix="/payments",
+)
+
+
+@router.get("/students/{student_id}",
+            tags=["Платежи"],
+            summary="Платежи ученика",
+            response_model=list[payments_schemas.PaymentModel]
+         )
+async def get_student_payments(session: SessionDep,
+                               student_id: str,
+                               coach_student: StudentProfileORM = Depends(get_current_coach_student)):
+    return await PaymentRequest.get_student_payments(session, coach_student.student_id)
+
+
+@router.post("/students/{student_id}",
+            tags=["Платежи"],
+            summary="Создание платежа за тренировки",
+            response_model=payments_schemas.PaymentLinkModel
+         )
+async def add_payment(session: SessionDep,
+                      student_id: str,
+                      data: payments_schemas.AddPaymentModel,
+                      user_id: AuthUserDep,
+                      coach_student: StudentProfileORM = Depends(get_current_coach_student)):
+    organization = await PaymentRequest.get_user_organization(session, user_id)
+    if organization is None:
+        raise HTTPException(status_code=400, detail="Тренер не привязан к организации")
+    payment, confirmation_url = await PaymentRequest.create_payment(
+        session, organization, coach_student.student_id,
+        amount=data.amount,
+        description=data.description,
+        return_url=data.return_url,
+    )
+    return {"payment": payment, "confirmation_url": confirmation_url}
+
+
+@router.post("/webhook/{organization_id}",
+            tags=["Платежи"],
+            summary="Уведомление платёжного провайдера",
+         )
+async def payment_webhook(session: SessionDep,
+                          organization_id: str,
+                          request: Request):
+    organization = await PaymentRequest.get_organization(session, organization_id)
+    if organization is None:
+        raise HTTPException(status_code=404, detail="Организация не найдена")
+    try:
+        payload = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректное уведомление")
+    payment_status = await PaymentRequest.apply_webhook(session, organization, payload)
+    return {"status": "ok", "payment_status": payment_status}
@@ -1,5 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response, Query, Request
 from src.dependency.dependencies import SessionDep, AuthUserDep
+from src.utils.pagination import encode_cursor, decode_cursor
+from src.utils.http_cache import conditional_response, version_etag
+from src.utils.response_cache import response_cache
+from src.utils.imports import iter_import_rows, format_validation_error
+from src.api.events import get_current_coach_event
+from src.models.events import EventORM
+from pydantic import ValidationError
+from typing import Optional
 
 
 import src.models.results as results_models
@@ -17,9 +25,13 @@ router = APIRouter(
             response_model=list[results_schemas.PlaceModel]
 
          )
-async def get_places(session: SessionDep):
+async def get_places(session: SessionDep, request: Request, response: Response):
     places = await ResultRequest.get_places(session)
-    return places
+    not_modified = conditional_response(request, response, places.etag,
+                                        cache_control="public, max-age=3600")
+    if not_modified:
+        return not_modified
+    return places.rows
 
 
 
@@ -29,9 +41,65 @@ async def get_places(session: SessionDep):
             response_model=list[results_schemas.EventWithResultModel]
          )
 async def get_user_results(session: SessionDep,
-                               user_id: AuthUserDep):
-    results = await ResultRequest.get_results(session, user_id)
-    return results
+                               user_id: AuthUserDep,
+                               request: Request,
+                               response: Response,
+                               limit: Optional[int] = Query(None, ge=1, le=200),
+                               cursor: Optional[str] = None):
+    # без limit и cursor — весь список, как до постраничной выдачи; cursor без limit — страницы по 50
+    if limit is None and cursor:
+        limit = 50
+    after = decode_cursor(cursor) if cursor else None
+    version = await ResultRequest.get_results_version(session, user_id)
+    not_modified = conditional_response(request, response,
+                                        version_etag("results", user_id, *version, limit, cursor))
+    if not_modified:
+        return not_modified
+
+    async def build():
+        results = await ResultRequest.get_results(
+            session, user_id,
+            limit=limit + 1 if limit is not None else None,
+            after=after,
+        )
+        headers = {}
+        if limit is not None and len(results) > limit:
+            results = results[:limit]
+            headers["X-Next-Cursor"] = encode_cursor(results[-1]["date_start"], results[-1]["id"])
+        return results, headers
+
+    return await response_cache.respond("results", user_id,
+                                        {"limit": limit, "cursor": cursor, "version": tuple(version)},
+                                        list[results_schemas.EventWithResultModel], build,
+                                        headers=response.headers)
+
+
+@router.post("/import/{event_id}",
+            tags=["Результаты"],
+            summary="Импорт результатов соревнования из CSV/JSON",
+            response_model=results_schemas.ImportReportModel
+         )
+async def import_results(session: SessionDep,
+                         event_id: str,
+                         request: Request,
+                         user_id: AuthUserDep,
+                         coach_event: EventORM = Depends(get_current_coach_event)):
+    rows = []
+    report = []
+    async for number, raw_row in iter_import_rows(request):
+        try:
+            rows.append((number, results_schemas.ImportResultRowModel.model_validate(raw_row)))
+        except ValidationError as e:
+            report.append({"row": number, "status": "error", "detail": format_validation_error(e)})
+    if rows:
+        report += await ResultRequest.import_results(session, coach_event.id, user_id, rows)
+    report.sort(key=lambda item: item["row"])
+    return {
+        "created": sum(item["status"] == "created" for item in report),
+        "duplicates": sum(item["status"] == "duplicate" for item in report),
+        "errors": sum(item["status"] == "error" for item in report),
+        "rows": report,
+    }
 
 
 @router.get("/{result_id}",
@@ -41,7 +109,13 @@ async def get_user_results(session: SessionDep,
          )
 async def get_result(session: SessionDep,
                         result_id: str,
-                        user_id: AuthUserDep):
+                        user_id: AuthUserDep,
+                        request: Request,
+                        response: Response):
+    version = await ResultRequest.get_result_version(session, result_id)
+    not_modified = conditional_response(request, response, version_etag("result", result_id, *version))
+    if not_modified:
+        return not_modified
     result = await ResultRequest.get_result(session, result_id)
     if not result:
         raise HTTPException(status_code=404, detail="Результат не найден")
@@ -55,15 +129,7 @@ async def get_result(session: SessionDep,
 async def add_result(session: SessionDep,
                          data: results_schemas.AddResultModel,
                          user_id: AuthUserDep):
-    await ResultRequest.add_result(
-        session=session,
-        event_id=data.event_id,
-        student_id=data.student_id,
-        place_id=data.place_id,
-        points_scored=data.points_scored,
-        points_missed=data.points_missed,
-        number_of_fights=data.number_of_fights,
-    )
+    await ResultRequest.add_result(session, data)
     return {"status": "ok"}
 
 
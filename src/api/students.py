@@ -1,17 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
-from src.dependency.dependencies import SessionDep, AuthUserDep
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, Response
+from src.dependency.dependencies import SessionDep, AuthUserDep, ensure_owner
 
 from src.requests.students import StudentRequest
+from src.requests.timelines import StudentTimelineRequest
 from src.requests.users import UserRequest
 from src.models.groups import GroupORM
+from src.models.students import StudentProfileORM
 import src.schemas.students as students_schemas
 import src.schemas.base as base_schemas
 import datetime
-from src.s3_storage import S3Client
-from src.config import (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY,
-                        S3_BUCKET_NAME, S3_ENDPOINT_URL, S3_REGION_NAME)
+from src.utils.images import upload_avatar
 from typing import Optional
 import src.schemas.results as results_schemas
+import asyncio
+import os
+from pydantic import ValidationError
+from src.database import new_async_session
+from src.requests.groups import GroupRequest
+from src.utils.imports import parse_table_file, format_validation_error, IMPORT_MAX_SIZE
+from src.utils.jobs import job_registry
+from src.utils.response_cache import response_cache
+from src.utils.http_cache import conditional_response, version_etag
+from src.utils.fast_json import fast_json_response
+
+
+ROSTER_IMPORT_CHUNK_SIZE = int(os.getenv("ROSTER_IMPORT_CHUNK_SIZE", 100))
 
 
 router = APIRouter(
@@ -20,15 +33,13 @@ router = APIRouter(
 
 async def get_current_coach_student(
     student_id: str,
+    request: Request,
     session: SessionDep,
     user_id: AuthUserDep,
 ):
-    student = await StudentRequest.get_student_info(session, student_id)
-    if not student:
-        raise HTTPException(status_code=404, detail="Спортсмен не найден")
-    if student.coach_id != user_id:
-        raise HTTPException(status_code=403, detail="Нет доступа")
-    return True
+    student = await StudentRequest.get_student_profile(session, student_id)
+    return ensure_owner(request, "student", student, student and student.coach_id, user_id,
+                        not_found_detail="Спортсмен не найден")
 
 
 
@@ -38,11 +49,83 @@ async def get_current_coach_student(
             response_model=list[students_schemas.StudentProfileProModel]
          )
 async def get_students_by_coach(session: SessionDep,
-                                 user_id: AuthUserDep):
-    students_orm = await StudentRequest.get_students_by_coach(session, user_id)
-    students = [students_schemas.StudentProfileProModel.model_validate(r) for r in students_orm]
-    return students
+                                 user_id: AuthUserDep,
+                                 request: Request,
+                                 response: Response):
+    version = await StudentRequest.get_students_by_coach_version(session, user_id)
+    not_modified = conditional_response(request, response, version_etag("students", user_id, *version))
+    if not_modified:
+        return not_modified
+
+    async def build():
+        return await StudentRequest.get_students_by_coach(session, user_id), {}
+
+    return await response_cache.respond("students", user_id, {"version": tuple(version)},
+                                        list[students_schemas.StudentProfileProModel], build,
+                                        headers=response.headers)
+
+
+
+async def run_roster_import(job: dict, coach_id: str, data: bytes, filename: str, group_id: str | None):
+    job["status"] = "parsing"
+    table = await asyncio.to_thread(parse_table_file, data, filename)
+    job.update(status="running", total=len(table), created=0, duplicates=0, errors=0, rows=[])
+
+    rows = []
+    for number, raw_row in enumerate(table, start=1):
+        try:
+            rows.append((number, students_schemas.RosterRowModel.model_validate(raw_row)))
+        except ValidationError as e:
+            job["rows"].append({"row": number, "status": "error", "detail": format_validation_error(e)})
+
+    async with new_async_session() as session:
+        for start in range(0, len(rows), ROSTER_IMPORT_CHUNK_SIZE):
+            chunk = rows[start:start + ROSTER_IMPORT_CHUNK_SIZE]
+            job["rows"] += await StudentRequest.import_students(session, coach_id, chunk, group_id=group_id)
+            job["processed"] = chunk[-1][0]
+    job["processed"] = job["total"]
+    job["rows"].sort(key=lambda item: item["row"])
+    job["created"] = sum(item["status"] == "created" for item in job["rows"])
+    job["duplicates"] = sum(item["status"] == "duplicate" for item in job["rows"])
+    job["errors"] = sum(item["status"] == "error" for item in job["rows"])
+
+
+@router.post("/import",
+            tags=["Ученики"],
+            summary="Импорт списка учеников из CSV/XLSX",
+            status_code=202,
+         )
+async def import_students(session: SessionDep,
+                          user_id: AuthUserDep,
+                          file: UploadFile = File(...),
+                          group_id: Optional[str] = Form(None)):
+    if group_id is not None:
+        group = await GroupRequest.get_group_info(session, group_id)
+        if not group:
+            raise HTTPException(status_code=404, detail="Группа не найдена")
+        if str(group.coach_id) != user_id:
+            raise HTTPException(status_code=403, detail="Нет доступа")
+    data = await file.read(IMPORT_MAX_SIZE + 1)
+    if len(data) > IMPORT_MAX_SIZE:
+        raise HTTPException(status_code=413, detail="Файл слишком большой")
+
+    job_id = job_registry.start(
+        user_id,
+        lambda job: run_roster_import(job, user_id, data, file.filename or "", group_id),
+    )
+    return {"job_id": job_id}
+
 
+@router.get("/import/{job_id}",
+            tags=["Ученики"],
+            summary="Прогресс импорта учеников",
+            response_model=students_schemas.ImportJobModel
+         )
+async def get_import_status(job_id: str, user_id: AuthUserDep):
+    job = job_registry.get(job_id, user_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Импорт не найден")
+    return job
 
 
 @router.get("/{student_id}",
@@ -53,8 +136,13 @@ async def get_students_by_coach(session: SessionDep,
 async def get_student_info(
         session: SessionDep,
         student_id: str,
-        user_id: AuthUserDep):
-    print('!!!', student_id)
+        user_id: AuthUserDep,
+        request: Request,
+        response: Response):
+    version = await StudentRequest.get_student_info_version(session, student_id)
+    not_modified = conditional_response(request, response, version_etag("student", student_id, *version))
+    if not_modified:
+        return not_modified
     student =  await StudentRequest.get_student_info(session, student_id)
     return student
 
@@ -69,9 +157,33 @@ async def get_student_info(
 async def get_student_results(
         session: SessionDep,
         student_id: str,
-        user_id: AuthUserDep):
-    results =  await StudentRequest.get_student_results(session, student_id)
-    return results
+        user_id: AuthUserDep,
+        request: Request,
+        response: Response):
+    # лента пересобирается при каждой записи результата и мероприятия — её updated_at и есть версия
+    version = await StudentTimelineRequest.get_timeline_version(session, student_id)
+    not_modified = conditional_response(request, response,
+                                        version_etag("student_results", student_id, *(version or ())))
+    if not_modified:
+        return not_modified
+    results = await StudentTimelineRequest.get_timeline(session, student_id)
+    return fast_json_response(list[results_schemas.EventWithResultModel], results, headers=response.headers)
+
+
+@router.get("/{student_id}/statistics",
+            tags=["Ученики"],
+            summary="Статистика ученика по сезонам и за карьеру",
+            response_model=students_schemas.StudentStatisticsModel
+         )
+async def get_student_statistics(
+        session: SessionDep,
+        student_id: str,
+        user_id: AuthUserDep,
+        season: Optional[int] = None):
+    statistics = await StudentRequest.get_student_statistics(session, student_id)
+    if season is not None:
+        statistics["seasons"] = [s for s in statistics["seasons"] if s["season"] == season]
+    return statistics
 
 
 @router.get("/{student_id}/events",
@@ -82,8 +194,14 @@ async def get_student_results(
 async def get_student_events(session: SessionDep,
                          student_id: str,
                          user_id: AuthUserDep,
+                         request: Request,
+                         response: Response,
                          # coach_event: bool = Depends(get_current_coach_event)
                              ):
+    version = await StudentRequest.get_student_events_version(session, student_id)
+    not_modified = conditional_response(request, response, version_etag("student_events", student_id, *version))
+    if not_modified:
+        return not_modified
     events = await StudentRequest.get_student_events(session, student_id)
     return  events
 
@@ -100,20 +218,12 @@ async def add_student(session: SessionDep,
                         date_of_birth: datetime.date = Form(...),
                         avatar: UploadFile = File(None),
                         ):
-    s3_client = S3Client(
-        access_key=AWS_ACCESS_KEY_ID,
-        secret_key=AWS_SECRET_ACCESS_KEY,
-        endpoint_url=S3_ENDPOINT_URL,
-        bucket_name=S3_BUCKET_NAME,
-        region_name=S3_REGION_NAME,
-    )
-
-    avatar_filename = None
     avatar_url = None
+    avatar_variants = None
     if avatar:
-        avatar_filename = await s3_client.upload_file(avatar)
-        avatar_url = await s3_client.get_file_url(avatar_filename)
-    await StudentRequest.add_student(session, first_name, patronymic, last_name, date_of_birth, avatar_url, user_id)
+        avatar_url, avatar_variants = await upload_avatar(avatar)
+    await StudentRequest.add_student(session, first_name, patronymic, last_name, date_of_birth, avatar_url, user_id,
+                                     avatar_variants=avatar_variants)
     return {"status": "ok"}
 
 
@@ -132,20 +242,11 @@ async def update_student(
     last_name: Optional[str] = Form(None),
     date_of_birth: Optional[datetime.date] = Form(None),
     avatar: Optional[UploadFile] = File(None),
-    coach_student: bool = Depends(get_current_coach_student)
+    coach_student: StudentProfileORM = Depends(get_current_coach_student)
 ):
-    s3_client = S3Client(
-        access_key=AWS_ACCESS_KEY_ID,
-        secret_key=AWS_SECRET_ACCESS_KEY,
-        endpoint_url=S3_ENDPOINT_URL,
-        bucket_name=S3_BUCKET_NAME,
-        region_name=S3_REGION_NAME,
-    )
-
     avatar_url = None
     if avatar:
-        avatar_filename = await s3_client.upload_file(avatar)
-        avatar_url = await s3_client.get_file_url(avatar_filename)
+        avatar_url, avatar_variants = await upload_avatar(avatar)
 
     # Формируем словарь обновляемых полей
     update_fields = {}
@@ -159,6 +260,7 @@ async def update_student(
         update_fields['date_of_birth'] = date_of_birth
     if avatar_url is not None:
         update_fields['img_url'] = avatar_url
+        update_fields['img_variants'] = avatar_variants
 
     if not update_fields:
         return {"status": "no fields to update"}
@@ -176,7 +278,7 @@ async def update_student(
 async def delete_student(session: SessionDep,
                         student_id: str,
                         user_id: AuthUserDep,
-                        coach_student: bool = Depends(get_current_coach_student)):
+                        coach_student: StudentProfileORM = Depends(get_current_coach_student)):
     await UserRequest.delete_user(session, user_id=student_id)
     return {"status": "ok"}
 
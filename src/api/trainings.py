@@ -0,0 +1,249 @@
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, Query
+from src.dependency.dependencies import SessionDep, AuthUserDep, ensure_owner
+
+import src.schemas.trainings as trainings_schemas
+import src.schemas.base as base_schemas
+from src.requests.trainings import TrainingRequest
+from src.models.groups import GroupORM, TrainingORM, TrainingScheduleORM
+from src.api.groups import get_current_coach_group
+from src.utils.http_cache import conditional_response
+from src.utils.reference_data import reference_data
+from typing import Optional
+import datetime
+import os
+
+
+ATTENDANCE_MAX_DAYS = int(os.getenv("ATTENDANCE_MAX_DAYS", 400))
+CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", 93))
+SCHEDULE_HORIZON_DAYS = int(os.getenv("SCHEDULE_HORIZON_DAYS", 56))
+
+router = APIRouter(
+    prefix="/trainings",
+)
+
+
+async def get_current_coach_training(
+    training_id : str,
+    request: Request,
+    session: SessionDep,
+    user_id: AuthUserDep,
+):
+    training = await TrainingRequest.get_training(session, training_id)
+    return ensure_owner(request, "training", training, training and training.coach_id, user_id,
+                        not_found_detail="Тренировка не найдена")
+
+
+async def get_current_coach_schedule(
+    schedule_id : str,
+    request: Request,
+    session: SessionDep,
+    user_id: AuthUserDep,
+):
+    schedule = await TrainingRequest.get_schedule(session, schedule_id)
+    return ensure_owner(request, "schedule", schedule, schedule and schedule.coach_id, user_id,
+                        not_found_detail="Расписание не найдено")
+
+
+@router.get("/statuses",
+            tags=["Посещаемость"],
+            summary="Просмотр всех статусов посещаемости",
+            response_model=list[trainings_schemas.AttendanceStatusModel]
+         )
+async def get_attendance_statuses(session: SessionDep,
+                                  user_id: AuthUserDep,
+                                  request: Request,
+                                  response: Response):
+    statuses = await TrainingRequest.get_attendance_statuses(session)
+    snapshot = await reference_data.get(session, "attendance_statuses")
+    not_modified = conditional_response(request, response, snapshot.etag,
+                                        cache_control="private, max-age=3600")
+    if not_modified:
+        return not_modified
+    return statuses
+
+
+@router.get("/group/{group_id}",
+            tags=["Тренировки"],
+            summary="Список тренировок группы",
+            response_model=list[trainings_schemas.TrainingModel]
+         )
+async def get_group_trainings(session: SessionDep,
+                              group_id: str,
+                              date_from: Optional[datetime.date] = None,
+                              date_to: Optional[datetime.date] = None,
+                              coach_group: GroupORM = Depends(get_current_coach_group)):
+    return await TrainingRequest.get_group_trainings(session, coach_group.id, date_from, date_to)
+
+
+@router.post("/group/{group_id}",
+            tags=["Тренировки"],
+            summary="Добавление тренировки группе",
+            response_model=trainings_schemas.TrainingModel
+         )
+async def add_training(session: SessionDep,
+                       group_id: str,
+                       data: trainings_schemas.AddTrainingModel,
+                       user_id: AuthUserDep,
+                       coach_group: GroupORM = Depends(get_current_coach_group)):
+    return await TrainingRequest.add_training(session, coach_group.id, user_id, **data.model_dump())
+
+
+@router.get("/group/{group_id}/attendance",
+            tags=["Посещаемость"],
+            summary="Матрица посещаемости группы за период",
+            response_model=trainings_schemas.AttendanceMatrixModel
+         )
+async def get_attendance_matrix(session: SessionDep,
+                                group_id: str,
+                                date_from: datetime.date = Query(...),
+                                date_to: datetime.date = Query(...),
+                                coach_group: GroupORM = Depends(get_current_coach_group)):
+    if date_to < date_from or (date_to - date_from).days > ATTENDANCE_MAX_DAYS:
+        raise HTTPException(status_code=400,
+                            detail=f"Период должен быть не длиннее {ATTENDANCE_MAX_DAYS} дней")
+    trainings = await TrainingRequest.get_group_trainings(session, coach_group.id, date_from, date_to)
+    students = await TrainingRequest.get_attendance_matrix(session, coach_group.id, date_from, date_to)
+    return {"trainings": trainings, "students": students}
+
+
+@router.get("/group/{group_id}/calendar",
+            tags=["Расписание"],
+            summary="Календарь тренировок группы за период",
+            response_model=list[trainings_schemas.CalendarItemModel]
+         )
+async def get_group_calendar(session: SessionDep,
+                             group_id: str,
+                             date_from: datetime.date = Query(...),
+                             date_to: datetime.date = Query(...),
+                             coach_group: GroupORM = Depends(get_current_coach_group)):
+    if date_to < date_from or (date_to - date_from).days > CALENDAR_MAX_DAYS:
+        raise HTTPException(status_code=400,
+                            detail=f"Период должен быть не длиннее {CALENDAR_MAX_DAYS} дней")
+    return await TrainingRequest.get_group_calendar(session, coach_group.id, date_from, date_to)
+
+
+@router.get("/group/{group_id}/schedules",
+            tags=["Расписание"],
+            summary="Расписания группы",
+            response_model=list[trainings_schemas.TrainingScheduleModel]
+         )
+async def get_group_schedules(session: SessionDep,
+                              group_id: str,
+                              coach_group: GroupORM = Depends(get_current_coach_group)):
+    return await TrainingRequest.get_group_schedules(session, coach_group.id)
+
+
+@router.post("/group/{group_id}/schedules",
+            tags=["Расписание"],
+            summary="Добавление еженедельного расписания группе",
+            response_model=trainings_schemas.TrainingScheduleModel
+         )
+async def add_schedule(session: SessionDep,
+                       group_id: str,
+                       data: trainings_schemas.AddTrainingScheduleModel,
+                       user_id: AuthUserDep,
+                       coach_group: GroupORM = Depends(get_current_coach_group)):
+    schedule = await TrainingRequest.add_schedule(session, coach_group.id, user_id, **data.model_dump())
+    # тренировки создаются только на ближайший горизонт, дальше — по запросу materialize
+    today = datetime.date.today()
+    await TrainingRequest.materialize_schedule(session, schedule.id, today,
+                                               today + datetime.timedelta(days=SCHEDULE_HORIZON_DAYS))
+    return schedule
+
+
+@router.delete("/schedules/{schedule_id}",
+            tags=["Расписание"],
+            summary="Удаление расписания",
+         )
+async def delete_schedule(session: SessionDep,
+                          schedule_id: str,
+                          coach_schedule: TrainingScheduleORM = Depends(get_current_coach_schedule)):
+    await TrainingRequest.delete_schedule(session, coach_schedule.id, datetime.date.today())
+    return {"status": "ok"}
+
+
+@router.post("/schedules/{schedule_id}/exceptions",
+            tags=["Расписание"],
+            summary="Отмена занятия расписания на дату",
+         )
+async def add_schedule_exception(session: SessionDep,
+                                 schedule_id: str,
+                                 data: trainings_schemas.ScheduleExceptionModel,
+                                 coach_schedule: TrainingScheduleORM = Depends(get_current_coach_schedule)):
+    await TrainingRequest.add_schedule_exception(session, coach_schedule.id, data.date)
+    return {"status": "ok"}
+
+
+@router.post("/schedules/{schedule_id}/materialize",
+            tags=["Расписание"],
+            summary="Создание тренировок по расписанию до указанной даты",
+         )
+async def materialize_schedule(session: SessionDep,
+                               schedule_id: str,
+                               date_to: datetime.date = Query(...),
+                               date_from: Optional[datetime.date] = None,
+                               coach_schedule: TrainingScheduleORM = Depends(get_current_coach_schedule)):
+    date_from = date_from or datetime.date.today()
+    if date_to < date_from or (date_to - date_from).days > ATTENDANCE_MAX_DAYS:
+        raise HTTPException(status_code=400,
+                            detail=f"Период должен быть не длиннее {ATTENDANCE_MAX_DAYS} дней")
+    created = await TrainingRequest.materialize_schedule(session, coach_schedule.id, date_from, date_to)
+    return {"status": "ok", "created": created}
+
+
+@router.get("/{training_id}",
+            tags=["Тренировки"],
+            summary="Информация о тренировке",
+            response_model=trainings_schemas.TrainingModel
+         )
+async def get_training(training_id: str,
+                       coach_training: TrainingORM = Depends(get_current_coach_training)):
+    return coach_training
+
+
+@router.put("/{training_id}",
+            tags=["Тренировки"],
+            summary="Редактирование тренировки",
+         )
+async def update_training(session: SessionDep,
+                          training_id: str,
+                          data: trainings_schemas.EditTrainingModel,
+                          coach_training: TrainingORM = Depends(get_current_coach_training)):
+    fields = data.model_dump(exclude_unset=True)
+    start_time = fields.get("start_time", coach_training.start_time)
+    end_time = fields.get("end_time", coach_training.end_time)
+    if end_time <= start_time:
+        raise HTTPException(status_code=400,
+                            detail="Тренировка должна заканчиваться позже, чем начинается")
+    if fields:
+        await TrainingRequest.update_training(session, coach_training.id, **fields)
+    return {"status": "ok"}
+
+
+@router.delete("/{training_id}",
+            tags=["Тренировки"],
+            summary="Удаление тренировки",
+         )
+async def delete_training(session: SessionDep,
+                          training_id: str,
+                          coach_training: TrainingORM = Depends(get_current_coach_training)):
+    await TrainingRequest.delete_training(session, coach_training.id)
+    return {"status": "ok"}
+
+
+@router.put("/{training_id}/attendance",
+            tags=["Посещаемость"],
+            summary="Отметка посещаемости группы на тренировке",
+            response_model=list[base_schemas.StudentOutcomeModel]
+         )
+async def mark_attendance(session: SessionDep,
+                          training_id: str,
+                          data: trainings_schemas.MarkAttendanceModel,
+                          coach_training: TrainingORM = Depends(get_current_coach_training)):
+    if not data.marks and data.default_status_id is None:
+        raise HTTPException(status_code=400, detail="Не указано ни одной отметки")
+    return await TrainingRequest.mark_attendance(
+        session, coach_training,
+        marks=[(mark.student_id, mark.status_id) for mark in data.marks],
+        default_status_id=data.default_status_id,
+    )
@@ -1,15 +1,14 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, Response
 from src.dependency.dependencies import SessionDep, AuthUserDep
 from src.requests.students import StudentRequest
 from src.requests.users import UserRequest
 import datetime
-from src.s3_storage import S3Client
-from src.config import (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY,
-                        S3_BUCKET_NAME, S3_ENDPOINT_URL, S3_REGION_NAME)
+from src.utils.images import upload_avatar
 from typing import Optional
-from src.security import hash_password, generate_reset_code
+from src.security import password_hasher, generate_reset_code
 import src.schemas.users as users_schemas
 from src.utils.send_email import send_reset_password_email
+from src.utils.http_cache import conditional_response, version_etag
 
 
 router = APIRouter(
@@ -22,12 +21,13 @@ async def is_access_to_edit_user(
     session: SessionDep,
     user_auth_id: AuthUserDep,
 ):
-    student = await StudentRequest.get_student_info(session, user_id)
+    # себя редактировать можно всегда — в БД не ходим
     if user_id == user_auth_id:
         return True
-    elif not student:
+    student = await StudentRequest.get_student_coach(session, user_id)
+    if not student:
         raise HTTPException(status_code=404, detail="Пользователь не найден")
-    elif student.coach_id != user_auth_id:
+    elif str(student.coach_id) != user_auth_id:
         raise HTTPException(status_code=403, detail="Нет доступа")
     return True
 
@@ -45,7 +45,11 @@ async def get_user(user_id: AuthUserDep):
             tags=["Пользователи"],
             summary="Получение данных о пользователе",
             )
-async def get_user_data(session: SessionDep, user_id: AuthUserDep):
+async def get_user_data(session: SessionDep, user_id: AuthUserDep, request: Request, response: Response):
+    version = await UserRequest.get_user_version(session, user_id)
+    not_modified = conditional_response(request, response, version_etag("user", user_id, version))
+    if not_modified:
+        return not_modified
     user = await UserRequest.get_user_data(session, user_id)
     return user
 
@@ -123,18 +127,9 @@ async def update_user(
         password_repeat: Optional[str] = Form(None),
         is_access: bool = Depends(is_access_to_edit_user)
 ):
-    s3_client = S3Client(
-        access_key=AWS_ACCESS_KEY_ID,
-        secret_key=AWS_SECRET_ACCESS_KEY,
-        endpoint_url=S3_ENDPOINT_URL,
-        bucket_name=S3_BUCKET_NAME,
-        region_name=S3_REGION_NAME,
-    )
-
     avatar_url = None
     if avatar:
-        avatar_filename = await s3_client.upload_file(avatar)
-        avatar_url = await s3_client.get_file_url(avatar_filename)
+        avatar_url, avatar_variants = await upload_avatar(avatar)
 
     # Формируем словарь обновляемых полей
     update_fields = {}
@@ -148,11 +143,12 @@ async def update_user(
         update_fields['date_of_birth'] = date_of_birth
     if avatar_url is not None:
         update_fields['img_url'] = avatar_url
+        update_fields['img_variants'] = avatar_variants
     if phone_number is not None:
         update_fields['phone_number'] = phone_number
     if password is not None:
         if password == password_repeat:
-            update_fields['password'] = hash_password(password)
+            update_fields['password'] = await password_hasher.hash(password)
         else:
             raise HTTPException(status_code=400, detail="Пароли не совпадают")
 
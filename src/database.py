@@ -1,18 +1,143 @@
+import logging
+import os
+import time
+
+from sqlalchemy import exc, BigInteger, FetchedValue, Text, bindparam, func, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncAttrs, async_sessionmaker, create_async_engine
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.orm import DeclarativeBase, mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 
 from src.config import DB_URL
+from src.utils.metrics import Counter, Histogram
+
+
+logger = logging.getLogger(__name__)
+
+
+# Профили пула соединений: выбираются переменной DB_POOL_PROFILE,
+# отдельные параметры можно переопределить через DB_POOL_* переменные
+POOL_PROFILES = {
+    "small": {
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    },
+    "default": {
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+    },
+    "high": {
+        "pool_size": 20,
+        "max_overflow": 30,
+        "pool_timeout": 5,
+        "pool_recycle": 900,
+        "pool_pre_ping": True,
+    },
+}
+
+DB_POOL_PROFILE = os.getenv("DB_POOL_PROFILE", "default")
+DB_ECHO = os.getenv("DB_ECHO", "0").lower() in ("1", "true", "yes")
+
+
+def get_pool_settings(profile: str = DB_POOL_PROFILE) -> dict:
+    if profile not in POOL_PROFILES:
+        raise ValueError(f"Неизвестный профиль пула соединений: {profile}")
+    settings = dict(POOL_PROFILES[profile])
+    for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+        value = os.getenv(f"DB_{key.upper()}")
+        if value is not None:
+            settings[key] = int(value)
+    pre_ping = os.getenv("DB_POOL_PRE_PING")
+    if pre_ping is not None:
+        settings["pool_pre_ping"] = pre_ping.lower() in ("1", "true", "yes")
+    return settings
+
+
+pool_wait_time = Histogram()
+pool_timeouts = Counter()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    # замеряем время ожидания свободного соединения и считаем таймауты пула
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_timeouts.inc()
+            logger.warning("Пул соединений исчерпан: %s", self.status())
+            raise
+        finally:
+            pool_wait_time.observe(time.perf_counter() - start)
 
 
+POOL_SETTINGS = get_pool_settings()
+
 engine = create_async_engine(url=DB_URL,
-                             echo=True)
+                             echo=DB_ECHO,
+                             poolclass=InstrumentedPool,
+                             **POOL_SETTINGS)
 
 new_async_session = async_sessionmaker(engine, expire_on_commit=False)
 
+
+def get_pool_stats() -> dict:
+    pool = engine.pool
+    return {
+        "profile": DB_POOL_PROFILE,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": POOL_SETTINGS["max_overflow"],
+        "timeouts": pool_timeouts.value,
+        "wait_time": pool_wait_time.snapshot(),
+    }
+
+
 async def get_session():
     async with new_async_session() as session:
         yield session
 
 class Base(AsyncAttrs, DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
+
+
+# Версии строк берутся из одной общей последовательности: триггер bump_row_version выдаёт
+# новое значение на каждый INSERT и UPDATE, поэтому правка любой строки поднимает max(version)
+# любого набора, в который она входит
+ROW_VERSION_SEQUENCE = "row_version_seq"
+
+
+def version_column():
+    return mapped_column(BigInteger, server_default=text(f"nextval('{ROW_VERSION_SEQUENCE}')"),
+                         server_onupdate=FetchedValue())
+
+
+def version_fingerprint(*versions):
+    # (max версии, число строк) по всем таблицам ответа — дешёвый отпечаток для ETag:
+    # вставка и правка поднимают max, удаление уменьшает число непустых версий
+    latest = func.greatest(*versions) if len(versions) > 1 else versions[0]
+    total = func.count(versions[0])
+    for version in versions[1:]:
+        total = total + func.count(version)
+    return func.max(latest), total
+
+
+async def advisory_lock(session, keys):
+    # транзакционные advisory-блокировки по ключам (обычно id учеников): пересчёты проекций одного
+    # ученика в параллельных транзакциях идут по очереди, а следующий запрос после блокировки
+    # под READ COMMITTED уже видит всё, что закоммитил предыдущий. Ключи берутся в одном порядке
+    # во всех транзакциях (unnest отдаёт массив как есть), поэтому взаимных блокировок нет
+    keys = sorted({str(key) for key in keys if key is not None})
+    if not keys:
+        return
+    key = func.unnest(bindparam("advisory_keys", keys, type_=ARRAY(Text))).column_valued("key")
+    await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(key))))
@@ -1,11 +1,39 @@
-from fastapi import Depends
-from typing import Annotated
+from fastapi import Depends, HTTPException, Request
+from typing import Annotated, Optional
+from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 from src.database import get_session
 from src.security import get_current_user
+from src.utils.tenancy import get_subdomain, tenant_resolver, current_organization_id
 
 
 
 SessionDep = Annotated[AsyncSession, Depends(get_session)]
 AuthUserDep = Annotated[str, Depends(get_current_user)]
 
+
+async def resolve_tenant(request: Request, session: SessionDep):
+    # организация определяется по поддомену; на основном домене запросы не ограничиваются
+    subdomain = get_subdomain(request.headers.get("host"))
+    organization_id = None
+    if subdomain is not None:
+        organization_id = await tenant_resolver.resolve(session, subdomain)
+        if organization_id is None:
+            raise HTTPException(status_code=404, detail="Организация не найдена")
+    current_organization_id.set(organization_id)
+    request.state.organization_id = organization_id
+    return organization_id
+
+
+TenantDep = Annotated[Optional[UUID], Depends(resolve_tenant)]
+
+
+def ensure_owner(request: Request, state_key: str, entity, owner_id, user_id: str, not_found_detail: str):
+    # одна проверка на запрос: сущность уже загружена зависимостью,
+    # кладём её в request.state, чтобы обработчик не читал ту же строку повторно
+    if entity is None:
+        raise HTTPException(status_code=404, detail=not_found_detail)
+    if owner_id is None or str(owner_id) != str(user_id):
+        raise HTTPException(status_code=403, detail="Нет доступа")
+    setattr(request.state, state_key, entity)
+    return entity
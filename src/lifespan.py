@@ -0,0 +1,27 @@
+from contextlib import asynccontextmanager
+
+from src.database import engine, new_async_session
+from src.security import password_hasher
+from src.s3_storage import s3_client
+from src.utils.images import image_processor
+from src.utils.send_email import mail_dispatcher
+from src.utils.reference_data import warm_up_reference_data
+from src.utils.jobs import job_registry
+from src.utils.payments import close_payment_providers
+from src.utils.response_cache import response_cache
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await s3_client.start()
+    await mail_dispatcher.start()
+    await warm_up_reference_data(new_async_session)
+    yield
+    await job_registry.stop()
+    await mail_dispatcher.stop()
+    await close_payment_providers()
+    await response_cache.close()
+    await s3_client.close()
+    image_processor.shutdown()
+    password_hasher.shutdown()
+    await engine.dispose()
@@ -1,7 +1,7 @@
-from src.database import Base
+from src.database import Base, version_column
 from typing import List, Optional
 import datetime
-from sqlalchemy import ForeignKey, String, BigInteger
+from sqlalchemy import ForeignKey, String, BigInteger, Index
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
 from sqlalchemy import Numeric
 from decimal import Decimal
@@ -26,6 +26,7 @@ class EventORM(Base):
     )
     date_start: Mapped[datetime.date]
     date_end: Mapped[datetime.date]
+    version: Mapped[int] = version_column()
 
     results: Mapped[List["ResultORM"]] = relationship(
         "ResultORM",
@@ -47,6 +48,10 @@ class EventORM(Base):
     )
 
 
+# лента мероприятий тренера: WHERE coach_id = ? ORDER BY date_start DESC, id DESC
+Index("ix_events_coach_id_date_start", EventORM.coach_id, EventORM.date_start.desc(), EventORM.id.desc())
+
+
 
 class EventTypeORM(Base):
     __tablename__ = 'event_types'
@@ -76,3 +81,4 @@ class StudentEventORM(Base):
         ForeignKey('events.id', ondelete='CASCADE'),
         primary_key=True
     )
+    version: Mapped[int] = version_column()
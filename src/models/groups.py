@@ -1,12 +1,12 @@
-from src.database import Base
+from src.database import Base, version_column
 from typing import List, Optional
 import datetime
-from sqlalchemy import ForeignKey, String, BigInteger
+from sqlalchemy import ForeignKey, String, BigInteger, Index, SmallInteger, Date
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
 from sqlalchemy import Numeric
 from decimal import Decimal
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, ARRAY
 
 
 class GroupORM(Base):
@@ -21,6 +21,7 @@ class GroupORM(Base):
     coach_id: Mapped[Optional[uuid.UUID]] = mapped_column(
         ForeignKey('coach_profiles.coach_id', ondelete='SET NULL')
     )
+    version: Mapped[int] = version_column()
 
     coach: Mapped["CoachProfileORM"] = relationship(
         "CoachProfileORM",
@@ -42,6 +43,11 @@ class GroupORM(Base):
 
 class TrainingORM(Base):
     __tablename__ = 'trainings'
+    __table_args__ = (
+        Index('ix_trainings_group_id_date', 'group_id', 'date'),
+        # одно занятие расписания на дату — материализация идёт через ON CONFLICT DO NOTHING
+        Index('uq_trainings_schedule_id_date', 'schedule_id', 'date', unique=True),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),  # нативный тип UUID PostgreSQL
@@ -55,6 +61,9 @@ class TrainingORM(Base):
     coach_id: Mapped[Optional[uuid.UUID]] = mapped_column(
         ForeignKey('coach_profiles.coach_id', ondelete='CASCADE')
     )
+    schedule_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey('training_schedules.id', ondelete='SET NULL')
+    )
     date: Mapped[datetime.date]
     start_time: Mapped[datetime.time]
     end_time: Mapped[datetime.time]
@@ -70,6 +79,32 @@ class TrainingORM(Base):
     )
 
 
+class TrainingScheduleORM(Base):
+    __tablename__ = 'training_schedules'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),  # нативный тип UUID PostgreSQL
+        primary_key=True,
+        default=uuid.uuid4,  # передаём функцию, не вызываем
+    )
+    name: Mapped[str] = mapped_column(String(100))
+    group_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('groups.id', ondelete='CASCADE'),
+        index=True
+    )
+    coach_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey('coach_profiles.coach_id', ondelete='CASCADE')
+    )
+    weekday: Mapped[int] = mapped_column(SmallInteger)  # ISO: 1 — понедельник, 7 — воскресенье
+    start_time: Mapped[datetime.time]
+    end_time: Mapped[datetime.time]
+    date_from: Mapped[datetime.date]
+    date_to: Mapped[Optional[datetime.date]]  # None — расписание без даты окончания
+    exceptions: Mapped[List[datetime.date]] = mapped_column(
+        ARRAY(Date), default=list, server_default='{}'
+    )
+
+
 class AttendanceStatusORM(Base):
     __tablename__ = 'attendance_statuses'
 
@@ -89,6 +124,10 @@ class AttendanceStatusORM(Base):
 
 class AttendanceORM(Base):
     __tablename__ = 'attendance'
+    __table_args__ = (
+        # PK начинается со student_id — для выборок по тренировке нужен отдельный индекс
+        Index('ix_attendance_training_id', 'training_id'),
+    )
 
     student_id: Mapped[uuid.UUID] = mapped_column(
         ForeignKey('student_profiles.student_id', ondelete='CASCADE'),
@@ -0,0 +1,48 @@
+from src.database import Base
+from typing import Optional
+from sqlalchemy import ForeignKey, Index, func
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import Numeric
+from decimal import Decimal
+import uuid
+from sqlalchemy.dialects.postgresql import UUID
+
+
+class StudentSeasonStatsORM(Base):
+    # сводная таблица для рейтингов: строка на (ученик, сезон, возрастная и весовая категория),
+    # пересчитывается при каждой записи результата
+    __tablename__ = 'student_season_stats'
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        server_default=func.gen_random_uuid(),
+    )
+    student_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('student_profiles.student_id', ondelete='CASCADE')
+    )
+    season: Mapped[int]
+    age_category_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey('age_categories.id', ondelete='CASCADE')
+    )
+    weight_category_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey('weight_categories.id', ondelete='CASCADE')
+    )
+    coach_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey('users.id', ondelete='SET NULL')
+    )
+    organization_id: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey('organizations.id', ondelete='SET NULL')
+    )
+    competitions: Mapped[int]
+    fights: Mapped[int]
+    wins: Mapped[int]
+    medals: Mapped[int]
+    efficiency_sum: Mapped[Decimal] = mapped_column(Numeric(12, 2))
+    efficiency_count: Mapped[int]
+
+    __table_args__ = (
+        Index("ix_student_season_stats_student_season", "student_id", "season"),
+        Index("ix_student_season_stats_coach_season", "coach_id", "season", "age_category_id"),
+        Index("ix_student_season_stats_org_season", "organization_id", "season", "age_category_id"),
+    )
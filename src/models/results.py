@@ -1,6 +1,6 @@
-from src.database import Base
+from src.database import Base, version_column
 from typing import List, Optional
-from sqlalchemy import ForeignKey, String, BigInteger
+from sqlalchemy import ForeignKey, String, BigInteger, Index
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
 from sqlalchemy import Numeric, Enum
 from decimal import Decimal
@@ -56,6 +56,7 @@ class ResultORM(Base):
         nullable=True
     )
     visited: Mapped[bool]
+    version: Mapped[int] = version_column()
 
 
     event: Mapped["EventORM"] = relationship(
@@ -95,6 +96,12 @@ class ResultORM(Base):
         "polymorphic_on": sport_code,
         "polymorphic_identity": "base"
     }
+    # Postgres не создаёт индексы на внешние ключи сам; по ним идут выборки результатов ученика и мероприятия
+    __table_args__ = (
+        Index("ix_results_student_id", "student_id"),
+        Index("ix_results_event_id", "event_id"),
+        Index("ix_results_place_id", "place_id"),
+    )
 
 
 class ResultUserRole(enum.Enum):
@@ -148,4 +155,39 @@ class KarateKumiteResultORM(ResultORM):
 
     __mapper_args__ = {
         "polymorphic_identity": "karate-kumite"
-    }
\ No newline at end of file
+    }
+
+
+class KarateKataResultORM(ResultORM):
+    __tablename__ = 'karate_kata_results'
+
+    id: Mapped[uuid.UUID] = mapped_column(ForeignKey('results.id', ondelete='CASCADE'), primary_key=True)
+    number_of_rounds: Mapped[int]
+    total_score: Mapped[Decimal] = mapped_column(Numeric(6, 2))
+    best_score: Mapped[Decimal] = mapped_column(Numeric(5, 2))
+
+    __mapper_args__ = {
+        "polymorphic_identity": "karate-kata"
+    }
+
+
+class KarateTeamResultORM(ResultORM):
+    __tablename__ = 'karate_team_results'
+
+    id: Mapped[uuid.UUID] = mapped_column(ForeignKey('results.id', ondelete='CASCADE'), primary_key=True)
+    team_name: Mapped[str] = mapped_column(String(100))
+    number_of_fights: Mapped[int]
+    number_of_wins: Mapped[int]
+    number_of_defeats: Mapped[int]
+
+    __mapper_args__ = {
+        "polymorphic_identity": "karate-team"
+    }
+
+
+# реестр дисциплин: sport_code (дискриминатор ResultORM) -> класс результата со своей таблицей
+RESULT_DISCIPLINES = {
+    "karate-kumite": KarateKumiteResultORM,
+    "karate-kata": KarateKataResultORM,
+    "karate-team": KarateTeamResultORM,
+}
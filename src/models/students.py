@@ -1,10 +1,10 @@
-from src.database import Base
+from src.database import Base, version_column
 from typing import List, Optional
-from sqlalchemy import ForeignKey, String, BigInteger
+from sqlalchemy import ForeignKey, String, BigInteger, func
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
 import datetime
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 
 
 class StudentProfileORM(Base):
@@ -35,6 +35,7 @@ class StudentProfileORM(Base):
     weight: Mapped[Optional[str]] = mapped_column(String(5))
     first_coach: Mapped[Optional[str]] = mapped_column(String(100))
     medical_permit: Mapped[Optional[datetime.date]]
+    version: Mapped[int] = version_column()
 
 
     # связи
@@ -95,4 +96,17 @@ class SportLevelORM(Base):
         "StudentProfileORM",
         back_populates="level",
         passive_deletes=True
-    )
\ No newline at end of file
+    )
+
+
+class StudentResultTimelineORM(Base):
+    # готовая лента результатов ученика (мероприятия с результатами, от новых к старым) —
+    # пересчитывается при записи результатов и изменении мероприятий
+    __tablename__ = 'student_result_timelines'
+
+    student_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey('student_profiles.student_id', ondelete='CASCADE'),
+        primary_key=True
+    )
+    events: Mapped[list] = mapped_column(JSONB, server_default='[]')
+    updated_at: Mapped[datetime.datetime] = mapped_column(server_default=func.now())
@@ -1,10 +1,10 @@
-from src.database import Base
+from src.database import Base, version_column
 from typing import List, Optional
-from sqlalchemy import ForeignKey, String, BigInteger
+from sqlalchemy import ForeignKey, String, BigInteger, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, DeclarativeBase, relationship
 import datetime
 import uuid
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy import Numeric, Enum
 from decimal import Decimal
 
@@ -42,6 +42,10 @@ class OrganizationORM(Base):
 
 class UserORM(Base):
     __tablename__ = 'users'
+    __table_args__ = (
+        # запросы арендатора всегда фильтруются по organization_id
+        Index('ix_users_organization_id_last_name', 'organization_id', 'last_name', 'first_name'),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),  # нативный тип UUID PostgreSQL
@@ -60,9 +64,11 @@ class UserORM(Base):
     date_joined: Mapped[datetime.date]
     date_of_birth: Mapped[datetime.date] = mapped_column(nullable=True)
     img_url: Mapped[str] = mapped_column(String(1000))
+    img_variants: Mapped[Optional[dict]] = mapped_column(JSONB, nullable=True)  # {"256": url, "64": url}
     gender_id: Mapped[Optional[uuid.UUID]] = mapped_column(
         ForeignKey('genders.id', ondelete='SET NULL')
     )
+    version: Mapped[int] = version_column()
 
     organization: Mapped["OrganizationORM"] = relationship(
         "OrganizationORM",
@@ -171,6 +177,15 @@ class ResetPasswordCodeORM(Base):
 
 class TrainingPaymentORM(Base):
     __tablename__ = 'training_payments'
+    __table_args__ = (
+        # повторное уведомление провайдера упирается в этот индекс (INSERT ... ON CONFLICT)
+        Index('uq_training_payments_external_payment_id', 'external_payment_id', unique=True),
+        Index('ix_training_payments_student_id', 'student_id'),
+        Index('ix_training_payments_organization_id_created_at', 'organization_id', 'created_at'),
+        # сверка читает только зависшие платежи
+        Index('ix_training_payments_pending_created_at', 'created_at',
+              postgresql_where=text("status = 'pending'")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -4,10 +4,13 @@ from sqlalchemy.orm import selectinload, joinedload
 
 from src.models.students import StudentProfileORM
 from src.models.users import UserORM, UserRoleORM, RoleORM
-from src.security import hash_password, verify_password
+from src.security import password_hasher
 from fastapi import HTTPException
 from starlette import status
 from src.schemas.base import UserRegisterModel
+from src.utils.reference_data import reference_data
+from src.utils.response_cache import response_cache
+from src.utils.tenancy import get_coach_organization_id
 import datetime
 import uuid
 
@@ -15,9 +18,11 @@ import uuid
 class AuthRequest:
     @classmethod
     async def register(cls, session: AsyncSession, user_data: UserRegisterModel, password:str):
+        # email уникален во всей базе, а не в организации — проверяем без фильтра по организации
         query = (
             select(UserORM)
             .where(UserORM.email == user_data.email)
+            .execution_options(skip_tenant_scope=True)
         )
         user = await session.scalar(query)
         if not user:
@@ -26,7 +31,7 @@ class AuthRequest:
                 patronymic=user_data.patronymic,
                 last_name=user_data.last_name,
                 email=user_data.email,
-                password=hash_password(password),
+                password=await password_hasher.hash(password),
                 date_joined=datetime.datetime.now(datetime.UTC),
                 img_url="https://s3.twcstorage.ru/414c6625-e8dd2907-0748-4c5c-8061-bbabd520cf1f/default-avatar.png",
             )
@@ -51,7 +56,7 @@ class AuthRequest:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Неверный email пользователя",
             )
-        elif not verify_password(password, user.password):
+        elif not await password_hasher.verify(password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Неверный пароль",
@@ -81,27 +86,19 @@ class AuthRequest:
 
     @classmethod
     async def add_coach_role(cls, session, user_id: str):
-        query = (
-            select(RoleORM.id)
-            .where(RoleORM.code == "coach_role")
-        )
-        role_id = await session.scalar(query)
+        role = await reference_data.get_by_code(session, "roles", "coach_role")
         session.add(UserRoleORM(
             user_id=user_id,
-            role_id=role_id,
+            role_id=role["id"],
         ))
         await session.commit()
 
     @classmethod
     async def add_student_role(cls, session, user_id: str):
-        query = (
-            select(RoleORM.id)
-            .where(RoleORM.code == "student_role")
-        )
-        role_id = await session.scalar(query)
+        role = await reference_data.get_by_code(session, "roles", "student_role")
         session.add(UserRoleORM(
             user_id=user_id,
-            role_id=role_id,
+            role_id=role["id"],
         ))
         await session.commit()
 
@@ -111,5 +108,16 @@ class AuthRequest:
             student_id=student_id,
             coach_id=coach_id,
         ))
+        # ученик без организации переходит в организацию тренера; фильтр по организации
+        # запроса здесь бы не нашёл строку с organization_id = NULL
+        query = (
+            update(UserORM)
+            .where(UserORM.id == student_id,
+                   UserORM.organization_id.is_(None))
+            .values(organization_id=await get_coach_organization_id(session, coach_id))
+            .execution_options(skip_tenant_scope=True)
+        )
+        await session.execute(query)
         await session.commit()
+        await response_cache.invalidate(coach_id)
 
@@ -3,6 +3,8 @@ from sqlalchemy import select, update, desc, func, delete
 from sqlalchemy.orm import selectinload, joinedload, contains_eager
 from src.models.groups import GroupORM
 from src.models.students import StudentProfileORM
+from src.models.users import UserORM
+from src.database import version_fingerprint
 from fastapi import HTTPException
 from starlette import status
 
@@ -18,6 +20,24 @@ class CoachRequest:
         results = result_query.scalars().all()
         return results
 
+    @classmethod
+    async def get_coach_groups_version(cls, session: AsyncSession, user_id: str):
+        query = (
+            select(*version_fingerprint(GroupORM.version))
+            .where(GroupORM.coach_id == user_id)
+        )
+        return (await session.execute(query)).one()
+
+    @classmethod
+    async def get_students_in_group_version(cls, session: AsyncSession, group_id: str):
+        query = (
+            select(*version_fingerprint(StudentProfileORM.version, UserORM.version))
+            .select_from(StudentProfileORM)
+            .join(UserORM, UserORM.id == StudentProfileORM.student_id)
+            .where(StudentProfileORM.group_id == group_id)
+        )
+        return (await session.execute(query)).one()
+
     @classmethod
     async def get_students_in_group(cls, session: AsyncSession, group_id: str):
         query = (
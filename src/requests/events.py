@@ -1,47 +1,84 @@
 import datetime
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, desc, delete
+from sqlalchemy import select, update, desc, delete, tuple_, literal
 from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from src.models.events import EventORM, EventTypeORM, StudentEventORM
 from fastapi import HTTPException
 from starlette import status
 from uuid import UUID
+from src.utils.reference_data import reference_data
+from src.requests.leaderboards import LeaderboardRequest
+from src.requests.timelines import StudentTimelineRequest
+from src.utils.response_cache import response_cache
 
 
 from src.models.students import StudentProfileORM
+from src.models.users import UserORM
+from src.database import version_fingerprint
 
 
 class EventRequest:
     @classmethod
-    async def get_coach_events(cls, session: AsyncSession, coach_id: str):
+    async def get_coach_events(cls, session: AsyncSession, coach_id: str,
+                               limit: int | None = None,
+                               after: tuple[datetime.date, UUID] | None = None,
+                               date_from: datetime.date | None = None,
+                               date_to: datetime.date | None = None,
+                               type_id: UUID | None = None):
         query = (
             select(EventORM)
             .options(
                 selectinload(EventORM.type),
             )
             .where(EventORM.coach_id == coach_id)
-            .order_by(desc(EventORM.date_start))
+            .order_by(desc(EventORM.date_start), desc(EventORM.id))
         )
+        if after is not None:
+            # keyset: продолжаем строго после последней строки предыдущей страницы
+            query = query.where(tuple_(EventORM.date_start, EventORM.id) < tuple_(*after))
+        if date_from is not None:
+            query = query.where(EventORM.date_start >= date_from)
+        if date_to is not None:
+            query = query.where(EventORM.date_start <= date_to)
+        if type_id is not None:
+            query = query.where(EventORM.type_id == type_id)
+        if limit is not None:
+            query = query.limit(limit)
         result_query = await session.execute(query)
         results = result_query.scalars().all()
         return results
 
+    @classmethod
+    async def get_coach_events_version(cls, session: AsyncSession, coach_id: str):
+        # по всем мероприятиям тренера, без фильтров страницы: лишний промах дешевле второго запроса
+        query = (
+            select(*version_fingerprint(EventORM.version))
+            .where(EventORM.coach_id == coach_id)
+        )
+        return (await session.execute(query)).one()
+
+    @classmethod
+    async def get_event_students_version(cls, session: AsyncSession, event_id: str):
+        query = (
+            select(*version_fingerprint(StudentEventORM.version, UserORM.version))
+            .select_from(StudentEventORM)
+            .join(UserORM, UserORM.id == StudentEventORM.student_id)
+            .where(StudentEventORM.event_id == event_id)
+        )
+        return (await session.execute(query)).one()
+
     @classmethod
     async def get_event_students(cls, session: AsyncSession, event_id: str):
         query = (
-            select(EventORM)
-            .options(
-                selectinload(EventORM.students)
-                .options(
-                    selectinload(StudentProfileORM.student_data),
-                ),
-            )
-            .where(EventORM.id == event_id)
+            select(UserORM)
+            .join(StudentEventORM, StudentEventORM.student_id == UserORM.id)
+            .where(StudentEventORM.event_id == event_id)
         )
         result_query = await session.execute(query)
-        results = result_query.scalar()
+        results = result_query.scalars().all()
         return results
 
     @classmethod
@@ -55,12 +92,8 @@ class EventRequest:
 
     @classmethod
     async def get_event_types(cls, session: AsyncSession):
-        query = (
-            select(EventTypeORM)
-        )
-        result_query = await session.execute(query)
-        results = result_query.scalars().all()
-        return results
+        # снимок целиком: строки и ETag ответа должны быть из одной загрузки
+        return await reference_data.get(session, "event_types")
 
 
     @classmethod
@@ -84,6 +117,7 @@ class EventRequest:
                 coach_id=coach_id,
             ))
             await session.commit()
+            await response_cache.invalidate(coach_id)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -116,19 +150,32 @@ class EventRequest:
             update(EventORM)
             .where(EventORM.id == event_id)
             .values(**fields)
+            .returning(EventORM.coach_id)
         )
-        await session.execute(query)
+        coach_id = await session.scalar(query)
+        # название и даты мероприятия лежат в лентах результатов его участников,
+        # а перенос дат может перевести результаты в другой сезон таблицы лидеров
+        student_ids = await StudentTimelineRequest.get_event_student_ids(session, event_id)
+        await StudentTimelineRequest.refresh(session, student_ids)
+        await LeaderboardRequest.refresh_students(session, student_ids)
         await session.commit()
+        await response_cache.invalidate(coach_id)
 
 
     @classmethod
     async def delete_event(cls, session: AsyncSession, event_id: str):
+        student_ids = await StudentTimelineRequest.get_event_student_ids(session, event_id)
         query = (
             delete(EventORM)
             .where(EventORM.id == event_id)
+            .returning(EventORM.coach_id)
         )
-        await session.execute(query)
+        # результаты остаются без мероприятия (event_id = NULL) и выпадают из лент и таблицы лидеров
+        coach_id = await session.scalar(query)
+        await StudentTimelineRequest.refresh(session, student_ids)
+        await LeaderboardRequest.refresh_students(session, student_ids)
         await session.commit()
+        await response_cache.invalidate(coach_id)
 
     @classmethod
     async def delete_student_from_event(cls, session, event_id: str, student_id: str):
@@ -138,4 +185,48 @@ class EventRequest:
                    StudentEventORM.event_id == event_id)
         )
         await session.execute(query)
-        await session.commit()
\ No newline at end of file
+        await session.commit()
+
+    @classmethod
+    async def add_event_students(cls, session: AsyncSession, event_id: UUID, coach_id: str,
+                                 student_ids: list[UUID]):
+        # INSERT ... SELECT: регистрируются только ученики этого тренера, повторы гасит ON CONFLICT
+        students = (
+            select(StudentProfileORM.student_id, literal(event_id))
+            .where(StudentProfileORM.student_id.in_(student_ids),
+                   StudentProfileORM.coach_id == coach_id)
+        )
+        query = (
+            pg_insert(StudentEventORM)
+            .from_select(["student_id", "event_id"], students)
+            .on_conflict_do_nothing()
+            .returning(StudentEventORM.student_id)
+        )
+        registered = set(await session.scalars(query))
+        await session.commit()
+        rest = [student_id for student_id in student_ids if student_id not in registered]
+        already = set(await session.scalars(
+            select(StudentEventORM.student_id)
+            .where(StudentEventORM.event_id == event_id,
+                   StudentEventORM.student_id.in_(rest))
+        )) if rest else set()
+        return [
+            {"student_id": student_id,
+             "status": "registered" if student_id in registered else "already_registered" if student_id in already else "not_found"}
+            for student_id in student_ids
+        ]
+
+    @classmethod
+    async def delete_event_students(cls, session: AsyncSession, event_id: UUID, student_ids: list[UUID]):
+        query = (
+            delete(StudentEventORM)
+            .where(StudentEventORM.event_id == event_id,
+                   StudentEventORM.student_id.in_(student_ids))
+            .returning(StudentEventORM.student_id)
+        )
+        removed = set(await session.scalars(query))
+        await session.commit()
+        return [
+            {"student_id": student_id, "status": "removed" if student_id in removed else "not_registered"}
+            for student_id in student_ids
+        ]
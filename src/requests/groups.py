@@ -1,10 +1,12 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, desc, func, delete
+from uuid import UUID
 from sqlalchemy.orm import selectinload, joinedload, contains_eager
 from src.models.groups import GroupORM
 from src.models.students import StudentProfileORM
 from fastapi import HTTPException
 from starlette import status
+from src.utils.response_cache import response_cache
 
 
 class GroupRequest:
@@ -32,6 +34,7 @@ class GroupRequest:
                 coach_id=coach_id,
             ))
             await session.commit()
+            await response_cache.invalidate(coach_id)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -44,18 +47,22 @@ class GroupRequest:
             update(GroupORM)
             .where(GroupORM.id == group_id)
             .values(**fields)
+            .returning(GroupORM.coach_id)
         )
-        await session.execute(query)
+        coach_id = await session.scalar(query)
         await session.commit()
+        await response_cache.invalidate(coach_id)
 
     @classmethod
     async def delete_group(cls, session: AsyncSession, group_id: str):
         query = (
             delete(GroupORM)
             .where(GroupORM.id == group_id)
+            .returning(GroupORM.coach_id)
         )
-        await session.execute(query)
+        coach_id = await session.scalar(query)
         await session.commit()
+        await response_cache.invalidate(coach_id)
 
     @classmethod
     async def add_student_in_group(cls, session, group_id: str, student_id: str):
@@ -65,9 +72,11 @@ class GroupRequest:
             .values(
                 group_id=group_id,
             )
+            .returning(StudentProfileORM.coach_id)
         )
-        await session.execute(query)
+        coach_id = await session.scalar(query)
         await session.commit()
+        await response_cache.invalidate(coach_id)
 
 
     @classmethod
@@ -78,6 +87,56 @@ class GroupRequest:
             .values(
                 group_id=None,
             )
+            .returning(StudentProfileORM.coach_id)
         )
-        await session.execute(query)
-        await session.commit()
\ No newline at end of file
+        coach_id = await session.scalar(query)
+        await session.commit()
+        await response_cache.invalidate(coach_id)
+
+    @classmethod
+    async def add_students_in_group(cls, session: AsyncSession, group_id: str, coach_id: str,
+                                    student_ids: list[UUID]):
+        # один UPDATE на всю пачку; по остальным одним запросом выясняем причину
+        query = (
+            update(StudentProfileORM)
+            .where(StudentProfileORM.student_id.in_(student_ids),
+                   StudentProfileORM.coach_id == coach_id,
+                   StudentProfileORM.group_id.is_(None))
+            .values(group_id=group_id)
+            .returning(StudentProfileORM.student_id)
+        )
+        added = set(await session.scalars(query))
+        await session.commit()
+        if added:
+            await response_cache.invalidate(coach_id)
+        rest = [student_id for student_id in student_ids if student_id not in added]
+        in_group = set(await session.scalars(
+            select(StudentProfileORM.student_id)
+            .where(StudentProfileORM.student_id.in_(rest),
+                   StudentProfileORM.coach_id == coach_id)
+        )) if rest else set()
+        return [
+            {"student_id": student_id,
+             "status": "added" if student_id in added else "already_in_group" if student_id in in_group else "not_found"}
+            for student_id in student_ids
+        ]
+
+    @classmethod
+    async def delete_students_from_group(cls, session: AsyncSession, group_id: str, coach_id: str,
+                                         student_ids: list[UUID]):
+        query = (
+            update(StudentProfileORM)
+            .where(StudentProfileORM.student_id.in_(student_ids),
+                   StudentProfileORM.coach_id == coach_id,
+                   StudentProfileORM.group_id == group_id)
+            .values(group_id=None)
+            .returning(StudentProfileORM.student_id)
+        )
+        removed = set(await session.scalars(query))
+        await session.commit()
+        if removed:
+            await response_cache.invalidate(coach_id)
+        return [
+            {"student_id": student_id, "status": "removed" if student_id in removed else "not_in_group"}
+            for student_id in student_ids
+        ]
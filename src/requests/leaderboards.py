@@ -0,0 +1,171 @@
+import os
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, delete, insert, func, cast, Integer, Numeric, desc, tuple_
+
+from src.models.events import EventORM
+from src.models.leaderboards import StudentSeasonStatsORM
+from src.models.results import ResultORM, PlaceORM, KarateKumiteResultORM
+from src.models.students import StudentProfileORM
+from src.models.users import UserORM
+from src.database import advisory_lock
+
+
+# названия мест (PlaceORM.name), которые считаются медалями
+MEDAL_PLACES = tuple(os.getenv("MEDAL_PLACES", "1,2,3").split(","))
+
+
+class LeaderboardRequest:
+    @classmethod
+    def _aggregate_query(cls):
+        results = ResultORM.__table__
+        kumite = KarateKumiteResultORM.__table__
+        season = cast(func.extract("year", EventORM.date_start), Integer)
+        return (
+            select(
+                results.c.student_id,
+                season.label("season"),
+                results.c.age_category_id,
+                results.c.weight_category_id,
+                StudentProfileORM.coach_id,
+                UserORM.organization_id,
+                func.count(results.c.id),
+                func.coalesce(func.sum(kumite.c.number_of_fights), 0),
+                func.coalesce(func.sum(kumite.c.number_of_wins), 0),
+                func.count(results.c.id).filter(PlaceORM.name.in_(MEDAL_PLACES)),
+                func.coalesce(func.sum(kumite.c.efficiency), 0),
+                func.count(kumite.c.efficiency),
+            )
+            .select_from(results)
+            .join(EventORM, EventORM.id == results.c.event_id)
+            .join(StudentProfileORM, StudentProfileORM.student_id == results.c.student_id)
+            .join(UserORM, UserORM.id == results.c.student_id)
+            .outerjoin(kumite, kumite.c.id == results.c.id)
+            .outerjoin(PlaceORM, PlaceORM.id == results.c.place_id)
+            .group_by(results.c.student_id, season, results.c.age_category_id, results.c.weight_category_id,
+                      StudentProfileORM.coach_id, UserORM.organization_id)
+        ), season
+
+    @classmethod
+    def _insert(cls, aggregate):
+        stats = StudentSeasonStatsORM.__table__
+        return insert(stats).from_select(
+            ["student_id", "season", "age_category_id", "weight_category_id", "coach_id", "organization_id",
+             "competitions", "fights", "wins", "medals", "efficiency_sum", "efficiency_count"],
+            aggregate,
+        )
+
+    @classmethod
+    async def get_result_keys(cls, session: AsyncSession, result_ids: list):
+        # (ученик, мероприятие) затронутых результатов — читаем до изменения/удаления
+        query = (
+            select(ResultORM.student_id, ResultORM.event_id)
+            .where(ResultORM.id.in_(result_ids))
+        )
+        result_query = await session.execute(query)
+        return [tuple(row) for row in result_query.all()]
+
+    @classmethod
+    async def refresh(cls, session: AsyncSession, keys):
+        # инкрементальный пересчёт: только пары (ученик, сезон), которых коснулась запись;
+        # вызывается в той же транзакции, что и изменение результата
+        keys = {(student_id, event_id) for student_id, event_id in keys
+                if student_id is not None and event_id is not None}
+        if not keys:
+            return
+        season_query = (
+            select(EventORM.id, cast(func.extract("year", EventORM.date_start), Integer))
+            .where(EventORM.id.in_({event_id for _, event_id in keys}))
+        )
+        seasons = dict((await session.execute(season_query)).all())
+        pairs = {(student_id, seasons[event_id]) for student_id, event_id in keys if event_id in seasons}
+        if not pairs:
+            return
+        # delete + insert по снимку, взятому до чужого commit, вернул бы устаревшие строки
+        await advisory_lock(session, {student_id for student_id, _ in pairs})
+
+        stats = StudentSeasonStatsORM.__table__
+        await session.execute(
+            delete(stats).where(tuple_(stats.c.student_id, stats.c.season).in_(list(pairs)))
+        )
+        aggregate, season = cls._aggregate_query()
+        aggregate = aggregate.where(tuple_(ResultORM.__table__.c.student_id, season).in_(list(pairs)))
+        await session.execute(cls._insert(aggregate))
+
+    @classmethod
+    async def refresh_students(cls, session: AsyncSession, student_ids):
+        # пересчёт всех сезонов учеников: после переноса дат или удаления мероприятия, смены тренера
+        # или организации старый сезон по результатам уже не найти, поэтому строки собираются заново
+        student_ids = list({student_id for student_id in student_ids if student_id is not None})
+        if not student_ids:
+            return
+        await advisory_lock(session, student_ids)
+        stats = StudentSeasonStatsORM.__table__
+        await session.execute(delete(stats).where(stats.c.student_id.in_(student_ids)))
+        aggregate, _ = cls._aggregate_query()
+        aggregate = aggregate.where(ResultORM.__table__.c.student_id.in_(student_ids))
+        await session.execute(cls._insert(aggregate))
+
+    @classmethod
+    async def rebuild(cls, session: AsyncSession):
+        # полный пересчёт идёт по всем организациям сразу, фильтр арендатора здесь не нужен
+        await session.execute(delete(StudentSeasonStatsORM).execution_options(skip_tenant_scope=True))
+        aggregate, _ = cls._aggregate_query()
+        await session.execute(cls._insert(aggregate))
+        await session.commit()
+
+    @classmethod
+    async def get_leaderboard(cls, session: AsyncSession, season: int, metric: str,
+                              coach_id: str | None = None,
+                              organization_id: UUID | None = None,
+                              age_category_id: UUID | None = None,
+                              weight_category_id: UUID | None = None,
+                              limit: int = 50):
+        stats = StudentSeasonStatsORM
+        totals = (
+            select(
+                stats.student_id,
+                func.sum(stats.competitions).label("competitions"),
+                func.sum(stats.fights).label("fights"),
+                func.sum(stats.wins).label("wins"),
+                func.sum(stats.medals).label("medals"),
+                func.round(cast(func.sum(stats.efficiency_sum), Numeric)
+                           / func.nullif(func.sum(stats.efficiency_count), 0), 2).label("efficiency"),
+            )
+            .where(stats.season == season)
+            .group_by(stats.student_id)
+        )
+        if coach_id is not None:
+            totals = totals.where(stats.coach_id == coach_id)
+        if organization_id is not None:
+            totals = totals.where(stats.organization_id == organization_id)
+        if age_category_id is not None:
+            totals = totals.where(stats.age_category_id == age_category_id)
+        if weight_category_id is not None:
+            totals = totals.where(stats.weight_category_id == weight_category_id)
+        totals = totals.subquery()
+
+        metric_column = totals.c[metric]
+        query = (
+            select(
+                func.rank().over(order_by=desc(metric_column).nulls_last()).label("rank"),
+                totals,
+                UserORM.first_name,
+                UserORM.last_name,
+                UserORM.img_url,
+            )
+            .join(UserORM, UserORM.id == totals.c.student_id)
+            .order_by(desc(metric_column).nulls_last(), UserORM.last_name)
+            .limit(limit)
+        )
+        result_query = await session.execute(query)
+        return [dict(row) for row in result_query.mappings()]
+
+    @classmethod
+    async def get_user_organization_id(cls, session: AsyncSession, user_id: str):
+        query = (
+            select(UserORM.organization_id)
+            .where(UserORM.id == user_id)
+        )
+        return await session.scalar(query)
@@ -0,0 +1,177 @@
+import datetime
+import uuid
+from decimal import Decimal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, desc, tuple_, column, values, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from fastapi import HTTPException
+from starlette import status
+from uuid import UUID
+
+from src.models.users import OrganizationORM, UserORM, TrainingPaymentORM
+from src.utils.payments import get_payment_provider, FINAL_STATUSES
+
+
+class PaymentRequest:
+    @classmethod
+    async def get_organization(cls, session: AsyncSession, organization_id: UUID | str):
+        query = (
+            select(OrganizationORM)
+            .where(OrganizationORM.id == organization_id,
+                   OrganizationORM.is_active.is_(True))
+        )
+        return await session.scalar(query)
+
+    @classmethod
+    async def get_user_organization(cls, session: AsyncSession, user_id: str):
+        query = (
+            select(OrganizationORM)
+            .join(UserORM, UserORM.organization_id == OrganizationORM.id)
+            .where(UserORM.id == user_id,
+                   OrganizationORM.is_active.is_(True))
+        )
+        return await session.scalar(query)
+
+    @classmethod
+    async def get_student_payments(cls, session: AsyncSession, student_id: UUID):
+        query = (
+            select(TrainingPaymentORM)
+            .where(TrainingPaymentORM.student_id == student_id)
+            .order_by(desc(TrainingPaymentORM.created_at))
+        )
+        result_query = await session.scalars(query)
+        return result_query.all()
+
+    @classmethod
+    async def create_payment(cls, session: AsyncSession, organization: OrganizationORM,
+                             student_id: UUID, amount: Decimal, description: str,
+                             return_url: str | None = None):
+        provider = get_payment_provider(organization)
+        email = await session.scalar(select(UserORM.email).where(UserORM.id == student_id))
+        payment_id = uuid.uuid4()
+        # в metadata кладём всё, чтобы вебхук мог восстановить строку, если вставка ниже не прошла
+        external = await provider.create_payment(
+            payment_id, amount, description, email, return_url,
+            metadata={"payment_id": str(payment_id),
+                      "organization_id": str(organization.id),
+                      "student_id": str(student_id)},
+            tax_system_code=organization.tax_system_code,
+        )
+        payment = TrainingPaymentORM(
+            id=payment_id,
+            organization_id=organization.id,
+            student_id=student_id,
+            amount=amount,
+            status=external["status"],
+            description=description,
+            external_payment_id=external["id"],
+            created_at=datetime.datetime.now(),
+            email=email,
+        )
+        session.add(payment)
+        await session.commit()
+        return payment, external["confirmation_url"]
+
+    @classmethod
+    async def apply_webhook(cls, session: AsyncSession, organization: OrganizationORM, payload: dict) -> str:
+        provider = get_payment_provider(organization)
+        external_id = provider.parse_webhook(payload)
+
+        # повторное уведомление по уже закрытому платежу — один SELECT по уникальному индексу
+        current_status = await session.scalar(
+            select(TrainingPaymentORM.status)
+            .where(TrainingPaymentORM.external_payment_id == external_id)
+        )
+        if current_status in FINAL_STATUSES:
+            return current_status
+
+        payment = await provider.get_payment(external_id)
+        if payment is None or payment["metadata"].get("organization_id") != str(organization.id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Платёж не найден"
+            )
+        metadata = payment["metadata"]
+        query = pg_insert(TrainingPaymentORM).values(
+            id=uuid.UUID(metadata["payment_id"]) if metadata.get("payment_id") else uuid.uuid4(),
+            organization_id=organization.id,
+            student_id=uuid.UUID(metadata["student_id"]) if metadata.get("student_id") else None,
+            amount=payment["amount"],
+            status=payment["status"],
+            description=payment["description"][:255],
+            external_payment_id=external_id,
+            created_at=datetime.datetime.now(),
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[TrainingPaymentORM.external_payment_id],
+            set_={"status": query.excluded.status},
+            # итоговый статус не откатываем, даже если уведомления пришли не по порядку
+            where=TrainingPaymentORM.status.notin_(FINAL_STATUSES),
+        )
+        await session.execute(query)
+        await session.commit()
+        return payment["status"]
+
+    @classmethod
+    async def reconcile(cls, session: AsyncSession, older_than: datetime.datetime,
+                        batch_size: int = 200) -> dict:
+        # сверка зависших платежей пачками: статусы у провайдера запрашиваются параллельно,
+        # изменения пишутся одним UPDATE ... FROM (VALUES ...) на пачку
+        checked = updated = 0
+        after = None
+        organizations = {}
+        while True:
+            query = (
+                select(TrainingPaymentORM.id,
+                       TrainingPaymentORM.created_at,
+                       TrainingPaymentORM.organization_id,
+                       TrainingPaymentORM.external_payment_id)
+                .where(TrainingPaymentORM.status == "pending",
+                       TrainingPaymentORM.created_at < older_than)
+                .order_by(TrainingPaymentORM.created_at, TrainingPaymentORM.id)
+                .limit(batch_size)
+            )
+            if after is not None:
+                query = query.where(tuple_(TrainingPaymentORM.created_at, TrainingPaymentORM.id) > after)
+            batch = (await session.execute(query)).all()
+            if not batch:
+                break
+            after = (batch[-1].created_at, batch[-1].id)
+            checked += len(batch)
+
+            by_organization = {}
+            for row in batch:
+                by_organization.setdefault(row.organization_id, []).append(row.external_payment_id)
+            changes = []
+            for organization_id, external_ids in by_organization.items():
+                if organization_id not in organizations:
+                    organizations[organization_id] = await cls.get_organization(session, organization_id)
+                organization = organizations[organization_id]
+                if organization is None:
+                    continue
+                try:
+                    provider = get_payment_provider(organization)
+                except HTTPException:
+                    continue
+                payments = await provider.get_payments(external_ids)
+                changes += [
+                    (external_id, payment["status"])
+                    for external_id, payment in payments.items()
+                    if payment["status"] != "pending"
+                ]
+            if changes:
+                changes_table = (
+                    values(column("external_payment_id", String), column("status", String), name="changes")
+                    .data(changes)
+                )
+                update_query = (
+                    update(TrainingPaymentORM)
+                    .where(TrainingPaymentORM.external_payment_id == changes_table.c.external_payment_id,
+                           TrainingPaymentORM.status == "pending")
+                    .values(status=changes_table.c.status)
+                )
+                result = await session.execute(update_query)
+                updated += result.rowcount
+                await session.commit()
+        return {"checked": checked, "updated": updated}
@@ -1,108 +1,369 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, desc, delete, asc
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy import select, update, desc, delete, asc, tuple_, func
+from sqlalchemy.orm import selectinload, joinedload, with_polymorphic, selectin_polymorphic
 
-from src.models.results import ResultORM, PlaceORM
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from src.models.results import (ResultORM, PlaceORM, KarateKumiteResultORM, KarateKataResultORM,
+                                KarateTeamResultORM, RESULT_DISCIPLINES)
+from src.models.categories import AgeCategoryORM, WeightCategoryORM
 from fastapi import HTTPException
 from starlette import status
 from src.models.students import StudentProfileORM
 from src.models.events import EventORM
+from src.models.users import UserORM
+from src.utils.reference_data import reference_data
+from src.requests.leaderboards import LeaderboardRequest
+from src.requests.timelines import StudentTimelineRequest
+from src.database import version_fingerprint
+from src.utils.response_cache import response_cache
 from uuid import UUID
+import datetime
+import os
+import uuid
+
+
+KUMITE_SPORT_CODE = "karate-kumite"
+# joined — один запрос с LEFT JOIN всех таблиц дисциплин (with_polymorphic),
+# selectin — базовая таблица и по одному запросу на каждую встреченную дисциплину
+RESULT_LOADING = os.getenv("RESULT_LOADING", "joined")
+# id импортированного результата детерминирован: повторный импорт того же файла не создаёт дублей
+IMPORT_NAMESPACE = uuid.UUID("6f1d4c7e-2b8a-4f3e-9c51-0d7a2e8b4f60")
+
+
+def _kumite_derived(fields: dict) -> dict:
+    return {
+        "average_score": round(fields["points_scored"] / fields["number_of_fights"], 2),
+        "efficiency": round((fields["points_scored"] - fields["points_missed"]) / fields["number_of_fights"], 2),
+    }
+
+
+# вычисляемые колонки дисциплины пересчитываются при каждой записи результата
+DERIVED_FIELDS = {
+    KUMITE_SPORT_CODE: _kumite_derived,
+}
 
 
 class ResultRequest:
     @classmethod
-    async def add_result(cls,
-                         session,
-                         event_id: UUID,
-                         student_id: UUID,
-                         place_id: UUID,
-                         points_scored: int,
-                         points_missed: int,
-                         number_of_fights: int):
+    def results_query(cls, strategy: str = RESULT_LOADING):
+        # select результатов, у которого колонки всех дисциплин загружаются сразу:
+        # в async-сессии ленивой догрузки полей подкласса быть не должно
+        disciplines = list(RESULT_DISCIPLINES.values())
+        if strategy == "selectin":
+            return select(ResultORM).options(selectin_polymorphic(ResultORM, disciplines)), ResultORM
+        entity = with_polymorphic(ResultORM, disciplines)
+        return select(entity), entity
+
+    @classmethod
+    async def add_result(cls, session, data):
+        model = RESULT_DISCIPLINES[data.sport_code]
         query = (
-            select(ResultORM)
-            .where(ResultORM.event_id == event_id,
-                   ResultORM.student_id == student_id,
-                   ResultORM.place_id == place_id,
-                   ResultORM.points_scored == points_scored,
-                   ResultORM.points_missed == points_missed,
-                   ResultORM.number_of_fights == number_of_fights,
-                   )
+            select(ResultORM.id)
+            .where(ResultORM.event_id == data.event_id,
+                   ResultORM.student_id == data.student_id,
+                   ResultORM.sport_code == data.sport_code,
+                   ResultORM.age_category_id == data.age_category_id,
+                   ResultORM.weight_category_id.is_not_distinct_from(data.weight_category_id))
         )
-        result = await session.scalar(query)
-        if not result:
-            session.add(ResultORM(
-                event_id=event_id,
-                student_id=student_id,
-                place_id=place_id,
-                points_scored=points_scored,
-                points_missed=points_missed,
-                number_of_fights=number_of_fights,
-                average_score=points_scored / number_of_fights,
-                efficiency=(points_scored - points_missed) / number_of_fights,
-            ))
-            await session.commit()
-        else:
+        if await session.scalar(query):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Такой результат уже есть"
             )
+        fields = data.model_dump(exclude={"sport_code"})
+        if data.sport_code in DERIVED_FIELDS:
+            fields.update(DERIVED_FIELDS[data.sport_code](fields))
+        sport_type = await reference_data.get_by_code(session, "sport_types", data.sport_code)
+        # класс дисциплины сам раскладывает колонки по results и своей таблице
+        result = model(sport_type_id=sport_type["id"] if sport_type else None, **fields)
+        session.add(result)
+        await session.flush()
+        await LeaderboardRequest.refresh(session, [(data.student_id, data.event_id)])
+        await StudentTimelineRequest.refresh(session, [data.student_id])
+        coach_ids = await cls._event_coach_ids(session, [data.event_id])
+        await session.commit()
+        await response_cache.invalidate(*coach_ids)
+        return result
+
+    @classmethod
+    async def _event_coach_ids(cls, session: AsyncSession, event_ids) -> set:
+        # результаты показываются в списке того тренера, чьё это мероприятие
+        event_ids = {event_id for event_id in event_ids if event_id is not None}
+        if not event_ids:
+            return set()
+        return set(await session.scalars(
+            select(EventORM.coach_id).where(EventORM.id.in_(event_ids))
+        ))
 
     @classmethod
     async def get_places(cls, session: AsyncSession):
+        # снимок целиком: строки и ETag ответа должны быть из одной загрузки
+        return await reference_data.get(session, "places")
+
+    @classmethod
+    async def get_results(cls, session: AsyncSession, user_id: str,
+                          limit: int | None = None,
+                          after: tuple[datetime.date, UUID] | None = None):
+        # страница мероприятий тренера (keyset по date_start, id)
+        page = (
+            select(EventORM.id, EventORM.date_start)
+            .where(EventORM.coach_id == user_id)
+            .order_by(desc(EventORM.date_start), desc(EventORM.id))
+        )
+        if after is not None:
+            page = page.where(tuple_(EventORM.date_start, EventORM.id) < tuple_(*after))
+        if limit is not None:
+            page = page.limit(limit)
+        page = page.subquery()
+
+        # только те колонки, которые нужны EventWithResultModel, без построения ORM-графа
+        results = ResultORM.__table__
+        kumite = KarateKumiteResultORM.__table__
+        kata = KarateKataResultORM.__table__
+        team = KarateTeamResultORM.__table__
         query = (
-            select(PlaceORM)
+            select(
+                EventORM.id, EventORM.name, EventORM.date_start, EventORM.date_end, EventORM.coach_id,
+                results.c.id.label("result_id"), results.c.student_id, results.c.sport_code,
+                kumite.c.points_scored, kumite.c.points_missed,
+                func.coalesce(kumite.c.number_of_fights, team.c.number_of_fights).label("number_of_fights"),
+                func.coalesce(kumite.c.number_of_wins, team.c.number_of_wins).label("number_of_wins"),
+                kumite.c.average_score, kumite.c.efficiency,
+                kata.c.number_of_rounds, kata.c.total_score, kata.c.best_score, team.c.team_name,
+                PlaceORM.id.label("place_id"), PlaceORM.name.label("place_name"),
+                StudentProfileORM.coach_id.label("student_coach_id"), StudentProfileORM.group_id,
+                UserORM.first_name, UserORM.patronymic, UserORM.last_name, UserORM.email,
+                UserORM.date_of_birth, UserORM.phone_number, UserORM.img_url, UserORM.img_variants,
+            )
+            .select_from(page)
+            .join(EventORM, EventORM.id == page.c.id)
+            .outerjoin(results, results.c.event_id == EventORM.id)
+            .outerjoin(kumite, kumite.c.id == results.c.id)
+            .outerjoin(kata, kata.c.id == results.c.id)
+            .outerjoin(team, team.c.id == results.c.id)
+            .outerjoin(PlaceORM, PlaceORM.id == results.c.place_id)
+            .outerjoin(StudentProfileORM, StudentProfileORM.student_id == results.c.student_id)
+            .outerjoin(UserORM, UserORM.id == results.c.student_id)
+            .order_by(desc(page.c.date_start), desc(page.c.id), results.c.id)
         )
-        result_query = await session.execute(query)
-        results = result_query.scalars().all()
-        return results
+
+        events = []
+        stream = await session.stream(query)
+        async for row in stream:
+            if not events or events[-1]["id"] != row.id:
+                events.append({
+                    "id": row.id,
+                    "name": row.name,
+                    "date_start": row.date_start,
+                    "date_end": row.date_end,
+                    "coach_id": row.coach_id,
+                    "results": [],
+                })
+            if row.result_id is None:
+                continue
+            student = None
+            if row.student_id is not None:
+                student = {
+                    "student_data": {
+                        "id": row.student_id,
+                        "first_name": row.first_name,
+                        "patronymic": row.patronymic,
+                        "last_name": row.last_name,
+                        "email": row.email,
+                        "date_of_birth": row.date_of_birth,
+                        "phone_number": row.phone_number,
+                        "img_url": row.img_url,
+                        "img_variants": row.img_variants,
+                    },
+                    "coach_id": row.student_coach_id,
+                    "group_id": row.group_id,
+                }
+            events[-1]["results"].append({
+                "id": row.result_id,
+                "event_id": row.id,
+                "sport_code": row.sport_code,
+                "student": student,
+                "place": {"id": row.place_id, "name": row.place_name} if row.place_id is not None else None,
+                "points_scored": row.points_scored,
+                "points_missed": row.points_missed,
+                "number_of_fights": row.number_of_fights,
+                "number_of_wins": row.number_of_wins,
+                "average_score": row.average_score,
+                "efficiency": row.efficiency,
+                "number_of_rounds": row.number_of_rounds,
+                "total_score": row.total_score,
+                "best_score": row.best_score,
+                "team_name": row.team_name,
+            })
+        return events
 
     @classmethod
-    async def get_results(cls, session: AsyncSession, user_id: str):
+    async def get_results_version(cls, session: AsyncSession, user_id: str):
         query = (
-            select(EventORM)
-            .options(
-                selectinload(EventORM.results)
-                .options(
-                    selectinload(ResultORM.place),
-                    selectinload(ResultORM.student)
-                    .options(
-                        selectinload(StudentProfileORM.student_data),
-                    ),
-                ),
-            )
+            select(*version_fingerprint(EventORM.version, ResultORM.version,
+                                        StudentProfileORM.version, UserORM.version))
+            .select_from(EventORM)
+            .outerjoin(ResultORM, ResultORM.event_id == EventORM.id)
+            .outerjoin(StudentProfileORM, StudentProfileORM.student_id == ResultORM.student_id)
+            .outerjoin(UserORM, UserORM.id == ResultORM.student_id)
             .where(EventORM.coach_id == user_id)
-            .order_by(desc(EventORM.date_start))
         )
-        result_query = await session.execute(query)
-        results = result_query.scalars().all()
-        return results
+        return (await session.execute(query)).one()
 
     @classmethod
-    async def get_result(cls, session: AsyncSession, result_id: str):
+    async def get_result_version(cls, session: AsyncSession, result_id: str):
         query = (
-            select(ResultORM)
+            select(*version_fingerprint(ResultORM.version))
             .where(ResultORM.id == result_id)
         )
+        return (await session.execute(query)).one()
+
+    @classmethod
+    async def get_result(cls, session: AsyncSession, result_id: str):
+        query, entity = cls.results_query()
+        query = query.where(entity.id == result_id)
         result = await session.scalar(query)
         return result
 
     @classmethod
     async def update_result(cls, session, result_id: str,  **fields):
-        query = (
-            update(ResultORM)
-            .where(ResultORM.id == result_id)
-            .values(**fields)
-        )
-        await session.execute(query)
+        result = await cls.get_result(session, result_id)
+        if result is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Результат не найден"
+            )
+        columns = type(result).__mapper__.column_attrs.keys()
+        unknown = [name for name in fields if name not in columns]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Поля не относятся к дисциплине результата: {', '.join(unknown)}"
+            )
+        affected = [(result.student_id, result.event_id)]
+        for name, value in fields.items():
+            setattr(result, name, value)
+        if result.sport_code in DERIVED_FIELDS:
+            values = {name: getattr(result, name) for name in columns}
+            for name, value in DERIVED_FIELDS[result.sport_code](values).items():
+                setattr(result, name, value)
+        # UPDATE уходит в те таблицы (results и/или таблицу дисциплины), чьи колонки изменились
+        await session.flush()
+        affected.append((result.student_id, result.event_id))
+        await LeaderboardRequest.refresh(session, affected)
+        await StudentTimelineRequest.refresh(session, [student_id for student_id, _ in affected])
+        coach_ids = await cls._event_coach_ids(session, [event_id for _, event_id in affected])
         await session.commit()
+        await response_cache.invalidate(*coach_ids)
 
     @classmethod
     async def delete_result(cls, session: AsyncSession, result_id: str):
+        affected = await LeaderboardRequest.get_result_keys(session, [result_id])
         query = (
             delete(ResultORM)
             .where(ResultORM.id == result_id)
         )
         await session.execute(query)
-        await session.commit()
\ No newline at end of file
+        await LeaderboardRequest.refresh(session, affected)
+        await StudentTimelineRequest.refresh(session, [student_id for student_id, _ in affected])
+        coach_ids = await cls._event_coach_ids(session, [event_id for _, event_id in affected])
+        await session.commit()
+        await response_cache.invalidate(*coach_ids)
+
+    @classmethod
+    async def import_results(cls, session: AsyncSession, event_id: UUID, coach_id: str, rows: list):
+        # rows — уже провалидированные строки [(номер строки, ImportResultRowModel)];
+        # справочные данные проверяются пачкой, вставка — один INSERT в каждую таблицу
+        student_ids = {row.student_id for _, row in rows}
+        age_category_ids = {row.age_category_id for _, row in rows}
+        weight_category_ids = {row.weight_category_id for _, row in rows if row.weight_category_id}
+
+        owned_students = set(await session.scalars(
+            select(StudentProfileORM.student_id)
+            .where(StudentProfileORM.student_id.in_(student_ids),
+                   StudentProfileORM.coach_id == coach_id)
+        ))
+        age_categories = set(await session.scalars(
+            select(AgeCategoryORM.id).where(AgeCategoryORM.id.in_(age_category_ids))
+        ))
+        weight_categories = set(await session.scalars(
+            select(WeightCategoryORM.id).where(WeightCategoryORM.id.in_(weight_category_ids))
+        )) if weight_category_ids else set()
+        existing = set((await session.execute(
+            select(ResultORM.student_id, ResultORM.age_category_id, ResultORM.weight_category_id)
+            .where(ResultORM.event_id == event_id,
+                   ResultORM.student_id.in_(student_ids),
+                   ResultORM.sport_code == KUMITE_SPORT_CODE)
+        )).all())
+
+        places = await reference_data.get(session, "places")
+        places_by_name = {place["name"]: place for place in places.rows}
+        sport_type = await reference_data.get_by_code(session, "sport_types", KUMITE_SPORT_CODE)
+
+        report = []
+        result_rows = []
+        kumite_rows = []
+        for number, row in rows:
+            place = places_by_name.get(row.place) or await reference_data.get_by_id(session, "places", row.place)
+            key = (row.student_id, row.age_category_id, row.weight_category_id)
+            if row.student_id not in owned_students:
+                report.append({"row": number, "status": "error", "detail": "Ученик не найден"})
+            elif place is None:
+                report.append({"row": number, "status": "error", "detail": "Место не найдено"})
+            elif row.age_category_id not in age_categories:
+                report.append({"row": number, "status": "error", "detail": "Возрастная категория не найдена"})
+            elif row.weight_category_id and row.weight_category_id not in weight_categories:
+                report.append({"row": number, "status": "error", "detail": "Весовая категория не найдена"})
+            elif key in existing:
+                report.append({"row": number, "status": "duplicate", "detail": "Такой результат уже есть"})
+            else:
+                existing.add(key)
+                # дисциплина входит в ключ, как и в add_result: ката и командный результат того же
+                # ученика в тех же категориях — не дубль кумите
+                result_id = uuid.uuid5(IMPORT_NAMESPACE, f"{event_id}:{KUMITE_SPORT_CODE}:{row.student_id}:"
+                                                         f"{row.age_category_id}:{row.weight_category_id}")
+                result_rows.append({
+                    "id": result_id,
+                    "event_id": event_id,
+                    "student_id": row.student_id,
+                    "place_id": place["id"],
+                    "sport_type_id": sport_type["id"] if sport_type else None,
+                    "sport_code": KUMITE_SPORT_CODE,
+                    "age_category_id": row.age_category_id,
+                    "weight_category_id": row.weight_category_id,
+                    "visited": row.visited,
+                })
+                kumite_row = {
+                    "id": result_id,
+                    "number_of_fights": row.number_of_fights,
+                    "number_of_wins": row.number_of_wins,
+                    "number_of_defeats": row.number_of_defeats,
+                    "points_scored": row.points_scored,
+                    "points_missed": row.points_missed,
+                }
+                kumite_rows.append({**kumite_row, **_kumite_derived(kumite_row)})
+                report.append({"row": number, "status": "created", "result_id": result_id})
+
+        if result_rows:
+            results = ResultORM.__table__
+            inserted = set(await session.scalars(
+                pg_insert(results)
+                .values(result_rows)
+                .on_conflict_do_nothing(index_elements=[results.c.id])
+                .returning(results.c.id)
+            ))
+            kumite_rows = [row for row in kumite_rows if row["id"] in inserted]
+            if kumite_rows:
+                await session.execute(pg_insert(KarateKumiteResultORM.__table__).values(kumite_rows))
+            await LeaderboardRequest.refresh(
+                session, [(row["student_id"], event_id) for row in result_rows if row["id"] in inserted]
+            )
+            await StudentTimelineRequest.refresh(
+                session, [row["student_id"] for row in result_rows if row["id"] in inserted]
+            )
+            await session.commit()
+            await response_cache.invalidate(coach_id)
+            for item in report:
+                if item["status"] == "created" and item["result_id"] not in inserted:
+                    item.update(status="duplicate", result_id=None, detail="Такой результат уже есть")
+        return report
@@ -1,14 +1,23 @@
+import asyncio
 import datetime
+import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, desc, func, delete, asc
+from sqlalchemy import select, update, desc, func, delete, asc, cast, Integer, Numeric, insert, tuple_
 from sqlalchemy.orm import selectinload, joinedload, contains_eager
 from src.models.students import StudentProfileORM
 from fastapi import HTTPException
 from starlette import status
-from src.models.users import UserORM
+from src.models.users import UserORM, UserRoleORM
 from src.config import DEFAULT_AVATAR
-from src.models.results import ResultORM, PlaceORM
-from src.models.events import EventORM
+from src.security import password_hasher, generate_password
+from src.utils.reference_data import reference_data
+from src.utils.send_email import send_registration_email
+from src.utils.response_cache import response_cache
+from src.utils.tenancy import get_coach_organization_id
+from src.models.results import ResultORM, PlaceORM, KarateKumiteResultORM
+from src.models.events import EventORM, StudentEventORM
+from src.models.groups import GroupORM
+from src.database import version_fingerprint
 
 
 class StudentRequest:
@@ -25,6 +34,33 @@ class StudentRequest:
         result = result_query.scalar()
         return result
 
+    @classmethod
+    async def get_student_info_version(cls, session: AsyncSession, student_id: str):
+        query = (
+            select(*version_fingerprint(StudentProfileORM.version, UserORM.version))
+            .select_from(StudentProfileORM)
+            .join(UserORM, UserORM.id == StudentProfileORM.student_id)
+            .where(StudentProfileORM.student_id == student_id)
+        )
+        return (await session.execute(query)).one()
+
+    @classmethod
+    async def get_student_profile(cls, session: AsyncSession, student_id: str):
+        query = (
+            select(StudentProfileORM)
+            .where(StudentProfileORM.student_id == student_id)
+        )
+        return await session.scalar(query)
+
+    @classmethod
+    async def get_student_coach(cls, session: AsyncSession, student_id: str):
+        query = (
+            select(StudentProfileORM.coach_id)
+            .where(StudentProfileORM.student_id == student_id)
+        )
+        result_query = await session.execute(query)
+        return result_query.first()  # None — если ученика нет
+
     @classmethod
     async def get_students_by_coach(cls, session: AsyncSession, coach_id: str):
         query = (
@@ -39,6 +75,27 @@ class StudentRequest:
         results = result_query.scalars().all()
         return results
 
+    @classmethod
+    async def get_students_by_coach_version(cls, session: AsyncSession, coach_id: str):
+        query = (
+            select(*version_fingerprint(StudentProfileORM.version, UserORM.version, GroupORM.version))
+            .select_from(StudentProfileORM)
+            .join(UserORM, UserORM.id == StudentProfileORM.student_id)
+            .outerjoin(GroupORM, GroupORM.id == StudentProfileORM.group_id)
+            .where(StudentProfileORM.coach_id == coach_id)
+        )
+        return (await session.execute(query)).one()
+
+    @classmethod
+    async def get_student_events_version(cls, session: AsyncSession, student_id: str):
+        query = (
+            select(*version_fingerprint(StudentEventORM.version, EventORM.version))
+            .select_from(StudentEventORM)
+            .join(EventORM, EventORM.id == StudentEventORM.event_id)
+            .where(StudentEventORM.student_id == student_id)
+        )
+        return (await session.execute(query)).one()
+
     @classmethod
     async def get_student_events(cls, session: AsyncSession, student_id: str):
         query = (
@@ -56,7 +113,8 @@ class StudentRequest:
 
     @classmethod
     async def add_student(cls, session, first_name: str, patronymic: str, last_name: str,
-                            date_of_birth: datetime.date, avatar_url: str | None, coach_id: str):
+                            date_of_birth: datetime.date, avatar_url: str | None, coach_id: str,
+                            avatar_variants: dict | None = None):
 
         img_url = avatar_url or DEFAULT_AVATAR
         query = (
@@ -78,6 +136,8 @@ class StudentRequest:
                 last_name=last_name,
                 date_of_birth=date_of_birth,
                 img_url=img_url,
+                img_variants=avatar_variants,
+                organization_id=await get_coach_organization_id(session, coach_id),
             )
             session.add(new_user)
             await session.flush()  # получить ID до использования
@@ -87,12 +147,16 @@ class StudentRequest:
                 coach_id=coach_id,
             ))
             await session.commit()
+            await response_cache.invalidate(coach_id)
         elif not student.student_profile:
+            if student.organization_id is None:
+                student.organization_id = await get_coach_organization_id(session, coach_id)
             session.add(StudentProfileORM(
                 student_id=student.id,
                 coach_id=coach_id,
             ))
             await session.commit()
+            await response_cache.invalidate(coach_id)
         else:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -102,35 +166,166 @@ class StudentRequest:
 
 
     @classmethod
-    async def get_student_results(cls, session: AsyncSession, student_id: str):
-        # query = (
-        #     select(ResultORM)
-        #     .join(ResultORM.event)
-        #     .options(
-        #         selectinload(ResultORM.event)
-        #         .options(
-        #             selectinload(EventORM.type),
-        #         ),
-        #         selectinload(ResultORM.place),
-        #     )
-        #     .where(ResultORM.student_id == student_id)
-        #     .order_by(asc(EventORM.date_start))
-        # )
+    async def get_student_statistics(cls, session: AsyncSession, student_id: str):
+        results = ResultORM.__table__
+        kumite = KarateKumiteResultORM.__table__
+        season = cast(func.extract("year", EventORM.date_start), Integer)
 
+        # агрегаты по сезонам считает Postgres, Python получает по строке на сезон
+        per_season = (
+            select(
+                season.label("season"),
+                func.count(results.c.id).label("competitions"),
+                func.coalesce(func.sum(kumite.c.number_of_fights), 0).label("fights"),
+                func.coalesce(func.sum(kumite.c.number_of_wins), 0).label("wins"),
+                func.coalesce(func.sum(kumite.c.number_of_defeats), 0).label("defeats"),
+                func.coalesce(func.sum(kumite.c.points_scored), 0).label("points_scored"),
+                func.coalesce(func.sum(kumite.c.points_missed), 0).label("points_missed"),
+                func.sum(kumite.c.efficiency).label("efficiency_sum"),
+                func.count(kumite.c.efficiency).label("efficiency_count"),
+            )
+            .select_from(results)
+            .join(EventORM, EventORM.id == results.c.event_id)
+            .outerjoin(kumite, kumite.c.id == results.c.id)
+            .where(results.c.student_id == student_id)
+            .group_by(season)
+            .subquery()
+        )
+        s = per_season.c
+
+        def ratio(numerator, denominator):
+            return func.round(cast(numerator, Numeric) / func.nullif(denominator, 0), 4)
+
+        career = {
+            column: func.sum(getattr(s, column)).over()
+            for column in ("competitions", "fights", "wins", "defeats", "points_scored", "points_missed",
+                           "efficiency_sum", "efficiency_count")
+        }
+        efficiency = ratio(s.efficiency_sum, s.efficiency_count)
         query = (
-            select(EventORM)
-            .join(ResultORM, EventORM.results)
-            .options(
-                contains_eager(EventORM.results)
-                .options(
-                    selectinload(ResultORM.place),
-                    selectinload(ResultORM.student)
-                    .options(selectinload(StudentProfileORM.student_data))
-                )
+            select(
+                s.season, s.competitions, s.fights, s.wins, s.defeats, s.points_scored, s.points_missed,
+                efficiency.label("efficiency"),
+                ratio(s.wins, s.fights).label("win_rate"),
+                (efficiency - func.lag(efficiency).over(order_by=s.season)).label("efficiency_change"),
+                *(value.label(f"career_{column}") for column, value in career.items()),
+                ratio(career["efficiency_sum"], career["efficiency_count"]).label("career_efficiency"),
+                ratio(career["wins"], career["fights"]).label("career_win_rate"),
             )
-            .where(ResultORM.student_id == student_id)
-            .order_by(desc(EventORM.date_start))
+            .order_by(s.season)
         )
-        result_query = await session.execute(query)
-        results = result_query.unique().scalars().all()
-        return results
\ No newline at end of file
+        seasons = (await session.execute(query)).all()
+
+        places_query = (
+            select(PlaceORM.id.label("place_id"), PlaceORM.name, func.count(results.c.id).label("count"))
+            .join(results, results.c.place_id == PlaceORM.id)
+            .where(results.c.student_id == student_id)
+            .group_by(PlaceORM.id, PlaceORM.name)
+            .order_by(PlaceORM.name)
+        )
+        places = [dict(row) for row in (await session.execute(places_query)).mappings()]
+
+        totals = ("competitions", "fights", "wins", "defeats", "points_scored", "points_missed")
+        first = seasons[0] if seasons else None
+        career_row = {column: getattr(first, f"career_{column}") if first else 0 for column in totals}
+        career_row["efficiency"] = first.career_efficiency if first else None
+        career_row["win_rate"] = first.career_win_rate if first else None
+        return {
+            "career": career_row,
+            "seasons": [
+                {column: getattr(row, column)
+                 for column in ("season", *totals, "efficiency", "win_rate", "efficiency_change")}
+                for row in seasons
+            ],
+            "places": places,
+        }
+
+    @classmethod
+    async def import_students(cls, session: AsyncSession, coach_id: str, rows: list,
+                              group_id: str | None = None):
+        # rows — [(номер строки, RosterRowModel)] одной порции; дубли ищутся одним запросом,
+        # пользователи, профили и роли вставляются по одному INSERT на таблицу
+        report = []
+        keys = {(row.last_name, row.first_name, row.date_of_birth) for _, row in rows}
+        # как в add_student, дублем считается только ученик этого же тренера: чужие аккаунты
+        # (тренеры, ученики других клубов) с теми же ФИО и датой рождения не трогаем
+        existing_query = (
+            select(UserORM.id, UserORM.first_name, UserORM.patronymic, UserORM.last_name,
+                   UserORM.date_of_birth)
+            .join(StudentProfileORM, StudentProfileORM.student_id == UserORM.id)
+            .where(tuple_(UserORM.last_name, UserORM.first_name, UserORM.date_of_birth).in_(list(keys)),
+                   StudentProfileORM.coach_id == coach_id)
+        )
+        existing = {
+            (row.last_name, row.first_name, row.patronymic or None, row.date_of_birth): row
+            for row in (await session.execute(existing_query)).all()
+        }
+        emails = {row.email for _, row in rows if row.email}
+        # email уникален во всей базе — занятые ищем без фильтра по организации
+        taken_emails = set(await session.scalars(
+            select(UserORM.email)
+            .where(UserORM.email.in_(emails))
+            .execution_options(skip_tenant_scope=True)
+        )) if emails else set()
+        organization_id = await get_coach_organization_id(session, coach_id)
+
+        users = []
+        profiles = []
+        accounts = []
+        seen = set()
+        now = datetime.datetime.now(datetime.UTC)
+        for number, row in rows:
+            key = (row.last_name, row.first_name, row.patronymic or None, row.date_of_birth)
+            if key in seen or key in existing:
+                report.append({"row": number, "status": "duplicate", "detail": "Такой ученик уже существует"})
+                continue
+            seen.add(key)
+            if row.email and row.email in taken_emails:
+                report.append({"row": number, "status": "error",
+                               "detail": "Пользователь с таким email уже существует"})
+                continue
+            user_id = uuid.uuid4()
+            user = {
+                "id": user_id,
+                "first_name": row.first_name,
+                "patronymic": row.patronymic,
+                "last_name": row.last_name,
+                "date_of_birth": row.date_of_birth,
+                "phone_number": row.phone_number,
+                "img_url": DEFAULT_AVATAR,
+                "date_joined": now,
+                # организация тренера; массовый INSERT всё равно идёт мимо before_flush
+                "organization_id": organization_id,
+            }
+            if row.email:
+                taken_emails.add(row.email)
+                user["email"] = row.email
+                accounts.append((user, generate_password()))
+            users.append(user)
+            profiles.append({"student_id": user_id, "coach_id": coach_id, "group_id": group_id})
+            report.append({"row": number, "status": "created", "student_id": user_id})
+
+        # bcrypt — порциями по числу воркеров, чтобы не упереться в лимит очереди хешера
+        for start in range(0, len(accounts), password_hasher.workers):
+            chunk = accounts[start:start + password_hasher.workers]
+            hashes = await asyncio.gather(*(password_hasher.hash(password) for _, password in chunk))
+            for (user, _), password_hash in zip(chunk, hashes):
+                user["password"] = password_hash
+
+        if users:
+            # у строк разный набор колонок (email/пароль только у тех, кому создаётся аккаунт)
+            for columns in {tuple(sorted(user)) for user in users}:
+                await session.execute(insert(UserORM), [u for u in users if tuple(sorted(u)) == columns])
+        if profiles:
+            await session.execute(insert(StudentProfileORM), profiles)
+        if accounts:
+            role = await reference_data.get_by_code(session, "roles", "student_role")
+            await session.execute(insert(UserRoleORM),
+                                  [{"user_id": user["id"], "role_id": role["id"]} for user, _ in accounts])
+        await session.commit()
+        if profiles:
+            await response_cache.invalidate(coach_id)
+
+        for user, password in accounts:
+            await send_registration_email(user["email"], password)
+        return report
@@ -0,0 +1,189 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func, case, null, desc, literal_column, cast
+from sqlalchemy.dialects.postgresql import insert as pg_insert, aggregate_order_by, JSONB
+from uuid import UUID
+
+from src.models.events import EventORM
+from src.models.results import ResultORM, PlaceORM, KarateKumiteResultORM, KarateKataResultORM, KarateTeamResultORM
+from src.models.students import StudentProfileORM, StudentResultTimelineORM
+from src.models.users import UserORM
+from src.database import advisory_lock
+
+
+def _json_object(**fields):
+    # ключи — константы кода, поэтому подставляются литералами, а не параметрами
+    arguments = []
+    for key, value in fields.items():
+        arguments += [literal_column(f"'{key}'"), value]
+    return func.jsonb_build_object(*arguments)
+
+
+class StudentTimelineRequest:
+    @classmethod
+    def _timeline_query(cls, student_ids: list):
+        # документ собирает сам Postgres: результаты -> мероприятие -> лента ученика;
+        # данные ученика в документ не входят, они подставляются при чтении
+        results = ResultORM.__table__
+        kumite = KarateKumiteResultORM.__table__
+        kata = KarateKataResultORM.__table__
+        team = KarateTeamResultORM.__table__
+        result_document = _json_object(
+            id=results.c.id,
+            event_id=results.c.event_id,
+            sport_code=results.c.sport_code,
+            place=case((PlaceORM.id.is_(None), null()),
+                       else_=_json_object(id=PlaceORM.id, name=PlaceORM.name)),
+            points_scored=kumite.c.points_scored,
+            points_missed=kumite.c.points_missed,
+            number_of_fights=func.coalesce(kumite.c.number_of_fights, team.c.number_of_fights),
+            number_of_wins=func.coalesce(kumite.c.number_of_wins, team.c.number_of_wins),
+            average_score=kumite.c.average_score,
+            efficiency=kumite.c.efficiency,
+            number_of_rounds=kata.c.number_of_rounds,
+            total_score=kata.c.total_score,
+            best_score=kata.c.best_score,
+            team_name=team.c.team_name,
+        )
+        events = (
+            select(
+                results.c.student_id,
+                EventORM.id.label("event_id"),
+                EventORM.date_start,
+                _json_object(
+                    id=EventORM.id,
+                    name=EventORM.name,
+                    date_start=EventORM.date_start,
+                    date_end=EventORM.date_end,
+                    coach_id=EventORM.coach_id,
+                    results=func.jsonb_agg(aggregate_order_by(result_document, results.c.id)),
+                ).label("document"),
+            )
+            .select_from(results)
+            .join(EventORM, EventORM.id == results.c.event_id)
+            .outerjoin(kumite, kumite.c.id == results.c.id)
+            .outerjoin(kata, kata.c.id == results.c.id)
+            .outerjoin(team, team.c.id == results.c.id)
+            .outerjoin(PlaceORM, PlaceORM.id == results.c.place_id)
+            .where(results.c.student_id.in_(student_ids))
+            .group_by(results.c.student_id, EventORM.id)
+        ).subquery()
+        # строка есть у каждого ученика из списка, даже без результатов, — чтение не промахивается
+        timeline = func.jsonb_agg(
+            aggregate_order_by(events.c.document, desc(events.c.date_start), desc(events.c.event_id))
+        ).filter(events.c.event_id.is_not(None))
+        return (
+            select(StudentProfileORM.student_id, func.coalesce(timeline, cast("[]", JSONB)))
+            .outerjoin(events, events.c.student_id == StudentProfileORM.student_id)
+            .where(StudentProfileORM.student_id.in_(student_ids))
+            .group_by(StudentProfileORM.student_id)
+        )
+
+    @classmethod
+    async def refresh(cls, session: AsyncSession, student_ids):
+        # вызывается в транзакции записи результата/мероприятия, до commit
+        student_ids = list({student_id for student_id in student_ids if student_id is not None})
+        if not student_ids:
+            return
+        # без блокировки две параллельные записи соберут ленту каждая по своему снимку,
+        # и последней может лечь та, что не видела чужой результат
+        await advisory_lock(session, student_ids)
+        query = pg_insert(StudentResultTimelineORM).from_select(
+            ["student_id", "events"], cls._timeline_query(student_ids)
+        )
+        query = query.on_conflict_do_update(
+            index_elements=[StudentResultTimelineORM.student_id],
+            set_={"events": query.excluded.events, "updated_at": func.now()},
+        )
+        await session.execute(query)
+
+    @classmethod
+    async def rebuild(cls, session: AsyncSession, batch_size: int = 500) -> int:
+        # пересчёт всех лент пачками учеников, каждая пачка — своя транзакция
+        rebuilt = 0
+        after = None
+        while True:
+            query = (
+                select(StudentProfileORM.student_id)
+                .order_by(StudentProfileORM.student_id)
+                .limit(batch_size)
+            )
+            if after is not None:
+                query = query.where(StudentProfileORM.student_id > after)
+            student_ids = (await session.scalars(query)).all()
+            if not student_ids:
+                break
+            await cls.refresh(session, student_ids)
+            await session.commit()
+            rebuilt += len(student_ids)
+            after = student_ids[-1]
+        return rebuilt
+
+    @classmethod
+    async def get_event_student_ids(cls, session: AsyncSession, event_id: UUID | str):
+        query = (
+            select(ResultORM.student_id)
+            .where(ResultORM.event_id == event_id)
+            .distinct()
+        )
+        return (await session.scalars(query)).all()
+
+    @classmethod
+    async def get_timeline_version(cls, session: AsyncSession, student_id: UUID | str):
+        query = (
+            select(StudentResultTimelineORM.updated_at, StudentProfileORM.version, UserORM.version)
+            .select_from(StudentProfileORM)
+            .join(UserORM, UserORM.id == StudentProfileORM.student_id)
+            .outerjoin(StudentResultTimelineORM,
+                       StudentResultTimelineORM.student_id == StudentProfileORM.student_id)
+            .where(StudentProfileORM.student_id == student_id)
+        )
+        return (await session.execute(query)).first()
+
+    @classmethod
+    async def get_timeline(cls, session: AsyncSession, student_id: UUID | str):
+        # одно обращение по первичным ключам: лента + профиль ученика
+        query = (
+            select(
+                StudentResultTimelineORM.events,
+                StudentProfileORM.coach_id,
+                StudentProfileORM.group_id,
+                UserORM.id, UserORM.first_name, UserORM.patronymic, UserORM.last_name, UserORM.email,
+                UserORM.date_of_birth, UserORM.phone_number, UserORM.img_url, UserORM.img_variants,
+            )
+            .select_from(StudentProfileORM)
+            .join(UserORM, UserORM.id == StudentProfileORM.student_id)
+            .outerjoin(StudentResultTimelineORM,
+                       StudentResultTimelineORM.student_id == StudentProfileORM.student_id)
+            .where(StudentProfileORM.student_id == student_id)
+        )
+        row = (await session.execute(query)).first()
+        if row is None:
+            return []
+        events = row.events
+        if events is None:
+            # ленты ещё нет (до первого rebuild) — строим её сейчас
+            await cls.refresh(session, [row.id])
+            await session.commit()
+            events = await session.scalar(
+                select(StudentResultTimelineORM.events)
+                .where(StudentResultTimelineORM.student_id == row.id)
+            )
+        student = {
+            "student_data": {
+                "id": row.id,
+                "first_name": row.first_name,
+                "patronymic": row.patronymic,
+                "last_name": row.last_name,
+                "email": row.email,
+                "date_of_birth": row.date_of_birth,
+                "phone_number": row.phone_number,
+                "img_url": row.img_url,
+                "img_variants": row.img_variants,
+            },
+            "coach_id": row.coach_id,
+            "group_id": row.group_id,
+        }
+        for event in events:
+            for result in event["results"]:
+                result["student"] = student
+        return events
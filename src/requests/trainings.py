@@ -0,0 +1,346 @@
+import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (select, update, delete, func, and_, or_, true, literal, cast, column, values,
+                        exists, literal_column, Date, DateTime, Integer)
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB, UUID as PG_UUID
+from fastapi import HTTPException
+from starlette import status
+from uuid import UUID
+
+from src.models.groups import TrainingORM, AttendanceORM, TrainingScheduleORM
+from src.models.students import StudentProfileORM
+from src.models.users import UserORM
+from src.utils.reference_data import reference_data
+
+
+class TrainingRequest:
+    @classmethod
+    async def get_training(cls, session: AsyncSession, training_id: str):
+        query = (
+            select(TrainingORM)
+            .where(TrainingORM.id == training_id)
+        )
+        return await session.scalar(query)
+
+    @classmethod
+    async def get_group_trainings(cls, session: AsyncSession, group_id: UUID,
+                                  date_from: datetime.date | None = None,
+                                  date_to: datetime.date | None = None):
+        query = (
+            select(TrainingORM)
+            .where(TrainingORM.group_id == group_id)
+            .order_by(TrainingORM.date, TrainingORM.start_time)
+        )
+        if date_from is not None:
+            query = query.where(TrainingORM.date >= date_from)
+        if date_to is not None:
+            query = query.where(TrainingORM.date <= date_to)
+        result_query = await session.scalars(query)
+        return result_query.all()
+
+    @classmethod
+    async def get_attendance_statuses(cls, session: AsyncSession):
+        snapshot = await reference_data.get(session, "attendance_statuses")
+        return snapshot.rows
+
+    @classmethod
+    async def add_training(cls, session: AsyncSession, group_id: UUID, coach_id: str, name: str,
+                           date: datetime.date, start_time: datetime.time, end_time: datetime.time):
+        if end_time <= start_time:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Тренировка должна заканчиваться позже, чем начинается"
+            )
+        training = TrainingORM(
+            name=name,
+            group_id=group_id,
+            coach_id=coach_id,
+            date=date,
+            start_time=start_time,
+            end_time=end_time,
+        )
+        session.add(training)
+        await session.commit()
+        return training
+
+    @classmethod
+    async def update_training(cls, session: AsyncSession, training_id: UUID, **fields):
+        if fields.get("date") is not None:
+            # у расписания одна тренировка на дату (uq_trainings_schedule_id_date): перенос
+            # сгенерированной тренировки на занятый день — конфликт, а не IntegrityError
+            schedule_id = (
+                select(TrainingORM.schedule_id)
+                .where(TrainingORM.id == training_id)
+                .scalar_subquery()
+            )
+            conflict = await session.scalar(
+                select(TrainingORM.id)
+                .where(TrainingORM.schedule_id == schedule_id,
+                       TrainingORM.date == fields["date"],
+                       TrainingORM.id != training_id)
+            )
+            if conflict:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="На эту дату по расписанию уже есть тренировка"
+                )
+        query = (
+            update(TrainingORM)
+            .where(TrainingORM.id == training_id)
+            .values(**fields)
+        )
+        await session.execute(query)
+        await session.commit()
+
+    @classmethod
+    async def delete_training(cls, session: AsyncSession, training_id: UUID):
+        query = (
+            delete(TrainingORM)
+            .where(TrainingORM.id == training_id)
+        )
+        await session.execute(query)
+        await session.commit()
+
+    @classmethod
+    async def mark_attendance(cls, session: AsyncSession, training: TrainingORM,
+                              marks: list[tuple[UUID, UUID]],
+                              default_status_id: UUID | None = None):
+        # повтор ученика в одной пачке ON CONFLICT не пропустит — оставляем последнюю отметку
+        marks = list(dict(marks).items())
+        status_ids = {status_id for _, status_id in marks}
+        if default_status_id is not None:
+            status_ids.add(default_status_id)
+        for status_id in status_ids:
+            if await reference_data.get_by_id(session, "attendance_statuses", status_id) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Неизвестный статус посещаемости"
+                )
+
+        # вся группа отмечается одним INSERT ... SELECT ... ON CONFLICT DO UPDATE;
+        # в выборку попадают только ученики группы этой тренировки
+        query = (
+            select(StudentProfileORM.student_id, literal(training.id, PG_UUID(as_uuid=True)))
+            .where(StudentProfileORM.group_id == training.group_id)
+        )
+        if marks:
+            marks_table = (
+                values(column("student_id", PG_UUID(as_uuid=True)),
+                       column("status_id", PG_UUID(as_uuid=True)),
+                       name="marks")
+                .data(marks)
+            )
+            query = query.join(marks_table,
+                               marks_table.c.student_id == StudentProfileORM.student_id,
+                               isouter=default_status_id is not None)
+            status_column = func.coalesce(marks_table.c.status_id,
+                                          literal(default_status_id, PG_UUID(as_uuid=True)))
+        elif default_status_id is not None:
+            status_column = literal(default_status_id, PG_UUID(as_uuid=True))
+        else:
+            return []
+        query = query.add_columns(status_column)
+
+        insert_query = pg_insert(AttendanceORM).from_select(
+            ["student_id", "training_id", "status_id"], query
+        )
+        insert_query = (
+            insert_query
+            .on_conflict_do_update(
+                index_elements=[AttendanceORM.student_id, AttendanceORM.training_id],
+                set_={"status_id": insert_query.excluded.status_id},
+            )
+            .returning(AttendanceORM.student_id)
+        )
+        marked = set(await session.scalars(insert_query))
+        await session.commit()
+        outcomes = [{"student_id": student_id, "status": "marked"} for student_id in marked]
+        outcomes += [
+            {"student_id": student_id, "status": "not_in_group"}
+            for student_id, _ in marks
+            if student_id not in marked
+        ]
+        return outcomes
+
+    @classmethod
+    async def get_attendance_matrix(cls, session: AsyncSession, group_id: UUID,
+                                    date_from: datetime.date, date_to: datetime.date):
+        trainings = (
+            select(TrainingORM.id)
+            .where(TrainingORM.group_id == group_id,
+                   TrainingORM.date >= date_from,
+                   TrainingORM.date <= date_to)
+            .subquery()
+        )
+        # в матрицу попадают текущие ученики группы и те, кто уже ушёл, но отмечен в периоде
+        students = (
+            select(StudentProfileORM.student_id)
+            .where(or_(
+                StudentProfileORM.group_id == group_id,
+                StudentProfileORM.student_id.in_(
+                    select(AttendanceORM.student_id)
+                    .where(AttendanceORM.training_id.in_(select(trainings.c.id)))
+                ),
+            ))
+        )
+        # pivot одним запросом: ученики × тренировки, ячейка — статус или null
+        attendance = func.jsonb_object_agg(trainings.c.id, AttendanceORM.status_id).filter(
+            trainings.c.id.is_not(None)
+        )
+        query = (
+            select(
+                UserORM.id.label("student_id"),
+                UserORM.last_name,
+                UserORM.first_name,
+                UserORM.patronymic,
+                func.coalesce(attendance, cast("{}", JSONB)).label("attendance"),
+            )
+            .outerjoin(trainings, true())
+            .outerjoin(AttendanceORM, and_(AttendanceORM.student_id == UserORM.id,
+                                           AttendanceORM.training_id == trainings.c.id))
+            .where(UserORM.id.in_(students))
+            .group_by(UserORM.id)
+            .order_by(UserORM.last_name, UserORM.first_name)
+        )
+        result_query = await session.execute(query)
+        return [dict(row) for row in result_query.mappings().all()]
+
+    @classmethod
+    async def get_schedule(cls, session: AsyncSession, schedule_id: str):
+        query = (
+            select(TrainingScheduleORM)
+            .where(TrainingScheduleORM.id == schedule_id)
+        )
+        return await session.scalar(query)
+
+    @classmethod
+    async def get_group_schedules(cls, session: AsyncSession, group_id: UUID):
+        query = (
+            select(TrainingScheduleORM)
+            .where(TrainingScheduleORM.group_id == group_id)
+            .order_by(TrainingScheduleORM.weekday, TrainingScheduleORM.start_time)
+        )
+        result_query = await session.scalars(query)
+        return result_query.all()
+
+    @classmethod
+    async def add_schedule(cls, session: AsyncSession, group_id: UUID, coach_id: str, **fields):
+        if fields["end_time"] <= fields["start_time"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Тренировка должна заканчиваться позже, чем начинается"
+            )
+        if fields.get("date_to") is not None and fields["date_to"] < fields["date_from"]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Дата окончания расписания раньше даты начала"
+            )
+        schedule = TrainingScheduleORM(group_id=group_id, coach_id=coach_id, **fields)
+        session.add(schedule)
+        await session.commit()
+        return schedule
+
+    @classmethod
+    async def delete_schedule(cls, session: AsyncSession, schedule_id: UUID, today: datetime.date):
+        # будущие занятия без отметок удаляем, прошедшие остаются в истории без ссылки на расписание
+        await session.execute(cls._unused_trainings_delete(schedule_id, TrainingORM.date >= today))
+        query = (
+            delete(TrainingScheduleORM)
+            .where(TrainingScheduleORM.id == schedule_id)
+        )
+        await session.execute(query)
+        await session.commit()
+
+    @classmethod
+    async def add_schedule_exception(cls, session: AsyncSession, schedule_id: UUID, date: datetime.date):
+        query = (
+            update(TrainingScheduleORM)
+            .where(TrainingScheduleORM.id == schedule_id,
+                   ~TrainingScheduleORM.exceptions.any(date))
+            .values(exceptions=func.array_append(TrainingScheduleORM.exceptions, date))
+        )
+        await session.execute(query)
+        await session.execute(cls._unused_trainings_delete(schedule_id, TrainingORM.date == date))
+        await session.commit()
+
+    @staticmethod
+    def _unused_trainings_delete(schedule_id: UUID, *criteria):
+        return (
+            delete(TrainingORM)
+            .where(TrainingORM.schedule_id == schedule_id,
+                   *criteria,
+                   ~exists().where(AttendanceORM.training_id == TrainingORM.id))
+        )
+
+    @staticmethod
+    def _occurrences(date_from: datetime.date, date_to: datetime.date, *criteria):
+        # даты занятий считает сам Postgres: generate_series с шагом в неделю
+        # от первого подходящего дня недели внутри окна; в Python ничего не разворачивается
+        start = func.greatest(TrainingScheduleORM.date_from, date_from)
+        end = func.least(func.coalesce(TrainingScheduleORM.date_to, date_to), date_to)
+        first = start + (TrainingScheduleORM.weekday - cast(func.date_part("isodow", start), Integer) + 7) % 7
+        day = func.generate_series(
+            cast(first, DateTime), cast(end, DateTime), literal_column("interval '7 days'")
+        ).column_valued("day")
+        occurrence_date = cast(day, Date)
+        query = (
+            select(
+                TrainingScheduleORM.id.label("schedule_id"),
+                TrainingScheduleORM.name,
+                TrainingScheduleORM.group_id,
+                TrainingScheduleORM.coach_id,
+                occurrence_date.label("date"),
+                TrainingScheduleORM.start_time,
+                TrainingScheduleORM.end_time,
+            )
+            .where(*criteria,
+                   TrainingScheduleORM.date_from <= date_to,
+                   or_(TrainingScheduleORM.date_to.is_(None), TrainingScheduleORM.date_to >= date_from),
+                   ~TrainingScheduleORM.exceptions.any(occurrence_date))
+        )
+        return query, occurrence_date
+
+    @classmethod
+    async def materialize_schedule(cls, session: AsyncSession, schedule_id: UUID,
+                                   date_from: datetime.date, date_to: datetime.date) -> int:
+        occurrences, _ = cls._occurrences(date_from, date_to, TrainingScheduleORM.id == schedule_id)
+        occurrences = occurrences.add_columns(func.gen_random_uuid())
+        query = (
+            pg_insert(TrainingORM)
+            .from_select(["schedule_id", "name", "group_id", "coach_id", "date",
+                          "start_time", "end_time", "id"], occurrences)
+            .on_conflict_do_nothing(index_elements=[TrainingORM.schedule_id, TrainingORM.date])
+            .returning(TrainingORM.id)
+        )
+        created = (await session.scalars(query)).all()
+        await session.commit()
+        return len(created)
+
+    @classmethod
+    async def get_group_calendar(cls, session: AsyncSession, group_id: UUID,
+                                 date_from: datetime.date, date_to: datetime.date):
+        # реальные тренировки окна плюс ещё не материализованные занятия расписаний
+        trainings = await cls.get_group_trainings(session, group_id, date_from, date_to)
+        occurrences, occurrence_date = cls._occurrences(
+            date_from, date_to,
+            TrainingScheduleORM.group_id == group_id,
+        )
+        occurrences = occurrences.where(
+            ~exists().where(TrainingORM.schedule_id == TrainingScheduleORM.id,
+                            TrainingORM.date == occurrence_date)
+        )
+        planned = (await session.execute(occurrences)).mappings().all()
+        calendar = [
+            {**{key: getattr(training, key) for key in ("id", "schedule_id", "name", "date",
+                                                        "start_time", "end_time")},
+             "materialized": True}
+            for training in trainings
+        ]
+        calendar += [
+            {"id": None, "schedule_id": row["schedule_id"], "name": row["name"], "date": row["date"],
+             "start_time": row["start_time"], "end_time": row["end_time"], "materialized": False}
+            for row in planned
+        ]
+        calendar.sort(key=lambda item: (item["date"], item["start_time"]))
+        return calendar
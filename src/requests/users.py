@@ -2,10 +2,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, update, desc, func, delete, asc
 from sqlalchemy.orm import selectinload, joinedload
 from src.models.users import UserORM, UserRoleORM, ResetPasswordCodeORM
-from src.security import hash_password, verify_password
+from src.models.students import StudentProfileORM
+from src.requests.leaderboards import LeaderboardRequest
+from src.security import password_hasher
 from fastapi import HTTPException
 from starlette import status
 from src.schemas.base import UserRegisterModel
+from src.utils.response_cache import response_cache
 import datetime
 
 
@@ -20,6 +23,14 @@ class UserRequest:
         )
         return await session.scalar(query)
 
+    @classmethod
+    async def get_user_version(cls, session: AsyncSession, user_id: str):
+        query = (
+            select(UserORM.version)
+            .where(UserORM.id == user_id)
+        )
+        return await session.scalar(query)
+
     @classmethod
     async def get_user_roles(cls, session: AsyncSession, user_id: str):
         query = (
@@ -33,6 +44,14 @@ class UserRequest:
         roles = result_query.scalars().all()
         return roles
 
+    @classmethod
+    async def _student_coach_id(cls, session: AsyncSession, user_id: str):
+        query = (
+            select(StudentProfileORM.coach_id)
+            .where(StudentProfileORM.student_id == user_id)
+        )
+        return await session.scalar(query)
+
     @classmethod
     async def update_user(cls, session: AsyncSession, user_id: str, **fields):
         query = (
@@ -41,7 +60,13 @@ class UserRequest:
             .values(**fields)
         )
         await session.execute(query)
+        if "organization_id" in fields:
+            # организация хранится в строках таблицы лидеров ученика
+            await LeaderboardRequest.refresh_students(session, [user_id])
+        coach_id = await cls._student_coach_id(session, user_id)
         await session.commit()
+        # ФИО и аватар ученика входят в закэшированные списки его тренера
+        await response_cache.invalidate(coach_id)
 
     @classmethod
     async def delete_user(cls, session: AsyncSession, user_id: str):
@@ -49,8 +74,10 @@ class UserRequest:
             delete(UserORM)
             .where(UserORM.id == user_id)
         )
+        coach_id = await cls._student_coach_id(session, user_id)
         await session.execute(query)
         await session.commit()
+        await response_cache.invalidate(coach_id)
 
     @classmethod
     async def is_code_in_db(cls, session: AsyncSession, code: str):
@@ -97,7 +124,7 @@ class UserRequest:
         user_query = (
             update(UserORM)
             .where(UserORM.id == reset_code.user_id)
-            .values(password=hash_password(password))
+            .values(password=await password_hasher.hash(password))
         )
         await session.execute(user_query)
         query = (
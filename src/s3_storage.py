@@ -1,11 +1,23 @@
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, AsyncExitStack
 
+from aiobotocore.config import AioConfig
 from aiobotocore.session import get_session
 from botocore.exceptions import ClientError
-from fastapi import UploadFile
+from fastapi import UploadFile, HTTPException
+import os
 import uuid
 import aiofiles
 
+from src.config import (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY,
+                        S3_BUCKET_NAME, S3_ENDPOINT_URL, S3_REGION_NAME)
+
+
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", 20))
+S3_KEEPALIVE_TIMEOUT = int(os.getenv("S3_KEEPALIVE_TIMEOUT", 60))
+# части multipart-загрузки: S3 требует не меньше 5 МБ для всех частей, кроме последней
+S3_PART_SIZE = max(int(os.getenv("S3_PART_SIZE", 8 * 1024 * 1024)), 5 * 1024 * 1024)
+S3_MAX_UPLOAD_SIZE = int(os.getenv("S3_MAX_UPLOAD_SIZE", 20 * 1024 * 1024))
+
 
 # s3_client = S3Client(
 #     access_key=AWS_ACCESS_KEY_ID,
@@ -26,36 +38,140 @@ class S3Client:
             endpoint_url: str,
             bucket_name: str,
             region_name: str,
+            max_pool_connections: int = S3_MAX_POOL_CONNECTIONS,
+            keepalive_timeout: int = S3_KEEPALIVE_TIMEOUT,
     ):
         self.config = {
             "aws_access_key_id": access_key,
             "aws_secret_access_key": secret_key,
             "endpoint_url": endpoint_url,
             "region_name": region_name,
+            "config": AioConfig(
+                max_pool_connections=max_pool_connections,
+                tcp_keepalive=True,
+                connector_args={"keepalive_timeout": keepalive_timeout},
+            ),
         }
         self.endpoint_url = endpoint_url
         self.bucket_name = bucket_name
         self.session = get_session()
+        self._exit_stack: AsyncExitStack | None = None
+        self._client = None
+
+    async def start(self):
+        # один клиент на всё приложение: общий пул соединений и TLS-сессии
+        if self._client is not None:
+            return
+        self._exit_stack = AsyncExitStack()
+        self._client = await self._exit_stack.enter_async_context(
+            self.session.create_client("s3", **self.config)
+        )
+
+    async def close(self):
+        if self._exit_stack is not None:
+            await self._exit_stack.aclose()
+        self._exit_stack = None
+        self._client = None
 
     @asynccontextmanager
     async def get_client(self):
+        if self._client is not None:
+            yield self._client
+            return
+        # клиент не запущен (например, в скриптах) — открываем временный
         async with self.session.create_client("s3", **self.config) as client:
             yield client
 
 
-    async def upload_file(self, file: UploadFile, filename: str = None) -> str:
-        file_content = await file.read()
+    @staticmethod
+    async def _read_part(file: UploadFile, size: int) -> bytes:
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            data = await file.read(remaining)
+            if not data:
+                break
+            chunks.append(data)
+            remaining -= len(data)
+        return b"".join(chunks)
+
+    @staticmethod
+    def _check_size(size: int, max_size: int):
+        if size > max_size:
+            raise HTTPException(status_code=413, detail="Файл слишком большой")
+
+    async def upload_file(self, file: UploadFile, filename: str = None,
+                          max_size: int = S3_MAX_UPLOAD_SIZE) -> str:
+        # читаем файл частями, в памяти держим не больше одной части
+        if file.size is not None:
+            self._check_size(file.size, max_size)
         object_name = filename or f"{uuid.uuid4()}_{file.filename}"
 
+        part = await self._read_part(file, S3_PART_SIZE)
+        total_size = len(part)
+        self._check_size(total_size, max_size)
+
         try:
             async with self.get_client() as client:
-                await client.put_object(
+                if total_size < S3_PART_SIZE:
+                    await client.put_object(
+                        Bucket=self.bucket_name,
+                        Key=object_name,
+                        Body=part,
+                        ContentType=file.content_type
+                    )
+                    return object_name  # Вернём имя, чтобы, например, сохранить в БД
+
+                upload = await client.create_multipart_upload(
                     Bucket=self.bucket_name,
                     Key=object_name,
-                    Body=file_content,
                     ContentType=file.content_type
                 )
-                return object_name  # Вернём имя, чтобы, например, сохранить в БД
+                upload_id = upload["UploadId"]
+                parts = []
+                try:
+                    while part:
+                        response = await client.upload_part(
+                            Bucket=self.bucket_name,
+                            Key=object_name,
+                            UploadId=upload_id,
+                            PartNumber=len(parts) + 1,
+                            Body=part,
+                        )
+                        parts.append({"PartNumber": len(parts) + 1, "ETag": response["ETag"]})
+                        part = await self._read_part(file, S3_PART_SIZE)
+                        total_size += len(part)
+                        self._check_size(total_size, max_size)
+                    await client.complete_multipart_upload(
+                        Bucket=self.bucket_name,
+                        Key=object_name,
+                        UploadId=upload_id,
+                        MultipartUpload={"Parts": parts},
+                    )
+                except Exception:
+                    await client.abort_multipart_upload(
+                        Bucket=self.bucket_name,
+                        Key=object_name,
+                        UploadId=upload_id,
+                    )
+                    raise
+                return object_name
+        except HTTPException:
+            raise
+        except Exception as e:
+            print(f"Error uploading file: {e}")
+            raise
+
+    async def upload_bytes(self, data: bytes, object_name: str, content_type: str) -> str:
+        try:
+            async with self.get_client() as client:
+                await client.put_object(
+                    Bucket=self.bucket_name,
+                    Key=object_name,
+                    Body=data,
+                    ContentType=content_type
+                )
+                return object_name
         except Exception as e:
             print(f"Error uploading file: {e}")
             raise
@@ -81,3 +197,12 @@ class S3Client:
 
     async def get_file_url(self, object_name: str) -> str:
         return f"{self.endpoint_url}/{self.bucket_name}/{object_name}"
+
+
+s3_client = S3Client(
+    access_key=AWS_ACCESS_KEY_ID,
+    secret_key=AWS_SECRET_ACCESS_KEY,
+    endpoint_url=S3_ENDPOINT_URL,
+    bucket_name=S3_BUCKET_NAME,
+    region_name=S3_REGION_NAME,
+)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 import datetime
 from typing import Optional
 from uuid import UUID
@@ -23,14 +23,26 @@ class Token(BaseModel):
 
 
 class ResulSimpleModel(BaseModel):
-    event_id: UUID
-    student_id: UUID
-    place_id: UUID
-    points_scored: int
-    points_missed: int
-    number_of_fights: int
-    average_score: float
-    efficiency: float
+    id: UUID
+    event_id: Optional[UUID] = None
+    student_id: Optional[UUID] = None
+    place_id: Optional[UUID] = None
+    sport_code: Optional[str] = None
+    age_category_id: Optional[UUID] = None
+    weight_category_id: Optional[UUID] = None
+    visited: Optional[bool] = None
+    # поля дисциплин: заполнены только у своей дисциплины
+    points_scored: Optional[int] = None
+    points_missed: Optional[int] = None
+    number_of_fights: Optional[int] = None
+    number_of_wins: Optional[int] = None
+    number_of_defeats: Optional[int] = None
+    average_score: Optional[float] = None
+    efficiency: Optional[float] = None
+    number_of_rounds: Optional[int] = None
+    total_score: Optional[float] = None
+    best_score: Optional[float] = None
+    team_name: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -45,6 +57,7 @@ class StudentModel(BaseModel):
     date_of_birth: Optional[datetime.date]
     phone_number: Optional[str]
     img_url: str
+    img_variants: Optional[dict[str, str]] = None
 
     class Config:
         from_attributes = True
@@ -63,4 +76,13 @@ class TypeEventModel(BaseModel):
     name: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class StudentIdsModel(BaseModel):
+    student_ids: list[UUID] = Field(min_length=1, max_length=500)
+
+
+class StudentOutcomeModel(BaseModel):
+    student_id: UUID
+    status: str
@@ -0,0 +1,19 @@
+from pydantic import BaseModel
+from typing import Optional
+from uuid import UUID
+
+
+class LeaderboardEntryModel(BaseModel):
+    rank: int
+    student_id: UUID
+    first_name: str
+    last_name: str
+    img_url: str
+    competitions: int
+    fights: int
+    wins: int
+    medals: int
+    efficiency: Optional[float]
+
+    class Config:
+        from_attributes = True
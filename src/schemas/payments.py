@@ -0,0 +1,29 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+from decimal import Decimal
+import datetime
+from uuid import UUID
+
+
+class PaymentModel(BaseModel):
+    id: UUID
+    student_id: Optional[UUID] = None
+    amount: Decimal
+    status: str
+    description: str
+    created_at: datetime.datetime
+    email: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class AddPaymentModel(BaseModel):
+    amount: Decimal = Field(gt=0, max_digits=10, decimal_places=2)
+    description: str = Field(min_length=1, max_length=255)
+    return_url: Optional[str] = None
+
+
+class PaymentLinkModel(BaseModel):
+    payment: PaymentModel
+    confirmation_url: Optional[str] = None
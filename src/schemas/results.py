@@ -1,5 +1,6 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator, Discriminator, Tag
+from typing import Optional, Literal, Union, Annotated
+from decimal import Decimal
 import datetime
 from src.schemas.base import StudentModel
 from src.schemas.students import StudentProfileModel
@@ -14,26 +15,72 @@ class PlaceModel(BaseModel):
         from_attributes = True
 
 
-class AddResultModel(BaseModel):
+class AddResultBaseModel(BaseModel):
     event_id: UUID
     student_id: UUID
     place_id: UUID
-    points_scored: int
-    points_missed: int
-    number_of_fights: int
+    age_category_id: UUID
+    weight_category_id: Optional[UUID] = None
+    visited: bool = True
+
+
+class AddKumiteResultModel(AddResultBaseModel):
+    sport_code: Literal["karate-kumite"] = "karate-kumite"
+    points_scored: int = Field(ge=0)
+    points_missed: int = Field(ge=0)
+    number_of_fights: int = Field(ge=1)
+    number_of_wins: int = Field(0, ge=0)
+    number_of_defeats: int = Field(0, ge=0)
+
+
+class AddKataResultModel(AddResultBaseModel):
+    sport_code: Literal["karate-kata"]
+    number_of_rounds: int = Field(ge=1)
+    total_score: Decimal = Field(ge=0, max_digits=6, decimal_places=2)
+    best_score: Decimal = Field(ge=0, max_digits=5, decimal_places=2)
+
+
+class AddTeamResultModel(AddResultBaseModel):
+    sport_code: Literal["karate-team"]
+    team_name: str = Field(max_length=100)
+    number_of_fights: int = Field(ge=1)
+    number_of_wins: int = Field(0, ge=0)
+    number_of_defeats: int = Field(0, ge=0)
+
+
+def _result_discipline(value):
+    # без sport_code — кумите, как до появления остальных дисциплин
+    code = value.get("sport_code") if isinstance(value, dict) else getattr(value, "sport_code", None)
+    return code or "karate-kumite"
 
-    class Config:
-        from_attributes = True
 
+AddResultModel = Annotated[
+    Union[
+        Annotated[AddKumiteResultModel, Tag("karate-kumite")],
+        Annotated[AddKataResultModel, Tag("karate-kata")],
+        Annotated[AddTeamResultModel, Tag("karate-team")],
+    ],
+    Discriminator(_result_discipline),
+]
 
 
 class EditResultModel(BaseModel):
     event_id: Optional[UUID] = None
     student_id: Optional[UUID] = None
     place_id: Optional[UUID] = None
-    points_scored: Optional[int] = None
-    points_missed: Optional[int] = None
-    number_of_fights: Optional[int] = None
+    age_category_id: Optional[UUID] = None
+    weight_category_id: Optional[UUID] = None
+    visited: Optional[bool] = None
+    # поля дисциплин: принимаются только те, что есть у дисциплины результата
+    points_scored: Optional[int] = Field(None, ge=0)
+    points_missed: Optional[int] = Field(None, ge=0)
+    number_of_fights: Optional[int] = Field(None, ge=1)
+    number_of_wins: Optional[int] = Field(None, ge=0)
+    number_of_defeats: Optional[int] = Field(None, ge=0)
+    number_of_rounds: Optional[int] = Field(None, ge=1)
+    total_score: Optional[Decimal] = Field(None, ge=0, max_digits=6, decimal_places=2)
+    best_score: Optional[Decimal] = Field(None, ge=0, max_digits=5, decimal_places=2)
+    team_name: Optional[str] = Field(None, max_length=100)
 
     class Config:
         from_attributes = True
@@ -42,13 +89,19 @@ class EditResultModel(BaseModel):
 class ResultModel(BaseModel):
     id: UUID
     event_id: UUID
+    sport_code: Optional[str] = None
     student: Optional[StudentProfileModel]
     place: Optional[PlaceModel]
-    points_scored: int
-    points_missed: int
-    number_of_fights: int
-    average_score: float
-    efficiency: float
+    points_scored: Optional[int] = None
+    points_missed: Optional[int] = None
+    number_of_fights: Optional[int] = None
+    number_of_wins: Optional[int] = None
+    average_score: Optional[float] = None
+    efficiency: Optional[float] = None
+    number_of_rounds: Optional[int] = None
+    total_score: Optional[float] = None
+    best_score: Optional[float] = None
+    team_name: Optional[str] = None
 
     class Config:
         from_attributes = True
@@ -64,3 +117,36 @@ class EventWithResultModel(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ImportResultRowModel(BaseModel):
+    student_id: UUID
+    place: str  # id или название места
+    age_category_id: UUID
+    weight_category_id: Optional[UUID] = None
+    number_of_fights: int = Field(ge=1)
+    number_of_wins: int = Field(ge=0)
+    number_of_defeats: int = Field(ge=0)
+    points_scored: int = Field(ge=0)
+    points_missed: int = Field(ge=0)
+    visited: bool = True
+
+    @model_validator(mode="after")
+    def check_fights(self):
+        if self.number_of_wins + self.number_of_defeats > self.number_of_fights:
+            raise ValueError("Побед и поражений больше, чем боёв")
+        return self
+
+
+class ImportRowReportModel(BaseModel):
+    row: int
+    status: str  # created, duplicate, error
+    result_id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+
+class ImportReportModel(BaseModel):
+    created: int
+    duplicates: int
+    errors: int
+    rows: list[ImportRowReportModel]
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 import datetime
 from typing import Optional
 from src.schemas.base import StudentModel
@@ -39,4 +39,53 @@ class StudentResultModel(BaseModel):
     efficiency: float
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class StatisticsTotalsModel(BaseModel):
+    competitions: int
+    fights: int
+    wins: int
+    defeats: int
+    points_scored: int
+    points_missed: int
+    efficiency: Optional[float]
+    win_rate: Optional[float]
+
+
+class SeasonStatisticsModel(StatisticsTotalsModel):
+    season: int
+    efficiency_change: Optional[float]
+
+
+class PlaceCountModel(BaseModel):
+    place_id: UUID
+    name: str
+    count: int
+
+
+class StudentStatisticsModel(BaseModel):
+    career: StatisticsTotalsModel
+    seasons: list[SeasonStatisticsModel]
+    places: list[PlaceCountModel]
+
+
+class RosterRowModel(BaseModel):
+    first_name: str = Field(min_length=1, max_length=30)
+    patronymic: Optional[str] = Field(None, max_length=30)
+    last_name: str = Field(min_length=1, max_length=64)
+    date_of_birth: datetime.date
+    email: Optional[EmailStr] = None
+    phone_number: Optional[str] = Field(None, max_length=20)
+
+
+class ImportJobModel(BaseModel):
+    id: str
+    status: str  # pending, running, done, failed
+    total: int
+    processed: int
+    detail: Optional[str] = None
+    created: int = 0
+    duplicates: int = 0
+    errors: int = 0
+    rows: list[dict] = []
@@ -0,0 +1,102 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+import datetime
+from uuid import UUID
+
+
+class AttendanceStatusModel(BaseModel):
+    id: UUID
+    name: str
+
+    class Config:
+        from_attributes = True
+
+
+class TrainingModel(BaseModel):
+    id: UUID
+    name: str
+    group_id: UUID
+    coach_id: Optional[UUID] = None
+    schedule_id: Optional[UUID] = None
+    date: datetime.date
+    start_time: datetime.time
+    end_time: datetime.time
+
+    class Config:
+        from_attributes = True
+
+
+class AddTrainingModel(BaseModel):
+    name: str
+    date: datetime.date
+    start_time: datetime.time
+    end_time: datetime.time
+
+
+class EditTrainingModel(BaseModel):
+    name: Optional[str] = None
+    date: Optional[datetime.date] = None
+    start_time: Optional[datetime.time] = None
+    end_time: Optional[datetime.time] = None
+
+
+class TrainingScheduleModel(BaseModel):
+    id: UUID
+    name: str
+    group_id: UUID
+    weekday: int
+    start_time: datetime.time
+    end_time: datetime.time
+    date_from: datetime.date
+    date_to: Optional[datetime.date] = None
+    exceptions: list[datetime.date]
+
+    class Config:
+        from_attributes = True
+
+
+class AddTrainingScheduleModel(BaseModel):
+    name: str
+    weekday: int = Field(ge=1, le=7)  # ISO: 1 — понедельник, 7 — воскресенье
+    start_time: datetime.time
+    end_time: datetime.time
+    date_from: datetime.date
+    date_to: Optional[datetime.date] = None
+
+
+class ScheduleExceptionModel(BaseModel):
+    date: datetime.date
+
+
+class CalendarItemModel(BaseModel):
+    id: Optional[UUID] = None  # None — занятие расписания, ещё не созданное в trainings
+    schedule_id: Optional[UUID] = None
+    name: str
+    date: datetime.date
+    start_time: datetime.time
+    end_time: datetime.time
+    materialized: bool
+
+
+class AttendanceMarkModel(BaseModel):
+    student_id: UUID
+    status_id: UUID
+
+
+class MarkAttendanceModel(BaseModel):
+    # default_status_id проставляется всем ученикам группы, которых нет в marks
+    default_status_id: Optional[UUID] = None
+    marks: list[AttendanceMarkModel] = []
+
+
+class AttendanceRowModel(BaseModel):
+    student_id: UUID
+    last_name: str
+    first_name: str
+    patronymic: Optional[str] = None
+    attendance: dict[UUID, Optional[UUID]]  # id тренировки -> id статуса
+
+
+class AttendanceMatrixModel(BaseModel):
+    trainings: list[TrainingModel]
+    students: list[AttendanceRowModel]
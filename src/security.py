@@ -1,9 +1,16 @@
 from passlib.context import CryptContext
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import datetime
-from authlib.jose import jwt
+import hashlib
+import os
+import time
+from authlib.jose import JsonWebToken, OctKey
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi import HTTPException, Depends
 from src.config import SECURITY_ALGORITHM, SECURITY_SECRET_KEY
+from src.utils.metrics import Counter, Histogram
+from src.utils.cache import TTLCache
 import string
 import secrets
 import random
@@ -17,6 +24,79 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", 4))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", 64))
+
+
+class PasswordHasher:
+    # bcrypt отпускает GIL, поэтому хватает пула потоков; очередь ограничена,
+    # при переполнении сразу отвечаем 503, а не копим запросы
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor: ThreadPoolExecutor | None = None
+        self._in_flight = 0
+
+        self.hash_time = Histogram()
+        self.verify_time = Histogram()
+        self.queue_wait = Histogram()
+        self.rejected = Counter()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                thread_name_prefix="password-hasher")
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self, metric: Histogram, func, *args):
+        if self._in_flight >= self.workers + self.max_queue:
+            self.rejected.inc()
+            raise HTTPException(status_code=503, detail="Сервер перегружен, попробуйте позже")
+
+        enqueued_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            self.queue_wait.observe(started_at - enqueued_at)
+            try:
+                return func(*args)
+            finally:
+                metric.observe(time.perf_counter() - started_at)
+
+        self._in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, job)
+        finally:
+            self._in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.hash_time, hash_password, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(self.verify_time, verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": self._in_flight,
+            "rejected": self.rejected.value,
+            "queue_wait": self.queue_wait.snapshot(),
+            "hash_time": self.hash_time.snapshot(),
+            "verify_time": self.verify_time.snapshot(),
+        }
+
+
+password_hasher = PasswordHasher(workers=HASH_WORKERS, max_queue=HASH_MAX_QUEUE)
+
+
 def generate_password(length: int = 12) -> str:
     characters = string.ascii_letters + string.digits + string.punctuation
     return ''.join(secrets.choice(characters) for _ in range(length))
@@ -26,6 +106,55 @@ def generate_reset_code(length: int = 6) -> str:
     return ''.join(str(random.randint(0, 9)) for _ in range(length))
 
 
+JWT_BACKEND = os.getenv("JWT_BACKEND", "authlib")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", 10000))
+
+
+class AuthlibJWTBackend:
+    def __init__(self, algorithm: str, secret_key: str):
+        self.algorithm = algorithm
+        self.jwt = JsonWebToken([algorithm])
+        self.key = OctKey.import_key(secret_key)  # ключ разбираем один раз, а не на каждый запрос
+
+    def encode(self, payload: dict) -> str:
+        return self.jwt.encode({"alg": self.algorithm}, payload, self.key).decode("utf-8")
+
+    def decode(self, token: str) -> dict:
+        claims = self.jwt.decode(token, self.key)
+        claims.validate()  # проверяет срок жизни
+        return claims
+
+
+class PyJWTBackend:
+    def __init__(self, algorithm: str, secret_key: str):
+        import jwt as pyjwt  # PyJWT из requirements.txt; импортируется, только если выбран этот бэкенд
+
+        self.pyjwt = pyjwt
+        self.algorithm = algorithm
+        self.key = secret_key
+
+    def encode(self, payload: dict) -> str:
+        return self.pyjwt.encode(payload, self.key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        return self.pyjwt.decode(token, self.key, algorithms=[self.algorithm],
+                                 options={"require": ["exp", "sub"]})
+
+
+JWT_BACKENDS = {
+    "authlib": AuthlibJWTBackend,
+    "pyjwt": PyJWTBackend,
+}
+
+if JWT_BACKEND not in JWT_BACKENDS:
+    raise ValueError(f"Неизвестный JWT_BACKEND: {JWT_BACKEND}, допустимы: {', '.join(JWT_BACKENDS)}")
+
+jwt_backend = JWT_BACKENDS[JWT_BACKEND](SECURITY_ALGORITHM, SECURITY_SECRET_KEY)
+
+# проверенные токены: sha256(токен) -> id пользователя, запись живёт до exp токена
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE)
+
+
 def create_access_token(data: dict, expires_delta: datetime.timedelta = datetime.timedelta(hours=5)):
     now = datetime.datetime.now(datetime.UTC)
     payload = {
@@ -33,7 +162,7 @@ def create_access_token(data: dict, expires_delta: datetime.timedelta = datetime
         "iat": now,
         "sub": data["sub"],
     }
-    return jwt.encode({"alg": SECURITY_ALGORITHM}, payload, SECURITY_SECRET_KEY).decode("utf-8")
+    return jwt_backend.encode(payload)
 
 
 security = HTTPBearer()
@@ -41,13 +170,21 @@ security = HTTPBearer()
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     token = credentials.credentials
+    cache_key = hashlib.sha256(token.encode()).digest()
+    user_id = token_cache.get(cache_key)
+    if user_id is not None:
+        return user_id
     try:
-        claims = jwt.decode(token, SECURITY_SECRET_KEY)
-        claims.validate()  # проверяет срок жизни
-        return claims["sub"]
+        claims = jwt_backend.decode(token)
+        user_id = claims["sub"]
+        # токен без срока жизни не принимаем: оба бэкенда выдают exp всегда
+        ttl = claims["exp"] - time.time()
     except Exception as e:
         print('Ошибка ', e)
         raise HTTPException( status_code=401, detail="Недействительный токен")
+    if ttl > 0:
+        token_cache.set(cache_key, user_id, ttl=ttl)
+    return user_id
 
 
 
@@ -0,0 +1,22 @@
+from functools import lru_cache
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+@lru_cache(maxsize=None)
+def get_adapter(response_model) -> TypeAdapter:
+    # схема и сериализатор строятся один раз на тип, а не на каждый запрос
+    return TypeAdapter(response_model)
+
+
+def dump_json(response_model, data) -> bytes:
+    # одна валидация прямо из ORM-объектов или словарей и сразу bytes из pydantic_core —
+    # без model_validate по элементам, повторной проверки по response_model и jsonable_encoder
+    adapter = get_adapter(response_model)
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+def fast_json_response(response_model, data, headers=None) -> Response:
+    # response_model в декораторе остаётся для схемы OpenAPI; готовый Response FastAPI не перепроверяет
+    return Response(content=dump_json(response_model, data), media_type="application/json", headers=headers)
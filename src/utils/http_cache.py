@@ -0,0 +1,29 @@
+import hashlib
+
+from fastapi import Request, Response
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag in tags
+
+
+def version_etag(*parts) -> str:
+    # ETag из отпечатка версий строк и всего, от чего ещё зависит ответ (эндпоинт, параметры)
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def conditional_response(request: Request, response: Response, etag: str,
+                         cache_control: str = "private, no-cache") -> Response | None:
+    # 304 без тела, если у клиента та же версия; иначе проставляем заголовки для основного ответа
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
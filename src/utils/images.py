@@ -0,0 +1,110 @@
+import asyncio
+import io
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import aiofiles.tempfile
+from fastapi import HTTPException, UploadFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.s3_storage import s3_client
+
+
+# размеры сторон (px) вариантов аватара; самый большой сохраняется в img_url
+AVATAR_SIZES = tuple(sorted(
+    (int(size) for size in os.getenv("AVATAR_SIZES", "1024,256,64").split(",")),
+    reverse=True,
+))
+AVATAR_FORMAT = os.getenv("AVATAR_FORMAT", "WEBP")
+AVATAR_QUALITY = int(os.getenv("AVATAR_QUALITY", 80))
+AVATAR_MAX_SIZE = int(os.getenv("AVATAR_MAX_SIZE", 10 * 1024 * 1024))
+AVATAR_MAX_PIXELS = int(os.getenv("AVATAR_MAX_PIXELS", 40_000_000))
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", 2))
+AVATAR_READ_CHUNK = 1024 * 1024
+
+CONTENT_TYPES = {
+    "WEBP": "image/webp",
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+}
+
+
+def process_avatar(path: str, sizes: tuple[int, ...], image_format: str, quality: int) -> dict[int, bytes]:
+    # выполняется в отдельном процессе: декодирование, поворот по EXIF,
+    # уменьшение и перекодирование; метаданные при сохранении не переносятся
+    Image.MAX_IMAGE_PIXELS = AVATAR_MAX_PIXELS
+    with Image.open(path) as source:
+        # размеры известны из заголовка — «бомбу» отклоняем до декодирования пикселей
+        # (сам Pillow падает только на удвоенном MAX_IMAGE_PIXELS)
+        if source.width * source.height > AVATAR_MAX_PIXELS:
+            raise Image.DecompressionBombError("Слишком большое разрешение")
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        if image_format == "JPEG":
+            image = image.convert("RGB")
+
+    variants = {}
+    for size in sizes:
+        variant = image.copy()
+        variant.thumbnail((size, size), Image.Resampling.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, format=image_format, quality=quality, optimize=True)
+        variants[size] = buffer.getvalue()
+    return variants
+
+
+class ImageProcessor:
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def process_avatar(self, path: str) -> dict[int, bytes]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, process_avatar,
+                                              path, AVATAR_SIZES, AVATAR_FORMAT, AVATAR_QUALITY)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, ValueError):
+            raise HTTPException(status_code=400, detail="Некорректное изображение")
+
+
+image_processor = ImageProcessor(workers=IMAGE_WORKERS)
+
+
+async def upload_avatar(file: UploadFile) -> tuple[str, dict[str, str]]:
+    if file.size is not None and file.size > AVATAR_MAX_SIZE:
+        raise HTTPException(status_code=413, detail="Файл слишком большой")
+    # исходник копируется на диск кусками: в памяти процесса не больше одного куска,
+    # воркер читает файл по пути сам
+    async with aiofiles.tempfile.NamedTemporaryFile("wb", suffix=".upload") as spool:
+        size = 0
+        while chunk := await file.read(AVATAR_READ_CHUNK):
+            size += len(chunk)
+            if size > AVATAR_MAX_SIZE:
+                raise HTTPException(status_code=413, detail="Файл слишком большой")
+            await spool.write(chunk)
+        await spool.flush()
+        variants = await image_processor.process_avatar(spool.name)
+
+    avatar_id = uuid.uuid4()
+    extension = AVATAR_FORMAT.lower()
+    content_type = CONTENT_TYPES.get(AVATAR_FORMAT, "application/octet-stream")
+    names = {size: f"avatars/{avatar_id}/{size}.{extension}" for size in variants}
+    await asyncio.gather(*(
+        s3_client.upload_bytes(content, names[size], content_type)
+        for size, content in variants.items()
+    ))
+
+    urls = {str(size): await s3_client.get_file_url(names[size]) for size in variants}
+    return urls[str(AVATAR_SIZES[0])], urls
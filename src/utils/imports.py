@@ -0,0 +1,188 @@
+import codecs
+import collections
+import csv
+import io
+import json
+import os
+
+from fastapi import HTTPException, Request
+
+
+IMPORT_MAX_SIZE = int(os.getenv("IMPORT_MAX_SIZE", 5 * 1024 * 1024))
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", 1000))
+
+
+async def _iter_lines(request: Request):
+    # тело читается по мере поступления, строки отдаются сразу, не дожидаясь конца файла
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    size = 0
+    tail = ""
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > IMPORT_MAX_SIZE:
+            raise HTTPException(status_code=413, detail="Файл слишком большой")
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+class _NeedMore(Exception):
+    pass
+
+
+class _LineFeed:
+    # вход единственного csv.reader: строки тела по мере поступления. Если прочитанное кончилось
+    # посреди записи (поле в кавычках с переносом строки), reader прерывается _NeedMore, а строки
+    # этой записи возвращаются в очередь — когда придут следующие, запись разбирается заново
+    def __init__(self):
+        self.lines = collections.deque()
+        self.record = []
+        self.closed = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self.lines:
+            if self.closed:
+                raise StopIteration
+            self.lines.extendleft(reversed(self.record))
+            self.record = []
+            raise _NeedMore
+        line = self.lines.popleft()
+        self.record.append(line)
+        return line
+
+
+def _read_records(reader, feed: _LineFeed) -> list:
+    # все записи, которые уже целиком прочитаны; None — запись, которую не удалось разобрать
+    records = []
+    while True:
+        try:
+            records.append(next(reader))
+        except (_NeedMore, StopIteration):
+            return records
+        except csv.Error:
+            records.append(None)
+        feed.record = []
+
+
+async def _iter_csv(request: Request):
+    feed = _LineFeed()
+    reader = None
+    header = None
+
+    def rows():
+        nonlocal header
+        for values in _read_records(reader, feed):
+            if values is not None and not any(value.strip() for value in values):
+                continue
+            if header is None:
+                if values is None:
+                    raise HTTPException(status_code=400, detail="Некорректный заголовок CSV")
+                header = [value.strip() for value in values]
+            elif values is None:
+                yield None  # строка попадёт в отчёт как ошибка разбора
+            else:
+                yield {key: (value.strip() or None) for key, value in zip(header, values)}
+
+    async for line in _iter_lines(request):
+        if reader is None:
+            if not line.strip():
+                continue
+            # Excel в русской локали сохраняет CSV через ";"
+            delimiter = ";" if line.count(";") > line.count(",") else ","
+            # strict: незакрытая кавычка в конце файла — ошибка строки, а не молча склеенный остаток
+            reader = csv.reader(feed, delimiter=delimiter, strict=True)
+        feed.lines.append(line + "\n")
+        for row in rows():
+            yield row
+    if reader is not None:
+        feed.closed = True
+        for row in rows():
+            yield row
+
+
+async def _iter_ndjson(request: Request):
+    async for line in _iter_lines(request):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None  # строка попадёт в отчёт как ошибка разбора
+
+
+async def _iter_json_array(request: Request):
+    body = bytearray()
+    async for chunk in request.stream():
+        if len(body) + len(chunk) > IMPORT_MAX_SIZE:
+            raise HTTPException(status_code=413, detail="Файл слишком большой")
+        body += chunk
+    try:
+        rows = json.loads(body)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Некорректный JSON")
+    if not isinstance(rows, list):
+        raise HTTPException(status_code=400, detail="Ожидается JSON-массив")
+    for row in rows:
+        yield row
+
+
+async def iter_import_rows(request: Request):
+    # строки импорта по Content-Type: text/csv, application/x-ndjson или application/json;
+    # нумерация строк с 1, номер идёт в отчёт
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in ("text/csv", "application/csv"):
+        rows = _iter_csv(request)
+    elif content_type in ("application/x-ndjson", "application/jsonl"):
+        rows = _iter_ndjson(request)
+    elif content_type == "application/json":
+        rows = _iter_json_array(request)
+    else:
+        raise HTTPException(status_code=415, detail="Поддерживаются CSV, JSON и NDJSON")
+
+    number = 0
+    async for row in rows:
+        number += 1
+        if number > IMPORT_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"Не больше {IMPORT_MAX_ROWS} строк за один импорт")
+        yield number, row
+
+
+def format_validation_error(error) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+
+def parse_table_file(data: bytes, filename: str) -> list[dict]:
+    # синхронный разбор CSV/XLSX целиком — вызывать в пуле потоков, не в event loop
+    if filename.lower().endswith(".xlsx"):
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(io.BytesIO(data), read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+            table = [
+                {key: value for key, value in zip(header, values) if key and value not in (None, "")}
+                for values in rows
+                if any(value not in (None, "") for value in values)
+            ]
+        finally:
+            workbook.close()
+    else:
+        text = data.decode("utf-8-sig")
+        first_line = text.split("\n", 1)[0]
+        delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+        table = [
+            {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+            for row in csv.DictReader(io.StringIO(text), delimiter=delimiter)
+        ]
+    if len(table) > IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"Не больше {IMPORT_MAX_ROWS} строк за один импорт")
+    return table
@@ -0,0 +1,54 @@
+import asyncio
+import logging
+import os
+import uuid
+
+from src.utils.cache import TTLCache
+
+
+logger = logging.getLogger(__name__)
+
+
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", 3600))
+
+
+class JobRegistry:
+    # фоновые задачи процесса (импорт и т.п.) и их прогресс; результат хранится JOB_RESULT_TTL секунд
+    def __init__(self, ttl: float):
+        self._jobs = TTLCache(maxsize=1000, ttl=ttl)
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self, owner_id: str, coroutine_factory) -> str:
+        job_id = str(uuid.uuid4())
+        job = {"id": job_id, "owner_id": owner_id, "status": "pending",
+               "total": 0, "processed": 0, "detail": None}
+        self._jobs.set(job_id, job)
+
+        async def run():
+            job["status"] = "running"
+            try:
+                await coroutine_factory(job)
+                job["status"] = "done"
+            except Exception as e:
+                logger.exception("Фоновая задача %s завершилась с ошибкой", job_id)
+                job["status"] = "failed"
+                job["detail"] = str(getattr(e, "detail", e))
+
+        task = asyncio.create_task(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    def get(self, job_id: str, owner_id: str) -> dict | None:
+        job = self._jobs.get(job_id)
+        if job is None or job["owner_id"] != owner_id:
+            return None
+        return job
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+job_registry = JobRegistry(ttl=JOB_RESULT_TTL)
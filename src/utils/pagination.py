@@ -0,0 +1,19 @@
+import base64
+import datetime
+import uuid
+
+from fastapi import HTTPException
+
+
+def encode_cursor(date: datetime.date, entity_id: uuid.UUID) -> str:
+    raw = f"{date.isoformat()}|{entity_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.date, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        date, entity_id = raw.split("|")
+        return datetime.date.fromisoformat(date), uuid.UUID(entity_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
@@ -0,0 +1,183 @@
+import abc
+import asyncio
+import logging
+import os
+import uuid
+from decimal import Decimal
+
+import aiohttp
+from fastapi import HTTPException
+
+
+logger = logging.getLogger(__name__)
+
+
+YOOKASSA_API_URL = os.getenv("YOOKASSA_API_URL", "https://api.yookassa.ru/v3")
+PAYMENT_HTTP_TIMEOUT = float(os.getenv("PAYMENT_HTTP_TIMEOUT", 10))
+PAYMENT_PROVIDER_CONCURRENCY = int(os.getenv("PAYMENT_PROVIDER_CONCURRENCY", 10))
+PAYMENTS_FAKE_ENABLED = os.getenv("PAYMENTS_FAKE_ENABLED", "0").lower() in ("1", "true", "yes")
+
+# итоговые статусы больше не меняются: повторные уведомления по ним ничего не делают
+FINAL_STATUSES = ("succeeded", "failed")
+
+
+class PaymentProvider(abc.ABC):
+    # общий интерфейс платёжного провайдера; статусы приводятся к pending/succeeded/failed
+    name = ""
+
+    def __init__(self, account_id: str | None, secret_key: str | None):
+        self.account_id = account_id
+        self.secret_key = secret_key
+
+    @abc.abstractmethod
+    async def create_payment(self, payment_id: uuid.UUID, amount: Decimal, description: str,
+                             email: str | None, return_url: str | None, metadata: dict,
+                             tax_system_code: int | None = None) -> dict:
+        ...
+
+    @abc.abstractmethod
+    async def get_payment(self, external_id: str) -> dict | None:
+        ...
+
+    async def get_payments(self, external_ids: list[str]) -> dict[str, dict]:
+        semaphore = asyncio.Semaphore(PAYMENT_PROVIDER_CONCURRENCY)
+
+        async def fetch(external_id):
+            async with semaphore:
+                try:
+                    return external_id, await self.get_payment(external_id)
+                except Exception as e:
+                    logger.warning("Не удалось получить платёж %s: %s", external_id, e)
+                    return external_id, None
+
+        pairs = await asyncio.gather(*(fetch(external_id) for external_id in external_ids))
+        return {external_id: payment for external_id, payment in pairs if payment is not None}
+
+    def parse_webhook(self, payload: dict) -> str:
+        # из уведомления берём только id: данным уведомления не доверяем, статус перечитываем у провайдера
+        try:
+            return str(payload["object"]["id"])
+        except (KeyError, TypeError):
+            raise HTTPException(status_code=400, detail="Некорректное уведомление")
+
+
+class YooKassaProvider(PaymentProvider):
+    name = "yookassa"
+    STATUSES = {
+        "pending": "pending",
+        "waiting_for_capture": "pending",
+        "succeeded": "succeeded",
+        "canceled": "failed",
+    }
+
+    _http: aiohttp.ClientSession | None = None
+
+    @classmethod
+    def _get_http(cls) -> aiohttp.ClientSession:
+        # одна сессия (и пул соединений) на процесс для всех организаций
+        if cls._http is None or cls._http.closed:
+            cls._http = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=PAYMENT_HTTP_TIMEOUT)
+            )
+        return cls._http
+
+    @classmethod
+    async def close(cls):
+        if cls._http is not None:
+            await cls._http.close()
+            cls._http = None
+
+    def _normalize(self, data: dict) -> dict:
+        return {
+            "id": data["id"],
+            "status": self.STATUSES.get(data["status"], "pending"),
+            "amount": Decimal(data["amount"]["value"]),
+            "description": data.get("description") or "",
+            "metadata": data.get("metadata") or {},
+            "confirmation_url": (data.get("confirmation") or {}).get("confirmation_url"),
+        }
+
+    async def _request(self, method: str, path: str, **kwargs) -> dict | None:
+        auth = aiohttp.BasicAuth(self.account_id, self.secret_key)
+        async with self._get_http().request(method, f"{YOOKASSA_API_URL}{path}", auth=auth, **kwargs) as response:
+            if response.status == 404:
+                return None
+            if response.status >= 400:
+                logger.error("Ошибка ЮKassa %s: %s", response.status, await response.text())
+                raise HTTPException(status_code=502, detail="Платёжный сервис недоступен")
+            return await response.json()
+
+    async def create_payment(self, payment_id, amount, description, email, return_url, metadata,
+                             tax_system_code=None):
+        value = {"value": f"{amount:.2f}", "currency": "RUB"}
+        body = {
+            "amount": value,
+            "capture": True,
+            "description": description,
+            "metadata": metadata,
+            "confirmation": {"type": "redirect", "return_url": return_url or "https://karate-coaching.ru"},
+        }
+        if email:
+            body["receipt"] = {
+                "customer": {"email": email},
+                "items": [{"description": description[:128], "quantity": "1.00",
+                           "amount": value, "vat_code": 1}],
+            }
+            if tax_system_code is not None:
+                body["receipt"]["tax_system_code"] = tax_system_code
+        # наш id платежа — ключ идемпотентности: повтор запроса не создаст второй платёж
+        data = await self._request("POST", "/payments", json=body,
+                                   headers={"Idempotence-Key": str(payment_id)})
+        return self._normalize(data)
+
+    async def get_payment(self, external_id):
+        data = await self._request("GET", f"/payments/{external_id}")
+        return self._normalize(data) if data is not None else None
+
+
+class FakePaymentProvider(PaymentProvider):
+    # локальный провайдер для разработки и тестов: платежи живут в памяти процесса
+    name = "fake"
+    _payments: dict[str, dict] = {}
+
+    async def create_payment(self, payment_id, amount, description, email, return_url, metadata,
+                             tax_system_code=None):
+        external_id = f"fake-{payment_id}"
+        payment = self._payments.setdefault(external_id, {
+            "id": external_id,
+            "status": "pending",
+            "amount": amount,
+            "description": description,
+            "metadata": metadata,
+            "confirmation_url": f"{return_url or 'http://localhost'}?fake_payment={external_id}",
+        })
+        return dict(payment)
+
+    async def get_payment(self, external_id):
+        payment = self._payments.get(external_id)
+        return dict(payment) if payment is not None else None
+
+    @classmethod
+    def set_status(cls, external_id: str, status: str) -> dict:
+        payment = cls._payments[external_id]
+        payment["status"] = status
+        # тело уведомления в формате ЮKassa — его можно отправить на вебхук как есть
+        return {"type": "notification", "event": f"payment.{status}", "object": {"id": external_id}}
+
+
+PAYMENT_PROVIDERS = {
+    YooKassaProvider.name: YooKassaProvider,
+}
+if PAYMENTS_FAKE_ENABLED:
+    PAYMENT_PROVIDERS[FakePaymentProvider.name] = FakePaymentProvider
+
+
+def get_payment_provider(organization) -> PaymentProvider:
+    provider_class = PAYMENT_PROVIDERS.get(organization.payment_provider or "")
+    if provider_class is None:
+        raise HTTPException(status_code=400, detail="Организация не подключила приём платежей")
+    return provider_class(organization.payment_account_id, organization.payment_secret_key)
+
+
+async def close_payment_providers():
+    await YooKassaProvider.close()
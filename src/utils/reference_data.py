@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import logging
+import os
+import time
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.categories import GenderORM, SportTypeORM
+from src.models.events import EventTypeORM
+from src.models.groups import AttendanceStatusORM
+from src.models.results import PlaceORM
+from src.models.students import SportLevelORM
+from src.models.users import RoleORM
+
+
+logger = logging.getLogger(__name__)
+
+
+REFERENCE_DATA_TTL = float(os.getenv("REFERENCE_DATA_TTL", 3600))
+
+REFERENCE_TABLES = {
+    "places": PlaceORM,
+    "event_types": EventTypeORM,
+    "roles": RoleORM,
+    "genders": GenderORM,
+    "sport_types": SportTypeORM,
+    "sport_levels": SportLevelORM,
+    "attendance_statuses": AttendanceStatusORM,
+}
+
+
+class ReferenceSnapshot:
+    def __init__(self, rows: list[dict]):
+        self.rows = rows
+        self.by_id = {row["id"]: row for row in rows}
+        self.by_code = {row["code"]: row for row in rows if row.get("code") is not None}
+        digest = hashlib.sha1(repr([sorted(row.items()) for row in rows]).encode()).hexdigest()
+        self.etag = f'"{digest}"'
+        self.loaded_at = time.monotonic()
+
+
+class ReferenceDataCache:
+    # справочники почти не меняются: держим их в памяти процесса,
+    # перечитываем по TTL или после явной инвалидации
+    def __init__(self, tables: dict, ttl: float):
+        self.tables = tables
+        self.ttl = ttl
+        self._snapshots: dict[str, ReferenceSnapshot] = {}
+        self._lock = asyncio.Lock()
+
+    def _is_fresh(self, name: str) -> bool:
+        snapshot = self._snapshots.get(name)
+        return snapshot is not None and time.monotonic() - snapshot.loaded_at < self.ttl
+
+    async def _load(self, session: AsyncSession, name: str) -> ReferenceSnapshot:
+        model = self.tables[name]
+        columns = [attr.key for attr in model.__mapper__.column_attrs]
+        result_query = await session.execute(select(*(getattr(model, column) for column in columns)))
+        rows = [dict(zip(columns, row)) for row in result_query.all()]
+        snapshot = ReferenceSnapshot(rows)
+        self._snapshots[name] = snapshot
+        return snapshot
+
+    async def load_all(self, session: AsyncSession):
+        async with self._lock:
+            for name in self.tables:
+                await self._load(session, name)
+
+    async def get(self, session: AsyncSession, name: str) -> ReferenceSnapshot:
+        if self._is_fresh(name):
+            return self._snapshots[name]
+        async with self._lock:
+            if self._is_fresh(name):
+                return self._snapshots[name]
+            return await self._load(session, name)
+
+    async def get_by_id(self, session: AsyncSession, name: str, entity_id: uuid.UUID | str) -> dict | None:
+        snapshot = await self.get(session, name)
+        if isinstance(entity_id, str):
+            try:
+                entity_id = uuid.UUID(entity_id)
+            except ValueError:
+                return None
+        return snapshot.by_id.get(entity_id)
+
+    async def get_by_code(self, session: AsyncSession, name: str, code: str) -> dict | None:
+        snapshot = await self.get(session, name)
+        return snapshot.by_code.get(code)
+
+    def invalidate(self, name: str | None = None):
+        if name is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(name, None)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            name: {"rows": len(snapshot.rows), "age": round(now - snapshot.loaded_at, 1)}
+            for name, snapshot in self._snapshots.items()
+        }
+
+
+reference_data = ReferenceDataCache(tables=REFERENCE_TABLES, ttl=REFERENCE_DATA_TTL)
+
+
+async def warm_up_reference_data(session_factory):
+    try:
+        async with session_factory() as session:
+            await reference_data.load_all(session)
+    except Exception as e:
+        # без справочников приложение работает: они подгрузятся при первом обращении
+        logger.warning("Не удалось загрузить справочники при старте: %s", e)
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import os
+from urllib.parse import urlencode
+
+from fastapi.responses import Response
+
+from src.utils.cache import TTLCache
+from src.utils.fast_json import dump_json
+from src.utils.metrics import Counter
+
+
+logger = logging.getLogger(__name__)
+
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "1").lower() in ("1", "true", "yes")
+# redis://host:6379/0 — общий кэш для всех воркеров (подойдёт любой сервер с протоколом Redis);
+# без адреса кэш живёт в памяти процесса
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 5000))
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", 300))
+
+
+class MemoryCacheBackend:
+    name = "memory"
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        # поколения не вытесняются вместе с записями: сброс счётчика в 0 вернул бы к жизни старые ответы
+        self._generations: dict[str, int] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: bytes):
+        self._entries.set(key, value)
+
+    async def get_generation(self, scope: str) -> int:
+        return self._generations.get(scope, 0)
+
+    async def bump_generation(self, scope: str):
+        self._generations[scope] = self._generations.get(scope, 0) + 1
+
+    async def clear(self):
+        self._entries.clear()
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "maxsize": self._entries.maxsize}
+
+
+class RedisCacheBackend:
+    name = "redis"
+
+    def __init__(self, url: str, ttl: int, prefix: str = "response-cache"):
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url)
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(f"{self.prefix}:{key}")
+
+    async def set(self, key: str, value: bytes):
+        await self._redis.set(f"{self.prefix}:{key}", value, ex=self.ttl)
+
+    async def get_generation(self, scope: str) -> int:
+        value = await self._redis.get(f"{self.prefix}:generation:{scope}")
+        return int(value) if value is not None else 0
+
+    async def bump_generation(self, scope: str):
+        await self._redis.incr(f"{self.prefix}:generation:{scope}")
+
+    async def clear(self):
+        keys = []
+        async for key in self._redis.scan_iter(match=f"{self.prefix}:*", count=500):
+            if b":generation:" not in key:
+                keys.append(key)
+            if len(keys) >= 500:
+                await self._redis.delete(*keys)
+                keys = []
+        if keys:
+            await self._redis.delete(*keys)
+
+    async def close(self):
+        await self._redis.aclose()
+
+    def stats(self) -> dict:
+        return {"ttl": self.ttl}
+
+
+class ResponseCache:
+    # готовые JSON-ответы списков тренера по ключу (эндпоинт, тренер, параметры).
+    # В ключ входит поколение тренера: любое изменение его данных увеличивает поколение,
+    # и все закэшированные ответы тренера разом перестают находиться (старые дотухают по TTL).
+    # Поколение поднимает только воркер, сделавший запись, поэтому эндпоинты кладут в параметры
+    # и отпечаток версий строк — тело из кэша всегда соответствует ETag ответа
+    def __init__(self, backend: MemoryCacheBackend | RedisCacheBackend | None):
+        self.backend = backend
+        self.hits = Counter()
+        self.misses = Counter()
+        self.invalidations = Counter()
+        self.errors = Counter()
+
+    @staticmethod
+    def _params_digest(params: dict) -> str:
+        items = sorted((name, str(value)) for name, value in params.items() if value is not None)
+        return hashlib.sha1(urlencode(items).encode()).hexdigest()
+
+    async def _lookup(self, endpoint: str, coach_id, params: dict) -> tuple[str | None, bytes | None]:
+        try:
+            generation = await self.backend.get_generation(str(coach_id))
+            key = f"{endpoint}:{coach_id}:{generation}:{self._params_digest(params)}"
+            return key, await self.backend.get(key)
+        except Exception as e:
+            # недоступный кэш не должен ронять эндпоинт — отдаём ответ из БД
+            self.errors.inc()
+            logger.warning("Кэш ответов недоступен: %s", e)
+            return None, None
+
+    async def respond(self, endpoint: str, coach_id, params: dict, response_model, build,
+                      headers: dict | None = None) -> Response:
+        # build() -> (данные, заголовки); поколение читается до запроса в БД, поэтому ответ,
+        # собранный параллельно с изменением, ляжет под уже устаревший ключ.
+        # headers — заголовки этого запроса (ETag и т.п.), в кэш они не попадают
+        headers = dict(headers or {})
+        key = cached = None
+        if self.backend is not None:
+            key, cached = await self._lookup(endpoint, coach_id, params)
+        if cached is not None:
+            self.hits.inc()
+            cached_headers, body = cached.split(b"\n", 1)
+            return Response(content=body, media_type="application/json",
+                            headers={**headers, **json.loads(cached_headers), "X-Cache": "HIT"})
+
+        self.misses.inc()
+        data, built_headers = await build()
+        body = dump_json(response_model, data)
+        if key is not None:
+            try:
+                await self.backend.set(key, json.dumps(built_headers).encode() + b"\n" + body)
+            except Exception as e:
+                self.errors.inc()
+                logger.warning("Не удалось сохранить ответ в кэш: %s", e)
+        return Response(content=body, media_type="application/json",
+                        headers={**headers, **built_headers, "X-Cache": "MISS"})
+
+    async def invalidate(self, *coach_ids):
+        # вызывается после commit; если кэш недоступен, устаревший ответ проживёт не дольше TTL
+        if self.backend is None:
+            return
+        for coach_id in {str(coach_id) for coach_id in coach_ids if coach_id is not None}:
+            try:
+                await self.backend.bump_generation(coach_id)
+                self.invalidations.inc()
+            except Exception as e:
+                self.errors.inc()
+                logger.warning("Не удалось сбросить кэш ответов тренера %s: %s", coach_id, e)
+
+    async def clear(self):
+        if self.backend is not None:
+            await self.backend.clear()
+
+    async def close(self):
+        if self.backend is not None:
+            await self.backend.close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name if self.backend is not None else None,
+            "hits": self.hits.value,
+            "misses": self.misses.value,
+            "invalidations": self.invalidations.value,
+            "errors": self.errors.value,
+            **(self.backend.stats() if self.backend is not None else {}),
+        }
+
+
+def _create_backend():
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    if RESPONSE_CACHE_URL:
+        return RedisCacheBackend(RESPONSE_CACHE_URL, ttl=RESPONSE_CACHE_TTL)
+    return MemoryCacheBackend(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+
+response_cache = ResponseCache(_create_backend())
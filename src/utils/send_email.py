@@ -1,7 +1,189 @@
+import asyncio
+import logging
 import os
+import time
+from contextlib import asynccontextmanager
 from email.message import EmailMessage
-from aiosmtplib import SMTP
+from aiosmtplib import SMTP, SMTPException, SMTPResponseException
+from fastapi import HTTPException
 from src.config import SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD
+from src.utils.metrics import Counter
+
+
+logger = logging.getLogger(__name__)
+
+
+SMTP_USE_TLS = os.getenv("SMTP_USE_TLS", "1").lower() in ("1", "true", "yes")
+SMTP_POOL_SIZE = int(os.getenv("SMTP_POOL_SIZE", 2))
+SMTP_IDLE_TIMEOUT = float(os.getenv("SMTP_IDLE_TIMEOUT", 60))
+MAIL_QUEUE_SIZE = int(os.getenv("MAIL_QUEUE_SIZE", 1000))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", 20))
+MAIL_MAX_RETRIES = int(os.getenv("MAIL_MAX_RETRIES", 5))
+MAIL_RETRY_DELAY = float(os.getenv("MAIL_RETRY_DELAY", 2))
+MAIL_SHUTDOWN_TIMEOUT = float(os.getenv("MAIL_SHUTDOWN_TIMEOUT", 10))
+
+
+class SMTPConnectionPool:
+    # авторизованные SMTP-соединения переиспользуются между письмами;
+    # соединение, простоявшее дольше SMTP_IDLE_TIMEOUT, закрываем и открываем новое
+    def __init__(self, size: int, idle_timeout: float):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self._idle: list[tuple[SMTP, float]] = []
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _connect(self) -> SMTP:
+        smtp = SMTP(hostname=SMTP_HOST, port=SMTP_PORT, use_tls=SMTP_USE_TLS)
+        await smtp.connect()
+        if SMTP_PASSWORD:
+            await smtp.login(SMTP_USER, SMTP_PASSWORD)
+        return smtp
+
+    @staticmethod
+    async def _quit(smtp: SMTP):
+        try:
+            await smtp.quit()
+        except SMTPException:
+            smtp.close()
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self._semaphore:
+            smtp = None
+            while self._idle and smtp is None:
+                candidate, released_at = self._idle.pop()
+                if candidate.is_connected and time.monotonic() - released_at < self.idle_timeout:
+                    smtp = candidate
+                else:
+                    await self._quit(candidate)
+            if smtp is None:
+                smtp = await self._connect()
+            try:
+                yield smtp
+            except Exception:
+                smtp.close()
+                raise
+            self._idle.append((smtp, time.monotonic()))
+
+    async def close(self):
+        while self._idle:
+            smtp, _ = self._idle.pop()
+            await self._quit(smtp)
+
+
+class MailDispatcher:
+    # in-process outbox: обработчики только ставят письмо в очередь,
+    # фоновые воркеры отправляют письма пачками с повторами и экспоненциальной задержкой
+    def __init__(self, pool: SMTPConnectionPool, queue_size: int, batch_size: int,
+                 max_retries: int, retry_delay: float):
+        self.pool = pool
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._retries: set[asyncio.Task] = set()
+
+        self.sent = Counter()
+        self.failed = Counter()
+        self.retried = Counter()
+
+    async def start(self):
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.pool.size)]
+
+    async def stop(self, timeout: float = MAIL_SHUTDOWN_TIMEOUT):
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Не отправлено писем при остановке: %s", self._queue.qsize())
+        for task in [*self._workers, *self._retries]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retries, return_exceptions=True)
+        self._workers = []
+        self._retries = set()
+        self._queue = None
+        await self.pool.close()
+
+    async def enqueue(self, message: EmailMessage):
+        await self.start()
+        try:
+            self._queue.put_nowait((message, 0))
+        except asyncio.QueueFull:
+            raise HTTPException(status_code=503, detail="Сервер перегружен, попробуйте позже")
+
+    async def _worker(self):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            try:
+                await self._send_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _send_batch(self, batch: list[tuple[EmailMessage, int]]):
+        sent = 0
+        try:
+            async with self.pool.connection() as smtp:
+                for message, attempt in batch:
+                    try:
+                        await smtp.send_message(message)
+                        self.sent.inc()
+                    except SMTPResponseException as e:
+                        # 5xx — постоянная ошибка (например, адрес не существует), повторять бессмысленно
+                        if e.code >= 500:
+                            self.failed.inc()
+                            logger.error("Письмо на %s отклонено: %s", message["To"], e)
+                        else:
+                            self._retry(message, attempt)
+                    sent += 1
+        except Exception as e:
+            logger.warning("Ошибка SMTP-соединения: %s", e)
+            for message, attempt in batch[sent:]:
+                self._retry(message, attempt)
+
+    def _retry(self, message: EmailMessage, attempt: int):
+        if attempt + 1 >= self.max_retries:
+            self.failed.inc()
+            logger.error("Не удалось отправить письмо на %s после %s попыток", message["To"], attempt + 1)
+            return
+        self.retried.inc()
+        task = asyncio.create_task(self._requeue_later(message, attempt + 1))
+        self._retries.add(task)
+        task.add_done_callback(self._retries.discard)
+
+    async def _requeue_later(self, message: EmailMessage, attempt: int):
+        await asyncio.sleep(self.retry_delay * 2 ** (attempt - 1))
+        await self._queue.put((message, attempt))
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "scheduled_retries": len(self._retries),
+            "sent": self.sent.value,
+            "failed": self.failed.value,
+            "retried": self.retried.value,
+        }
+
+
+mail_dispatcher = MailDispatcher(
+    pool=SMTPConnectionPool(size=SMTP_POOL_SIZE, idle_timeout=SMTP_IDLE_TIMEOUT),
+    queue_size=MAIL_QUEUE_SIZE,
+    batch_size=MAIL_BATCH_SIZE,
+    max_retries=MAIL_MAX_RETRIES,
+    retry_delay=MAIL_RETRY_DELAY,
+)
+
 
 async def send_registration_email(to_email: str, password: str):
     message = EmailMessage()
@@ -21,12 +203,7 @@ async def send_registration_email(to_email: str, password: str):
 """
     )
 
-    smtp = SMTP(hostname=SMTP_HOST, port=SMTP_PORT, use_tls=True)
-
-    await smtp.connect()
-    await smtp.login(SMTP_USER, SMTP_PASSWORD)
-    await smtp.send_message(message)
-    await smtp.quit()
+    await mail_dispatcher.enqueue(message)
 
 
 
@@ -47,9 +224,4 @@ P.S. Если вы получили это сообщение по ошибке,
 """
     )
 
-    smtp = SMTP(hostname=SMTP_HOST, port=SMTP_PORT, use_tls=True)
-
-    await smtp.connect()
-    await smtp.login(SMTP_USER, SMTP_PASSWORD)
-    await smtp.send_message(message)
-    await smtp.quit()
\ No newline at end of file
+    await mail_dispatcher.enqueue(message)
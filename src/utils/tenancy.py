@@ -0,0 +1,108 @@
+import os
+import uuid
+from contextvars import ContextVar
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, with_loader_criteria
+
+from src.models.users import OrganizationORM, UserORM, TrainingPaymentORM
+from src.models.leaderboards import StudentSeasonStatsORM
+from src.utils.cache import TTLCache
+
+
+TENANT_BASE_DOMAIN = os.getenv("TENANT_BASE_DOMAIN", "karate-coaching.ru").lower()
+TENANT_RESERVED_SUBDOMAINS = {"www", "api", "admin"}
+TENANT_CACHE_SIZE = int(os.getenv("TENANT_CACHE_SIZE", 1000))
+TENANT_CACHE_TTL = float(os.getenv("TENANT_CACHE_TTL", 300))
+
+# организация текущего запроса; None — основной домен, запросы не ограничиваются
+current_organization_id: ContextVar[uuid.UUID | None] = ContextVar("current_organization_id", default=None)
+
+# модели с колонкой organization_id, которые фильтруются по организации автоматически
+TENANT_SCOPED_MODELS = (UserORM, TrainingPaymentORM, StudentSeasonStatsORM)
+
+_NOT_FOUND = "not_found"
+
+
+def get_subdomain(host: str | None) -> str | None:
+    if not host:
+        return None
+    host = host.split(":", 1)[0].lower().rstrip(".")
+    suffix = f".{TENANT_BASE_DOMAIN}"
+    if not host.endswith(suffix):
+        return None
+    subdomain = host[:-len(suffix)]
+    if not subdomain or "." in subdomain or subdomain in TENANT_RESERVED_SUBDOMAINS:
+        return None
+    return subdomain
+
+
+class TenantResolver:
+    # поддомен -> id организации; неизвестные поддомены тоже кэшируются,
+    # чтобы перебор хостов не превращался в запросы к БД
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def resolve(self, session: AsyncSession, subdomain: str) -> uuid.UUID | None:
+        organization_id = self._cache.get(subdomain)
+        if organization_id is None:
+            query = (
+                select(OrganizationORM.id)
+                .where(OrganizationORM.subdomain == subdomain,
+                       OrganizationORM.is_active.is_(True))
+            )
+            organization_id = await session.scalar(query) or _NOT_FOUND
+            self._cache.set(subdomain, organization_id)
+        return None if organization_id == _NOT_FOUND else organization_id
+
+    def invalidate(self, subdomain: str | None = None):
+        if subdomain is None:
+            self._cache.clear()
+        else:
+            self._cache.delete(subdomain)
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+tenant_resolver = TenantResolver(maxsize=TENANT_CACHE_SIZE, ttl=TENANT_CACHE_TTL)
+
+
+async def get_coach_organization_id(session: AsyncSession, coach_id) -> uuid.UUID | None:
+    # ученик принадлежит организации своего тренера, а не поддомену, с которого пришёл запрос
+    query = (
+        select(UserORM.organization_id)
+        .where(UserORM.id == coach_id)
+        .execution_options(skip_tenant_scope=True)
+    )
+    return await session.scalar(query)
+
+
+@event.listens_for(Session, "before_flush")
+def _assign_tenant(session, flush_context, instances):
+    # новые строки моделей с organization_id получают организацию запроса,
+    # иначе их не найдут чтения, ограниченные этой организацией
+    organization_id = current_organization_id.get()
+    if organization_id is None:
+        return
+    for obj in session.new:
+        if isinstance(obj, TENANT_SCOPED_MODELS) and obj.organization_id is None:
+            obj.organization_id = organization_id
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _scope_to_tenant(execute_state):
+    # ко всем ORM-запросам по моделям с organization_id добавляется фильтр по организации запроса;
+    # отключается execution_options(skip_tenant_scope=True)
+    organization_id = current_organization_id.get()
+    if organization_id is None or execute_state.execution_options.get("skip_tenant_scope"):
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    execute_state.statement = execute_state.statement.options(*(
+        with_loader_criteria(model, lambda cls: cls.organization_id == organization_id, include_aliases=True)
+        for model in TENANT_SCOPED_MODELS
+    ))
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from src.utils.imports import iter_import_rows
+
+
+class FakeRequest:
+    def __init__(self, body: str, content_type: str = "text/csv", chunk_size: int = 7):
+        self.body = body.encode()
+        self.chunk_size = chunk_size
+        self.headers = {"content-type": content_type}
+
+    async def stream(self):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+
+def read_rows(body: str, **kwargs) -> list:
+    async def collect():
+        return [row async for _, row in iter_import_rows(FakeRequest(body, **kwargs))]
+    return asyncio.run(collect())
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_csv_stray_quote_does_not_drop_following_rows(chunk_size):
+    rows = read_rows('name,h\nA,5"7\nB,6\nC,7\n', chunk_size=chunk_size)
+    assert rows == [{"name": "A", "h": '5"7'}, {"name": "B", "h": "6"}, {"name": "C", "h": "7"}]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 1024])
+def test_csv_quoted_field_with_newline(chunk_size):
+    body = 'name;comment\r\n\r\n"Иван";"строка 1\r\nстрока ""2"""\r\nПётр;ok\r\n'
+    rows = read_rows(body, chunk_size=chunk_size)
+    assert rows == [{"name": "Иван", "comment": 'строка 1\nстрока "2"'}, {"name": "Пётр", "comment": "ok"}]
+
+
+def test_csv_unparsable_rows_become_errors():
+    assert read_rows('a,b\n1,"x"y\n2,3\n"4,5\n') == [None, {"a": "2", "b": "3"}, None]
+
+
+def test_json_array():
+    assert read_rows('[{"a": 1}, {"b": 2}]', content_type="application/json") == [{"a": 1}, {"b": 2}]